@@ -0,0 +1,348 @@
+import asyncio
+import math
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.exceptions import PermissionDenied as DjangoPermissionDenied
+from django.db.models import Max
+from django.http import Http404, HttpResponse
+from django.views import View
+
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+
+from .authentication import CachedJWTAuthentication
+from .changes import changes_since, get_config as get_changes_config
+from .context import aload_project_context
+from .filters import filter_issues
+from .instrumentation import timed
+from .models import Project, Issue, Comment, Change
+from .pagination import ProjectCursorPagination, IssueKeysetPagination
+from .renderers import JSONRenderer
+from .response_cache import response_cache
+from .throttling import take_token, enter
+from .serializers import (
+    ProjectSerializer,
+    IssueSerializer,
+    CommentSerializer,
+    UserSerializer,
+)
+from .utils import ais_contributor, parse_expand, parse_fields
+from .versioning import (
+    not_modified,
+    add_validators,
+    project_validators,
+    comments_validators,
+    comment_validators,
+)
+
+
+class AsyncReadView(View):
+    """
+    Async view answering GET like the api's APIView, with the same
+    authentication, permissions and serializers, but the async ORM.
+    Subclasses set the url kwargs of the project context as APIView ones do,
+    and are throttled like them.
+    """
+    http_method_names = ['get', 'head', 'options']
+    authentication_class = CachedJWTAuthentication
+    project_context = True
+    # Counted in the client's in-flight requests.
+    expensive = False
+
+    async def dispatch(self, request, *args, **kwargs):
+        authenticator = self.authentication_class()
+        # The DRF request gives query_params to pagination and filters.
+        request = Request(request)
+        try:
+            result = await authenticator.aauthenticate(request._request)
+            if result is None:
+                raise exceptions.NotAuthenticated()
+            request.user = result[0]
+
+            # Throttled before the permission checks, as the api's views.
+            release = await self.throttle(request)
+            try:
+                if self.project_context:
+                    with timed('perm'):
+                        self.context = await aload_project_context(
+                            request.user, self
+                        )
+                        member = await ais_contributor(request.user,
+                                                       self.context.project)
+                    if not member:
+                        raise exceptions.PermissionDenied()
+                return await super().dispatch(request, *args, **kwargs)
+            finally:
+                if release:
+                    await sync_to_async(release)()
+        except Exception as exc:
+            return self.handle_exception(exc, authenticator, request)
+
+    async def throttle(self, request):
+        """
+        Run the checks of the api's throttles. Return the release of an
+        expensive request.
+        """
+        rate_limit, wait = await sync_to_async(take_token)(request, self)
+        request._request.rate_limit = rate_limit
+        if wait is not None:
+            raise exceptions.Throttled(wait)
+        if not self.expensive:
+            return None
+        release = await sync_to_async(enter)(request)
+        if release is None:
+            raise exceptions.Throttled(1)
+        return release
+
+    def handle_exception(self, exc, authenticator, request):
+        if isinstance(exc, Http404):
+            exc = exceptions.NotFound()
+        elif isinstance(exc, DjangoPermissionDenied):
+            exc = exceptions.PermissionDenied()
+        elif not isinstance(exc, exceptions.APIException):
+            raise exc
+
+        detail = exc.detail
+        if not isinstance(detail, (list, dict)):
+            detail = {'detail': detail}
+        response = self.render(detail, status=exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated,
+                            exceptions.AuthenticationFailed)):
+            response['WWW-Authenticate'] = authenticator.authenticate_header(
+                request
+            )
+        if isinstance(exc, exceptions.Throttled) and exc.wait is not None:
+            response['Retry-After'] = '%d' % exc.wait
+        return response
+
+    def render(self, data, status=200):
+        return HttpResponse(JSONRenderer().render(data), status=status,
+                            content_type='application/json')
+
+
+class AsyncProjectListView(AsyncReadView):
+    """Async view for list the user's projects."""
+    project_context = False
+
+    async def get(self, request):
+        projects = Project.objects.filter(contributor__user_id=request.user.pk)
+        plan = ProjectSerializer.values_plan(
+            fields=parse_fields(request, ProjectSerializer)
+        )
+        paginator = ProjectCursorPagination()
+        # DRF's cursor pagination evaluates its page synchronously.
+        page = await sync_to_async(paginator.paginate_queryset)(
+            plan.values(projects), request, self
+        )
+        return self.render(paginator.get_paginated_response(
+            plan.data(page)
+        ).data)
+
+
+class AsyncProjectDetailView(AsyncReadView):
+    """Async view for get a project."""
+
+    async def get(self, request, p_id):
+        project = self.context.project
+        validators = project_validators(request, project)
+        response = not_modified(request, validators)
+        if response:
+            return response
+
+        async def build():
+            return ProjectSerializer(
+                project, fields=parse_fields(request, ProjectSerializer)
+            ).data
+
+        data = await response_cache.aget_or_build(validators[0], build)
+        return add_validators(self.render(data), validators)
+
+
+class AsyncUserView(AsyncReadView):
+    """Async view for get project's contributors."""
+
+    async def get(self, request, p_id):
+        project = self.context.project
+        validators = project_validators(request, project)
+        response = not_modified(request, validators)
+        if response:
+            return response
+
+        async def build():
+            plan = UserSerializer.values_plan(
+                fields=parse_fields(request, UserSerializer)
+            )
+            p_users = User.objects.filter(contributor__project_id=project)
+            return plan.data([row async for row in plan.values(p_users)])
+
+        data = await response_cache.aget_or_build(validators[0], build)
+        return add_validators(self.render(data), validators)
+
+
+class AsyncIssueView(AsyncReadView):
+    """Async view for get project's issues."""
+
+    async def get(self, request, p_id):
+        project = self.context.project
+        validators = project_validators(request, project)
+        response = not_modified(request, validators)
+        if response:
+            return response
+
+        async def build():
+            plan = IssueSerializer.values_plan(
+                parse_expand(request, IssueSerializer),
+                parse_fields(request, IssueSerializer)
+            )
+            issues = filter_issues(Issue.objects.filter(project_id=project),
+                                   request.query_params)
+
+            paginator = IssueKeysetPagination()
+            page = await paginator.apaginate_queryset(plan.values(issues),
+                                                      request, self)
+            return paginator.get_paginated_response(plan.data(page)).data
+
+        data = await response_cache.aget_or_build(validators[0], build)
+        return add_validators(self.render(data), validators)
+
+
+class AsyncCommentView(AsyncReadView):
+    """Async view for get issue's comments."""
+    issue_url_kwarg = 'i_id'
+
+    async def get(self, request, p_id, i_id):
+        issue = self.context.issue
+        validators = comments_validators(request, issue)
+        response = not_modified(request, validators)
+        if response:
+            return response
+
+        async def build():
+            plan = CommentSerializer.values_plan(
+                parse_expand(request, CommentSerializer),
+                parse_fields(request, CommentSerializer)
+            )
+            comments = plan.values(
+                Comment.objects.filter(issue_id=issue).order_by('created_time')
+            )
+            return plan.data([row async for row in comments])
+
+        data = await response_cache.aget_or_build(validators[0], build)
+        return add_validators(self.render(data), validators)
+
+
+class AsyncCommentDetailView(AsyncReadView):
+    """Async view for get a comment."""
+    issue_url_kwarg = 'i_id'
+    comment_url_kwarg = 'pk'
+
+    async def get(self, request, p_id, i_id, pk):
+        comment = self.context.comment
+        validators = comment_validators(request, comment)
+        response = not_modified(request, validators)
+        if response:
+            return response
+
+        serializer = CommentSerializer(
+            comment, expand=parse_expand(request, CommentSerializer),
+            fields=parse_fields(request, CommentSerializer)
+        )
+        return add_validators(self.render(serializer.data), validators)
+
+
+class ChangesGone(exceptions.APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = ('Changes after this cursor were removed, fetch the '
+                      'project again.')
+    default_code = 'gone'
+
+
+class AsyncChangeView(AsyncReadView):
+    """
+    Async view for get the changes of a project after the `since` cursor,
+    waiting up to `wait` seconds for one to happen. Without `since`, only
+    the current cursor is returned: clients read it, fetch the project in
+    full, then follow the changes from it.
+    """
+    # Waiting requests hold a connection.
+    expensive = True
+    # Model and serializer of the objects of each kind of change.
+    kinds = {
+        Change.CONTRIBUTOR: (User, UserSerializer),
+        Change.ISSUE: (Issue, IssueSerializer),
+        Change.COMMENT: (Comment, CommentSerializer),
+    }
+
+    async def get(self, request, p_id):
+        project = self.context.project
+        config = get_changes_config()
+        try:
+            since = request.query_params.get('since')
+            since = None if since is None else int(since)
+            wait = float(request.query_params.get('wait', 0))
+            if not math.isfinite(wait):
+                raise ValueError(wait)
+        except ValueError:
+            raise exceptions.ValidationError(
+                {'detail': 'since must be an integer, wait a number.'}
+            )
+
+        if since is None:
+            latest = await Change.objects.filter(
+                project_id=project
+            ).aaggregate(cursor=Max('id'))
+            return self.render({
+                'changes': [], 'more': False,
+                'cursor': max(latest['cursor'] or 0, project.changes_horizon),
+            })
+        if since < project.changes_horizon:
+            raise ChangesGone()
+
+        deadline = time.monotonic() + max(0, min(wait, config['MAX_WAIT']))
+        while True:
+            changes = [change async for change in changes_since(
+                project, since, config['PAGE_SIZE']
+            )]
+            remaining = deadline - time.monotonic()
+            if changes or remaining <= 0:
+                break
+            await asyncio.sleep(min(config['POLL_INTERVAL'], remaining))
+
+        return self.render({
+            'changes': await self.entries(project, changes),
+            'more': len(changes) == config['PAGE_SIZE'],
+            'cursor': changes[-1].id if changes else since,
+        })
+
+    async def entries(self, project, changes):
+        """
+        The last change of each object in the page, in cursor order, with
+        the current data of the objects that still exist.
+        """
+        latest = {}
+        for change in changes:
+            latest.pop((change.kind, change.object_id), None)
+            latest[(change.kind, change.object_id)] = change
+
+        data = {(Change.PROJECT, project.pk): ProjectSerializer(project).data}
+        for kind, (model, serializer) in self.kinds.items():
+            ids = [object_id for change_kind, object_id in latest
+                   if change_kind == kind]
+            if not ids:
+                continue
+            objects = model.objects.filter(pk__in=ids)
+            if kind == Change.CONTRIBUTOR:
+                objects = objects.filter(contributor__project_id=project)
+            elif kind == Change.ISSUE:
+                objects = objects.filter(project_id=project)
+            else:
+                objects = objects.filter(issue_id__project_id=project)
+            data.update({(kind, instance.pk): serializer(instance).data
+                         async for instance in objects})
+
+        return [{'cursor': change.id, 'kind': change.kind,
+                 'id': change.object_id, 'action': change.action,
+                 'data': data.get(key)}
+                for key, change in latest.items()]
@@ -0,0 +1,145 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+DEFAULT_CONFIG = {
+    'CACHE_ALIAS': 'default',
+    'USER_CACHE_TTL': 60,
+    'STATELESS_READS': False,
+}
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, 'SOFTDESK_AUTH', {})}
+
+
+def user_cache_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def cached_fields(user):
+    """
+    Fields of the user kept in the shared cache: enough for the views and
+    the checks of a cached user, without the password hash or the profile.
+    """
+    return {user._meta.pk.attname: user.pk,
+            user.USERNAME_FIELD: user.get_username(),
+            'is_active': user.is_active}
+
+
+def forget_user(user_id):
+    """Drop the cached user, after it changed."""
+    config = get_config()
+    caches[config['CACHE_ALIAS']].delete(user_cache_key(user_id))
+
+
+class ClaimsUser(TokenUser):
+    """
+    User of the token claims. Tokens issued before the is_active claim
+    was added count as active.
+    """
+    @property
+    def is_active(self):
+        return self.token.get('is_active', True)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication caching the user lookup for a short time.
+    With STATELESS_READS, safe requests get a user built from the token
+    claims and run no query at all.
+    """
+    def authenticate(self, request):
+        self.setup(request)
+        return super().authenticate(request)
+
+    async def aauthenticate(self, request):
+        """Authenticate a request of the async views."""
+        self.setup(request)
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    def setup(self, request):
+        self.config = get_config()
+        self.cache = caches[self.config['CACHE_ALIAS']]
+        self.stateless = (self.config['STATELESS_READS'] and
+                          request.method in SAFE_METHODS)
+
+    def get_token_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification'))
+        user = ClaimsUser(validated_token)
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'),
+                                       code='user_inactive')
+        return user
+
+    def get_cached_user(self, fields):
+        """Unsaved user of the cached fields, checked again."""
+        user = self.user_model(**fields)
+        # Other checks ran when the user was cached, and any change to the
+        # user (password included) drops it from the cache.
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'),
+                                       code='user_inactive')
+        return user
+
+    def get_user(self, validated_token):
+        if self.stateless:
+            return self.get_token_user(validated_token)
+
+        key = user_cache_key(validated_token.get(api_settings.USER_ID_CLAIM))
+        fields = self.cache.get(key)
+        if fields is not None:
+            return self.get_cached_user(fields)
+
+        user = super().get_user(validated_token)
+        self.cache.set(key, cached_fields(user),
+                       self.config['USER_CACHE_TTL'])
+        return user
+
+    async def aget_user(self, validated_token):
+        """get_user with the async cache and ORM, same checks included."""
+        if self.stateless:
+            return self.get_token_user(validated_token)
+
+        key = user_cache_key(validated_token.get(api_settings.USER_ID_CLAIM))
+        fields = await self.cache.aget(key)
+        if fields is not None:
+            return self.get_cached_user(fields)
+
+        self.get_token_user(validated_token)
+        try:
+            user = await self.user_model.objects.aget(**{
+                api_settings.USER_ID_FIELD:
+                    validated_token[api_settings.USER_ID_CLAIM]
+            })
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'),
+                                       code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'),
+                                       code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been "
+                                         "changed."),
+                                       code='password_changed')
+        await self.cache.aset(key, cached_fields(user),
+                              self.config['USER_CACHE_TTL'])
+        return user
@@ -0,0 +1,188 @@
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Exists, Max, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import Project, Contributor, Issue, Comment, Change
+
+DEFAULT_CONFIG = {
+    # Changes read by a request of the feed.
+    'PAGE_SIZE': 100,
+    # Longest wait of a long-polling request, in seconds.
+    'MAX_WAIT': 30,
+    # Delay between two reads of the log while a request waits.
+    'POLL_INTERVAL': 0.5,
+    # Changes older than this are removed by compact_changes.
+    'RETENTION_DAYS': 30,
+}
+
+# Kind of the changes of each model.
+KINDS = {
+    Project: Change.PROJECT,
+    Contributor: Change.CONTRIBUTOR,
+    Issue: Change.ISSUE,
+    Comment: Change.COMMENT,
+}
+
+# Issues and their comments deleted by a set-based query, formatted with
+# the placeholders of the issue ids.
+LOG_ISSUE_DELETES_SQL = (
+    'INSERT INTO api_change '
+    '(project_id_id, kind, object_id, action, created_time) '
+    f"SELECT project_id_id, '{Change.ISSUE}', id, '{Change.DELETED}', %s "
+    'FROM api_issue WHERE id IN ({ids}) UNION ALL '
+    f"SELECT i.project_id_id, '{Change.COMMENT}', c.comment_id, "
+    f"'{Change.DELETED}', %s "
+    'FROM api_comment c JOIN api_issue i ON i.id = c.issue_id_id '
+    'WHERE c.issue_id_id IN ({ids})'
+)
+
+_deferred = threading.local()
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, 'SOFTDESK_CHANGES', {})}
+
+
+def object_id(instance):
+    """Id of an object in the feed, contributors being named by user."""
+    if isinstance(instance, Contributor):
+        return instance.user_id_id
+    return instance.pk
+
+
+def log_changes(instances, action):
+    """Append a change of each instance to the log, with one query."""
+    # Ids are read now, deleted instances lose theirs after the signals.
+    entries = [(instance, object_id(instance), action)
+               for instance in instances]
+    pending = getattr(_deferred, 'pending', None)
+    if pending is not None:
+        pending.extend(entries)
+        return
+    write_changes(entries)
+
+
+def lock_projects(project_ids=(), issue_ids=()):
+    """
+    Lock the projects, given by id or by the id of one of their issues,
+    until the transaction ends, before their changes are inserted.
+    The cursor of the feed is the id of the changes, which is taken at
+    insert time and not at commit: a change committed after one with a
+    greater id would be skipped by readers past that one. Writers of a
+    project's changes wait for each other, so its ids commit in order.
+    SQLite runs one writer at a time and needs no lock.
+    """
+    connection = connections[router.db_for_write(Change)]
+    if not connection.features.has_select_for_update:
+        return
+    list(Project.objects.select_for_update(of=('self',)).filter(
+        Q(pk__in=project_ids)
+        | Q(pk__in=Issue.objects.filter(pk__in=issue_ids).values('project_id'))
+    ).order_by('pk').values_list('pk', flat=True))
+
+
+def write_changes(entries):
+    """
+    Insert the changes of (instance, id, action) entries in one query.
+    Comments whose issue isn't loaded read its project in a subquery.
+    A comment change updates the comment columns of its issue, so the
+    issue is logged as updated too.
+    """
+    changes = []
+    project_ids, issue_ids = set(), set()
+    commented = {}
+    for instance, pk, action in entries:
+        if isinstance(instance, Project):
+            project_id = pk
+        elif isinstance(instance, Comment):
+            if Comment.issue_id.is_cached(instance):
+                project_id = instance.issue_id.project_id_id
+            else:
+                issue_ids.add(instance.issue_id_id)
+                project_id = Subquery(Issue.objects.filter(
+                    pk=instance.issue_id_id
+                ).values('project_id'))
+        else:
+            project_id = instance.project_id_id
+        if not isinstance(project_id, Subquery):
+            project_ids.add(project_id)
+        changes.append(Change(project_id_id=project_id,
+                              kind=KINDS[type(instance)], object_id=pk,
+                              action=action))
+        if isinstance(instance, Comment):
+            commented[instance.issue_id_id] = project_id
+    changes += [Change(project_id_id=project_id, kind=Change.ISSUE,
+                       object_id=issue_id, action=Change.UPDATED)
+                for issue_id, project_id in commented.items()]
+    if changes:
+        lock_projects(project_ids, issue_ids)
+        Change.objects.bulk_create(changes)
+
+
+@contextmanager
+def deferred_changes():
+    """Write the changes logged in the block with one query, when it ends."""
+    if getattr(_deferred, 'pending', None) is not None:
+        yield
+        return
+
+    _deferred.pending = []
+    try:
+        yield
+    finally:
+        pending, _deferred.pending = _deferred.pending, None
+    write_changes(pending)
+
+
+def log_issue_deletes(issue_ids):
+    """Log the deletion of issues and of their comments, before it runs."""
+    lock_projects(issue_ids=issue_ids)
+    connection = connections[router.db_for_write(Change)]
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    ids = ', '.join(['%s'] * len(issue_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(LOG_ISSUE_DELETES_SQL.format(ids=ids),
+                       [now, *issue_ids, now, *issue_ids])
+
+
+def changes_since(project, since, limit):
+    """Queryset of the next changes of a project after the cursor."""
+    return Change.objects.filter(project_id=project,
+                                 id__gt=since).order_by('id')[:limit]
+
+
+def compact(retention_days=None):
+    """
+    Remove the changes superseded by a later change of the same object,
+    which readers of any cursor don't need, then the changes older than
+    the retention, raising the horizon of their projects.
+    Return the numbers of superseded and expired changes removed.
+    """
+    if retention_days is None:
+        retention_days = get_config()['RETENTION_DAYS']
+
+    later = Change.objects.filter(project_id=OuterRef('project_id'),
+                                  kind=OuterRef('kind'),
+                                  object_id=OuterRef('object_id'),
+                                  id__gt=OuterRef('id'))
+    superseded, _ = Change.objects.filter(Exists(later)).delete()
+
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    expired = 0
+    horizons = Change.objects.filter(created_time__lt=cutoff).values(
+        'project_id'
+    ).annotate(horizon=Max('id')).order_by()
+    for row in horizons:
+        Project.objects.filter(pk=row['project_id'],
+                               changes_horizon__lt=row['horizon']).update(
+            changes_horizon=row['horizon']
+        )
+        expired += Change.objects.filter(
+            project_id=row['project_id'], id__lte=row['horizon']
+        ).delete()[0]
+    return superseded, expired
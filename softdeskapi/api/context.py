@@ -0,0 +1,133 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Exists, OuterRef
+from django.http import Http404
+from rest_framework.generics import get_object_or_404
+
+from .membership import membership_cache
+from .models import Project, Contributor, Issue, Comment
+from .utils import is_contributor
+
+
+class ProjectContext:
+    """Project, issue and comment targeted by a request."""
+    def __init__(self, user, project, issue=None, comment=None,
+                 is_contributor=None):
+        self.user = user
+        self.project = project
+        self.issue = issue
+        self.comment = comment
+        self._is_contributor = is_contributor
+
+    @property
+    def is_contributor(self):
+        # Resolved on first use, through the membership cache.
+        if self._is_contributor is None:
+            self._is_contributor = is_contributor(self.user, self.project)
+        return self._is_contributor
+
+
+def cached_membership(user, project_id):
+    """Membership found in the cache, None when a query must tell it."""
+    if user.pk is None:
+        return False
+    return membership_cache.get(user.pk, project_id)
+
+
+def annotate_membership(queryset, user, member, project_path):
+    """
+    Annotate whether the user contributes to the project at project_path,
+    unless the membership is already known.
+    """
+    if member is not None:
+        return queryset
+    return queryset.annotate(is_member=Exists(Contributor.objects.filter(
+        user_id=user.pk, project_id=OuterRef(project_path)
+    )))
+
+
+def build_context(user, member, obj, project, issue=None, comment=None):
+    """ProjectContext of the loaded objects, caching a queried membership."""
+    if member is None:
+        member = obj.is_member
+        membership_cache.set(user.pk, project.pk, member)
+    return ProjectContext(user, project, issue, comment, member)
+
+
+def load_project_context(user, view):
+    """
+    Load the objects named in the url kwargs with a single query, which
+    also tells the membership of the user when it isn't cached.
+    """
+    kwargs = view.kwargs
+    issue_kwarg = getattr(view, 'issue_url_kwarg', None)
+    comment_kwarg = getattr(view, 'comment_url_kwarg', None)
+    member = cached_membership(user, kwargs['p_id'])
+
+    if comment_kwarg:
+        queryset = Comment.objects.select_related('issue_id__project_id')
+        queryset = annotate_membership(queryset, user, member,
+                                       'issue_id__project_id')
+        comment = get_object_or_404(
+            queryset, pk=kwargs[comment_kwarg], issue_id=kwargs[issue_kwarg],
+            issue_id__project_id=kwargs['p_id'],
+            issue_id__project_id__deleted_time=None
+        )
+        issue = comment.issue_id
+        return build_context(user, member, comment, issue.project_id, issue,
+                             comment)
+
+    if issue_kwarg:
+        queryset = Issue.objects.select_related('project_id')
+        queryset = annotate_membership(queryset, user, member, 'project_id')
+        issue = get_object_or_404(queryset, pk=kwargs[issue_kwarg],
+                                  project_id=kwargs['p_id'],
+                                  project_id__deleted_time=None)
+        return build_context(user, member, issue, issue.project_id, issue)
+
+    queryset = annotate_membership(Project.objects, user, member, 'pk')
+    project = get_object_or_404(queryset, pk=kwargs['p_id'],
+                                deleted_time=None)
+    return build_context(user, member, project, project)
+
+
+async def aload_project_context(user, view):
+    """load_project_context with the async ORM."""
+    kwargs = view.kwargs
+    issue_kwarg = getattr(view, 'issue_url_kwarg', None)
+    comment_kwarg = getattr(view, 'comment_url_kwarg', None)
+
+    try:
+        if comment_kwarg:
+            queryset = Comment.objects.select_related('issue_id__project_id')
+            comment = await queryset.aget(
+                pk=kwargs[comment_kwarg], issue_id=kwargs[issue_kwarg],
+                issue_id__project_id=kwargs['p_id'],
+                issue_id__project_id__deleted_time=None
+            )
+            issue = comment.issue_id
+            return ProjectContext(user, issue.project_id, issue, comment)
+
+        if issue_kwarg:
+            queryset = Issue.objects.select_related('project_id')
+            issue = await queryset.aget(pk=kwargs[issue_kwarg],
+                                        project_id=kwargs['p_id'],
+                                        project_id__deleted_time=None)
+            return ProjectContext(user, issue.project_id, issue)
+
+        project = await Project.objects.aget(pk=kwargs['p_id'],
+                                             deleted_time=None)
+        return ProjectContext(user, project)
+    except ObjectDoesNotExist:
+        raise Http404
+
+
+def get_project_context(request, view):
+    """
+    Return the objects targeted by the request.
+    They are loaded on first access and shared by permissions and views.
+    """
+    context = getattr(request, 'project_context', None)
+    if context is None:
+        context = load_project_context(request.user, view)
+        request.project_context = context
+    return context
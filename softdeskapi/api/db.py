@@ -0,0 +1,49 @@
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA = 'replica'
+
+# True while a safe request is served, in its thread or task.
+_safe_request = ContextVar('safe_request', default=False)
+
+
+class ReplicaRouter:
+    """Send the reads of safe requests to the replica, if one is set up."""
+    def db_for_read(self, model, **hints):
+        if _safe_request.get() and REPLICA in settings.DATABASES:
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the default database.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA
+
+
+@sync_and_async_middleware
+def read_replica_middleware(get_response):
+    """Mark safe requests, whose reads the router sends to the replica."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = _safe_request.set(request.method in SAFE_METHODS)
+            try:
+                return await get_response(request)
+            finally:
+                _safe_request.reset(token)
+    else:
+        def middleware(request):
+            token = _safe_request.set(request.method in SAFE_METHODS)
+            try:
+                return get_response(request)
+            finally:
+                _safe_request.reset(token)
+    return middleware
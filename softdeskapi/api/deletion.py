@@ -0,0 +1,110 @@
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .changes import log_issue_deletes
+from .membership import membership_cache
+from .models import (
+    Project,
+    Contributor,
+    Issue,
+    Comment,
+    ProjectSummary,
+    Change,
+)
+from .search import unindex_issues
+from .summary import issue_counts, add_counts
+from .versioning import bump_project
+
+DEFAULT_CONFIG = {
+    # Deleted projects are only flagged, for purge_deleted_projects.
+    'SOFT_DELETE': False,
+    # Issues deleted by each query, and by each transaction of a purge.
+    'BATCH_SIZE': 1000,
+}
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, 'SOFTDESK_DELETION', {})}
+
+
+def raw_delete(queryset):
+    """Delete the rows of a queryset with one query, without signals."""
+    return queryset._raw_delete(queryset.db)
+
+
+def delete_issue_batch(issue_ids, log=True):
+    """
+    Delete issues and their comments with set-based queries, doing the
+    work of the delete signals once for the whole batch. The changes
+    aren't logged when the whole project goes.
+    """
+    deltas = defaultdict(Counter)
+    rows = Issue.objects.filter(pk__in=issue_ids).values(
+        'project_id', *Issue.COUNTED_FIELDS
+    ).annotate(count=Count('pk')).order_by()
+    for row in rows:
+        project_id, count = row.pop('project_id'), row.pop('count')
+        for column, value in issue_counts(row).items():
+            deltas[project_id][column] -= value * count
+
+    # Before the comments, through which their rows are found.
+    if log:
+        log_issue_deletes(issue_ids)
+    unindex_issues(issue_ids)
+    raw_delete(Comment.objects.filter(issue_id__in=issue_ids))
+    raw_delete(Issue.objects.filter(pk__in=issue_ids))
+    for project_id, project_deltas in deltas.items():
+        add_counts(project_id, project_deltas)
+        bump_project(project_id)
+
+
+def delete_issues(issues, batch_size=None):
+    """Delete the issues of a queryset and their comments, by batches."""
+    batch_size = batch_size or get_config()['BATCH_SIZE']
+    ids = list(issues.values_list('pk', flat=True))
+    with transaction.atomic(savepoint=False):
+        for start in range(0, len(ids), batch_size):
+            delete_issue_batch(ids[start:start + batch_size])
+    return len(ids)
+
+
+def delete_project(project):
+    """
+    Hide the project and remove its contributors, then purge its rows
+    unless SOFT_DELETE leaves them to purge_deleted_projects.
+    """
+    with transaction.atomic():
+        Project.objects.filter(pk=project.pk).update(
+            deleted_time=timezone.now()
+        )
+        contributors = Contributor.objects.filter(project_id=project)
+        for user_id in contributors.values_list('user_id', flat=True):
+            membership_cache.invalidate(user_id, project.pk)
+        raw_delete(contributors)
+
+    if not get_config()['SOFT_DELETE']:
+        purge_project(project.pk)
+
+
+def purge_project(project_id, batch_size=None):
+    """
+    Delete the rows of a deleted project, each batch of issues in a
+    transaction of its own so that locks are held briefly.
+    """
+    batch_size = batch_size or get_config()['BATCH_SIZE']
+    issues = Issue.objects.filter(project_id=project_id).order_by('pk')
+    while True:
+        with transaction.atomic():
+            ids = list(issues.values_list('pk', flat=True)[:batch_size])
+            if ids:
+                delete_issue_batch(ids, log=False)
+                continue
+            raw_delete(Change.objects.filter(project_id=project_id))
+            raw_delete(Contributor.objects.filter(project_id=project_id))
+            raw_delete(ProjectSummary.objects.filter(project_id=project_id))
+            raw_delete(Project.objects.filter(pk=project_id))
+            return
@@ -0,0 +1,160 @@
+import itertools
+from collections import namedtuple
+
+from django.contrib.auth.models import User
+
+from .instrumentation import get_config
+from .models import Contributor, Issue, Comment, Project
+from .serializers import LoginSerializer
+
+Endpoint = namedtuple('Endpoint', 'name method path data headers')
+
+PASSWORD = 'bench-pass-1'
+
+_names = itertools.count()
+
+
+def unique(prefix):
+    return f'{prefix}{next(_names)}'
+
+
+def new_user():
+    return User.objects.create_user(unique('endpoint-user-'),
+                                    password=PASSWORD)
+
+
+def new_issue(project, author):
+    issue = Issue.objects.create(title='Issue', desc='Endpoint issue',
+                                 tag=Issue.BUG, priority=Issue.LOW,
+                                 project_id=project, status=Issue.TODO,
+                                 author_user_id=author,
+                                 assignee_user_id=author)
+    Comment.objects.create(description='Endpoint comment',
+                           author_user_id=author, issue_id=issue)
+    return issue
+
+
+def new_contributor(project):
+    user = new_user()
+    Contributor.objects.create(user_id=user, project_id=project,
+                               role='contributor')
+    return user
+
+
+def issue_data(**kwargs):
+    return {'title': 'Issue', 'desc': 'Endpoint issue', 'tag': Issue.BUG,
+            'priority': Issue.LOW, 'status': Issue.TODO, **kwargs}
+
+
+def endpoints(project, author, items=3):
+    """
+    One request for each endpoint and method of api.urls, sent by the
+    author of the project. Objects they edit or delete are created first,
+    so the requests run in any order and as many times as needed.
+    """
+    refresh = LoginSerializer.get_token(author)
+    auth = {'HTTP_AUTHORIZATION': f'Bearer {refresh.access_token}'}
+    metrics = {'HTTP_AUTHORIZATION': f"Bearer {get_config()['METRICS_TOKEN']}"}
+    login = new_user()
+    issue = new_issue(project, author)
+    comment = issue.comment_set.get()
+    empty_project = Project.objects.create(title='Project', description='-',
+                                           type=Project.BACKEND,
+                                           author_user_id=author)
+    Contributor.objects.create(user_id=author, project_id=empty_project,
+                               role='author')
+    read_comment = new_issue(project, author).comment_set.get()
+    issues = [new_issue(project, author) for _ in range(items)]
+    bulk_issue = issues[0]
+    bulk_comments = Comment.objects.bulk_create([
+        Comment(description='Endpoint comment', author_user_id=author,
+                issue_id=bulk_issue)
+        for _ in range(2 * items)
+    ])
+
+    p = f'/projects/{project.pk}/'
+    i = f'{p}issues/{issue.pk}/'
+    c = f'{i}comments/{comment.pk}/'
+    b = f'{p}issues/{bulk_issue.pk}/comments/bulk/'
+    r = f'/async{p}issues/{read_comment.issue_id_id}/comments/'
+    requests = [
+        ('api root', 'get', '/', None),
+        ('login', 'post', '/login/', {'username': login.username,
+                                      'password': PASSWORD}),
+        ('token refresh', 'post', '/login/refresh/',
+         {'refresh': str(refresh)}),
+        ('token verify', 'post', '/login/verify/',
+         {'token': str(refresh.access_token)}),
+        ('signup', 'post', '/signup/', {
+            'username': unique('signup-'), 'first_name': 'First',
+            'last_name': 'Last', 'email': 'user@example.com',
+            'password': PASSWORD,
+        }),
+        ('search', 'get', '/search/', {'q': 'Endpoint comment'}),
+        ('metrics', 'get', '/metrics/', None),
+        ('project list', 'get', '/projects/', None),
+        ('project create', 'post', '/projects/', {
+            'title': 'Project', 'description': 'New', 'type': Project.IOS,
+        }),
+        ('project retrieve', 'get', p, None),
+        ('project update', 'put', p, {
+            'title': 'Project', 'description': 'Updated',
+            'type': Project.BACKEND,
+        }),
+        ('project delete', 'delete', f'/projects/{empty_project.pk}/', None),
+        ('project export', 'get', f'{p}export/', None),
+        ('project summary', 'get', f'{p}summary/', None),
+        ('project changes', 'get', f'{p}changes/', {'since': 0}),
+        ('user list', 'get', f'{p}users/', None),
+        ('user add', 'post', f'{p}users/', {'user_id': new_user().pk,
+                                            'role': 'contributor'}),
+        ('user remove', 'delete',
+         f'{p}users/{new_contributor(project).pk}/', None),
+        ('user bulk add', 'post', f'{p}users/bulk/', [
+            {'user_id': new_user().pk, 'role': 'contributor'}
+            for _ in range(items)
+        ]),
+        ('user bulk remove', 'delete', f'{p}users/bulk/', [
+            new_contributor(project).pk for _ in range(items)
+        ]),
+        ('issue list', 'get', f'{p}issues/', {'expand': 'author,assignee'}),
+        ('issue list by activity', 'get', f'{p}issues/',
+         {'ordering': '-last_activity_time',
+          'expand': 'last_comment_author'}),
+        ('issue create', 'post', f'{p}issues/', issue_data()),
+        ('issue update', 'put', i, issue_data(status=Issue.FINISHED)),
+        ('issue patch', 'patch', i, {'priority': Issue.HIGH}),
+        ('issue bulk create', 'post', f'{p}issues/bulk/',
+         [issue_data() for _ in range(items)]),
+        ('issue bulk update', 'put', f'{p}issues/bulk/', [
+            {'id': issue.pk, 'status': Issue.INPROGRESS}
+            for issue in issues
+        ]),
+        ('issue bulk delete', 'delete', f'{p}issues/bulk/', [
+            new_issue(project, author).pk for _ in range(items)
+        ]),
+        ('comment list', 'get', f'{i}comments/', {'expand': 'author'}),
+        ('comment create', 'post', f'{i}comments/', {'description': 'New'}),
+        ('comment retrieve', 'get', c, None),
+        ('comment update', 'put', c, {'description': 'Updated'}),
+        ('comment patch', 'patch', c, {'description': 'Patched'}),
+        ('comment bulk create', 'post', b,
+         [{'description': 'New'} for _ in range(items)]),
+        ('comment bulk update', 'put', b, [
+            {'comment_id': comment.pk, 'description': 'Updated'}
+            for comment in bulk_comments[:items]
+        ]),
+        ('comment bulk delete', 'delete', b,
+         [comment.pk for comment in bulk_comments[items:]]),
+        ('comment delete', 'delete', c, None),
+        ('issue delete', 'delete', i, None),
+        ('async project list', 'get', '/async/projects/', None),
+        ('async project retrieve', 'get', f'/async{p}', None),
+        ('async user list', 'get', f'/async{p}users/', None),
+        ('async issue list', 'get', f'/async{p}issues/', None),
+        ('async comment list', 'get', r, None),
+        ('async comment retrieve', 'get', f'{r}{read_comment.pk}/', None),
+    ]
+    return [Endpoint(name, method, path, data,
+                     metrics if name == 'metrics' else auth)
+            for name, method, path, data in requests]
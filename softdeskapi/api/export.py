@@ -0,0 +1,83 @@
+import csv
+import json
+
+from django.db import transaction
+
+from .models import Issue, Comment
+from .serializers import IssueSerializer, CommentSerializer
+
+CHUNK_SIZE = 2000
+
+ISSUE_COLUMNS = IssueSerializer.Meta.fields
+COMMENT_COLUMNS = [f for f in CommentSerializer.Meta.fields
+                   if f != 'issue_id']
+
+
+def issues_with_comments(project, chunk_size=CHUNK_SIZE):
+    """
+    Yield each issue of a project with the list of its comments.
+    Issues and comments are read in issue order by two cursors and merged,
+    so memory only holds one issue's comments at a time. Both cursors read
+    in one transaction, to see the same rows.
+    """
+    issues = Issue.objects.filter(project_id=project).order_by('id')
+    comments = Comment.objects.filter(
+        issue_id__project_id=project
+    ).order_by('issue_id', 'created_time', 'comment_id')
+
+    with transaction.atomic():
+        comments = comments.iterator(chunk_size=chunk_size)
+        comment = next(comments, None)
+        for issue in issues.iterator(chunk_size=chunk_size):
+            # Comments of an issue the issue cursor doesn't have are left
+            # out, instead of holding back the ones after them.
+            while comment is not None and comment.issue_id_id < issue.id:
+                comment = next(comments, None)
+            issue_comments = []
+            while comment is not None and comment.issue_id_id == issue.id:
+                issue_comments.append(comment)
+                comment = next(comments, None)
+            yield issue, issue_comments
+
+
+def ndjson_lines(pairs):
+    """Render each issue and its comments as one JSON line."""
+    issue_serializer = IssueSerializer()
+    comment_serializer = CommentSerializer()
+    for issue, comments in pairs:
+        data = issue_serializer.to_representation(issue)
+        data['comments'] = [comment_serializer.to_representation(c)
+                            for c in comments]
+        yield json.dumps(data, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """File-like object handing back what is written to it."""
+    def write(self, value):
+        return value
+
+
+def csv_lines(pairs):
+    """Render one row per comment, repeating its issue's columns."""
+    writer = csv.writer(Echo())
+    issue_serializer = IssueSerializer()
+    comment_serializer = CommentSerializer()
+    yield writer.writerow(
+        [f'issue_{c}' for c in ISSUE_COLUMNS] + COMMENT_COLUMNS
+    )
+    empty = [''] * len(COMMENT_COLUMNS)
+    for issue, comments in pairs:
+        data = issue_serializer.to_representation(issue)
+        issue_row = [data[c] for c in ISSUE_COLUMNS]
+        if not comments:
+            yield writer.writerow(issue_row + empty)
+        for comment in comments:
+            data = comment_serializer.to_representation(comment)
+            yield writer.writerow(issue_row +
+                                  [data[c] for c in COMMENT_COLUMNS])
+
+
+FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
@@ -0,0 +1,54 @@
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import Issue
+
+
+def parse_choices(params, name):
+    """Read a comma separated list of choices of an Issue field."""
+    values = params[name].split(',')
+    choices = dict(Issue._meta.get_field(name).choices)
+    unknown = [value for value in values if value not in choices]
+    if unknown:
+        raise ValidationError({name: f"Unknown values: {', '.join(unknown)}."})
+    return values
+
+
+def parse_time(params, name):
+    """Read a date and time, in the current time zone if naive."""
+    try:
+        value = parse_datetime(params[name])
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValidationError({name: 'Expected an ISO 8601 date and time.'})
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def filter_issues(queryset, params):
+    """Filter issues on the query parameters."""
+    for name in ('status', 'priority', 'tag'):
+        if name in params:
+            queryset = queryset.filter(
+                **{f'{name}__in': parse_choices(params, name)}
+            )
+
+    if 'assignee_user_id' in params:
+        try:
+            assignee = int(params['assignee_user_id'])
+        except ValueError:
+            raise ValidationError({'assignee_user_id': 'Expected an id.'})
+        queryset = queryset.filter(assignee_user_id=assignee)
+
+    if 'created_after' in params:
+        queryset = queryset.filter(
+            created_time__gte=parse_time(params, 'created_after')
+        )
+    if 'created_before' in params:
+        queryset = queryset.filter(
+            created_time__lt=parse_time(params, 'created_before')
+        )
+    return queryset
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+DEFAULT_CONFIG = {
+    # Hasher of new passwords, and of passwords rehashed at login.
+    'ALGORITHM': 'pbkdf2_sha256',
+    'PBKDF2_ITERATIONS': hashers.PBKDF2PasswordHasher.iterations,
+    'SCRYPT_WORK_FACTOR': hashers.ScryptPasswordHasher.work_factor,
+    'SCRYPT_BLOCK_SIZE': hashers.ScryptPasswordHasher.block_size,
+    'SCRYPT_PARALLELISM': hashers.ScryptPasswordHasher.parallelism,
+    # Memory bound of scrypt in bytes, 0 for OpenSSL's 32 MiB.
+    'SCRYPT_MAXMEM': hashers.ScryptPasswordHasher.maxmem,
+    'ARGON2_TIME_COST': hashers.Argon2PasswordHasher.time_cost,
+    'ARGON2_MEMORY_COST': hashers.Argon2PasswordHasher.memory_cost,
+    'ARGON2_PARALLELISM': hashers.Argon2PasswordHasher.parallelism,
+}
+
+# Hasher of each algorithm of the policy.
+HASHERS = {
+    'pbkdf2_sha256': 'api.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'api.hashers.ScryptPasswordHasher',
+    'argon2': 'api.hashers.Argon2PasswordHasher',
+}
+
+
+def get_config():
+    return {**DEFAULT_CONFIG,
+            **getattr(settings, 'SOFTDESK_PASSWORD_HASHING', {})}
+
+
+def password_hashers(algorithm):
+    """
+    PASSWORD_HASHERS for a policy: its hasher first, then the others, so
+    that passwords hashed by a former policy are still checked, and
+    rehashed by Django at their next login.
+    """
+    preferred = HASHERS[algorithm]
+    return [preferred, *(path for path in HASHERS.values()
+                         if path != preferred),
+            'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+
+def setting(name):
+    """Cost read from the settings at each use, so changes apply at once."""
+    return property(lambda hasher: get_config()[name])
+
+
+# A hash of another cost than the configured one is updated at login, as
+# the hashers' must_update compares them.
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    iterations = setting('PBKDF2_ITERATIONS')
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    work_factor = setting('SCRYPT_WORK_FACTOR')
+    block_size = setting('SCRYPT_BLOCK_SIZE')
+    parallelism = setting('SCRYPT_PARALLELISM')
+    maxmem = setting('SCRYPT_MAXMEM')
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Needs argon2-cffi, only loaded when an argon2 hash is used."""
+    time_cost = setting('ARGON2_TIME_COST')
+    memory_cost = setting('ARGON2_MEMORY_COST')
+    parallelism = setting('ARGON2_PARALLELISM')
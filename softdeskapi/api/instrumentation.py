@@ -0,0 +1,228 @@
+import hmac
+import logging
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.decorators import sync_and_async_middleware
+from django.views import View
+from rest_framework.permissions import BasePermission
+
+from .membership import membership_cache
+from .response_cache import response_cache
+
+DEFAULT_CONFIG = {
+    'SERVER_TIMING': True,
+    # Bearer token of /metrics, which answers 403 while it is empty.
+    'METRICS_TOKEN': '',
+    # Requests kept per route to compute the quantiles.
+    'SAMPLES': 1024,
+    # Queries slower than this are logged with the class issuing them.
+    'SLOW_QUERY_MS': None,
+}
+QUANTILES = (0.5, 0.95, 0.99)
+# Phases reported in Server-Timing and /metrics, with their description.
+PHASES = {
+    'db': 'Database queries',
+    'perm': 'Permission checks',
+    'ser': 'Serialization',
+}
+
+logger = logging.getLogger('api.slow_queries')
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def get_config():
+    return {**DEFAULT_CONFIG,
+            **getattr(settings, 'SOFTDESK_INSTRUMENTATION', {})}
+
+
+class RequestMetrics:
+    """Queries and time spent in each phase by a request."""
+    def __init__(self):
+        self.queries = 0
+        self.durations = defaultdict(float)
+        self.depths = defaultdict(int)
+        self.start = time.perf_counter()
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to a phase of the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+
+    # Only the outermost block counts, nested serializers included.
+    metrics.depths[phase] += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.depths[phase] -= 1
+        if not metrics.depths[phase]:
+            metrics.durations[phase] += time.perf_counter() - start
+
+
+def issuer():
+    """Name the permission or view class whose code runs a query."""
+    frame = sys._getframe(2)
+    view = None
+    while frame is not None:
+        obj = frame.f_locals.get('self')
+        if isinstance(obj, BasePermission):
+            return type(obj).__name__
+        if view is None and isinstance(obj, View):
+            view = type(obj).__name__
+        frame = frame.f_back
+    return view or 'unknown'
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        metrics.queries += 1
+        metrics.durations['db'] += duration
+        slow = get_config()['SLOW_QUERY_MS']
+        if slow is not None and duration * 1000 >= slow:
+            logger.warning('%.1f ms in %s: %s', duration * 1000, issuer(),
+                           sql)
+
+
+class RouteMetrics:
+    """Recent request samples of each route, for quantiles."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def add(self, route, sample):
+        with self.lock:
+            entry = self.routes.get(route)
+            if entry is None:
+                entry = self.routes[route] = {
+                    'count': 0, 'sums': defaultdict(float),
+                    'samples': deque(maxlen=get_config()['SAMPLES']),
+                }
+            entry['count'] += 1
+            for name, value in sample.items():
+                entry['sums'][name] += value
+            entry['samples'].append(sample)
+
+    def clear(self):
+        with self.lock:
+            self.routes.clear()
+
+    def snapshot(self):
+        with self.lock:
+            return {route: {'count': entry['count'],
+                            'sums': dict(entry['sums']),
+                            'samples': list(entry['samples'])}
+                    for route, entry in self.routes.items()}
+
+
+route_metrics = RouteMetrics()
+
+
+def finish(request, response, metrics):
+    total = time.perf_counter() - metrics.start
+    match = request.resolver_match
+    route = (request.method, match.route if match else 'unmatched')
+    sample = {'duration': total, 'queries': metrics.queries}
+    sample.update({phase: metrics.durations[phase] for phase in PHASES})
+    route_metrics.add(route, sample)
+
+    if get_config()['SERVER_TIMING']:
+        timings = [f'{phase};dur={metrics.durations[phase] * 1000:.2f};'
+                   f'desc="{desc}"' for phase, desc in PHASES.items()]
+        timings.append(f'queries;desc="{metrics.queries} queries"')
+        timings.append(f'total;dur={total * 1000:.2f}')
+        response['Server-Timing'] = ', '.join(timings)
+    return response
+
+
+@sync_and_async_middleware
+def instrumentation_middleware(get_response):
+    """Measure each request, for Server-Timing and /metrics."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            metrics = RequestMetrics()
+            token = _current.set(metrics)
+            try:
+                response = await get_response(request)
+            finally:
+                _current.reset(token)
+            return finish(request, response, metrics)
+    else:
+        def middleware(request):
+            metrics = RequestMetrics()
+            token = _current.set(metrics)
+            try:
+                response = get_response(request)
+            finally:
+                _current.reset(token)
+            return finish(request, response, metrics)
+    return middleware
+
+
+def quantile(values, q):
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def prometheus_text():
+    """Route summaries and cache counters in Prometheus text format."""
+    metrics = {
+        'duration': ('softdesk_request_duration_seconds',
+                     'Time to answer a request.'),
+        'queries': ('softdesk_request_queries',
+                    'SQL queries run by a request.'),
+    }
+    metrics.update({
+        phase: (f'softdesk_request_{phase}_seconds', f'{desc} time.')
+        for phase, desc in PHASES.items()
+    })
+
+    routes = route_metrics.snapshot()
+    lines = []
+    for name, (metric, help_text) in metrics.items():
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} summary']
+        for (method, route), entry in sorted(routes.items()):
+            labels = f'method="{method}",route="{route}"'
+            values = [sample[name] for sample in entry['samples']]
+            for q in QUANTILES:
+                lines.append(f'{metric}{{{labels},quantile="{q}"}} '
+                             f'{quantile(values, q):g}')
+            lines.append(f'{metric}_sum{{{labels}}} {entry["sums"][name]:g}')
+            lines.append(f'{metric}_count{{{labels}}} {entry["count"]}')
+
+    for cache_name, stats in (('membership', membership_cache.stats()),
+                              ('response', response_cache.stats())):
+        for stat in ('hits', 'misses'):
+            metric = f'softdesk_{cache_name}_cache_{stat}_total'
+            lines += [f'# TYPE {metric} counter', f'{metric} {stats[stat]}']
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, protected by the metrics token."""
+    token = get_config()['METRICS_TOKEN']
+    header = request.headers.get('Authorization', '')
+    if not token or not hmac.compare_digest(header, f'Bearer {token}'):
+        return HttpResponse(status=403)
+    return HttpResponse(prometheus_text(),
+                        content_type='text/plain; version=0.0.4')
@@ -0,0 +1,204 @@
+import json
+import statistics
+import subprocess
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.core.cache import caches
+from django.test import Client, RequestFactory, override_settings
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from api.authentication import CachedJWTAuthentication, get_config
+from api.endpoints import endpoints
+from api.response_cache import response_cache
+from api.seeding import seed
+from api.serializers import LoginSerializer
+
+# Lists also sent again with the ETag of their response, to compare a 304
+# revalidation with the full fetch.
+REVALIDATED = ['issue list', 'comment list']
+
+# Authentication modes compared on the reads: user lookup through the
+# cache, or user built from the token claims.
+AUTH_MODES = {'cached': False, 'stateless': True}
+
+
+class Command(BaseCommand):
+    help = ('Send each endpoint of the api in turn to a seeded test '
+            'database and report its latencies, throughput and queries as '
+            'JSON, to compare commits.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Requests sent to each endpoint.')
+        parser.add_argument('--issues', type=int, default=200,
+                            help='Issues seeded in each project.')
+        parser.add_argument('--endpoints',
+                            help='Comma separated endpoint names to run.')
+        parser.add_argument('--output', default='benchmark.json',
+                            help='File receiving the report.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                           serialize=False)
+        try:
+            # Without rate limits, which the rounds would exceed.
+            with override_settings(
+                SOFTDESK_INSTRUMENTATION={'METRICS_TOKEN': 'benchmark'},
+                SOFTDESK_THROTTLING={}
+            ):
+                report = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        with open(options['output'], 'w') as file:
+            file.write(output)
+        self.stdout.write(output)
+
+    def run(self, options):
+        _, projects = seed(users=10, projects=5, issues=options['issues'],
+                           comments=5)
+        project = projects[0]
+        names = options['endpoints'] and options['endpoints'].split(',')
+        client = Client()
+        latencies, queries = {}, {}
+        for _ in range(options['requests']):
+            # Writes need fresh objects, created outside of the timings.
+            for endpoint in endpoints(project, project.author_user_id):
+                if names and endpoint.name not in names:
+                    continue
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = self.send(client, endpoint)
+                    duration = time.perf_counter() - start
+                assert response.status_code < 400, (endpoint.name,
+                                                    response.status_code)
+                latencies.setdefault(endpoint.name, []).append(duration)
+                queries[endpoint.name] = max(queries.get(endpoint.name, 0),
+                                             len(captured))
+                if endpoint.name in REVALIDATED:
+                    self.revalidate(client, endpoint, response['ETag'],
+                                    latencies, queries)
+
+        return {'commit': self.commit(), 'requests': options['requests'],
+                'issues': options['issues'],
+                'endpoints': {name: self.summary(values, queries[name])
+                              for name, values in latencies.items()},
+                'auth': self.auth(client, project, names, options)}
+
+    def auth(self, client, project, names, options):
+        """
+        Cost of authenticating a request in each mode of
+        SOFTDESK_AUTH['STATELESS_READS'], alone and within the reads.
+        """
+        token = LoginSerializer.get_token(project.author_user_id)
+        request = RequestFactory().get(
+            '/', HTTP_AUTHORIZATION=f'Bearer {token.access_token}'
+        )
+        cache = caches[get_config()['CACHE_ALIAS']]
+        report = {'authenticate_us': {}, 'reads_p50_ms': {}}
+        # The cached mode on a cold cache too, then on a warm one.
+        for name, stateless, cold in [('cached miss', False, True),
+                                      ('cached hit', False, False),
+                                      ('stateless', True, False)]:
+            durations = []
+            # Room in the query log for all the queries counted.
+            reset_queries()
+            with override_settings(SOFTDESK_AUTH={
+                        'STATELESS_READS': stateless
+                    }), CaptureQueriesContext(connection) as captured:
+                for _ in range(options['requests'] * 20):
+                    if cold:
+                        cache.clear()
+                    start = time.perf_counter()
+                    CachedJWTAuthentication().authenticate(request)
+                    durations.append(time.perf_counter() - start)
+            report['authenticate_us'][name] = {
+                'p50': round(statistics.median(durations) * 1e6, 1),
+                'queries': round(len(captured) / len(durations), 2),
+            }
+
+        reads = {}
+        for _ in range(options['requests']):
+            # The modes take turns on each read, for the same conditions.
+            for endpoint in endpoints(project, project.author_user_id):
+                if (endpoint.method != 'get' or endpoint.name == 'metrics'
+                        or names and endpoint.name not in names):
+                    continue
+                for mode, stateless in AUTH_MODES.items():
+                    # Neither mode is served the other's cached response.
+                    response_cache.clear()
+                    with override_settings(SOFTDESK_AUTH={
+                        'STATELESS_READS': stateless
+                    }):
+                        start = time.perf_counter()
+                        response = self.send(client, endpoint)
+                        duration = time.perf_counter() - start
+                    assert response.status_code < 400, (
+                        endpoint.name, mode, response.status_code
+                    )
+                    reads.setdefault(endpoint.name, {}).setdefault(
+                        mode, []
+                    ).append(duration)
+        for name, modes in reads.items():
+            p50 = {mode: statistics.median(durations) * 1000
+                   for mode, durations in modes.items()}
+            report['reads_p50_ms'][name] = {
+                **{mode: round(value, 2) for mode, value in p50.items()},
+                'delta': round(p50['stateless'] - p50['cached'], 2),
+            }
+        return report
+
+    def revalidate(self, client, endpoint, etag, latencies, queries):
+        """Time the endpoint sent again with If-None-Match."""
+        name = f'{endpoint.name} revalidation'
+        endpoint = endpoint._replace(headers={**endpoint.headers,
+                                              'HTTP_IF_NONE_MATCH': etag})
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = self.send(client, endpoint)
+            duration = time.perf_counter() - start
+        assert response.status_code == 304, (name, response.status_code)
+        latencies.setdefault(name, []).append(duration)
+        queries[name] = max(queries.get(name, 0), len(captured))
+
+    def send(self, client, endpoint):
+        send = getattr(client, endpoint.method)
+        if endpoint.method == 'get':
+            response = send(endpoint.path, endpoint.data, **endpoint.headers)
+        else:
+            response = send(endpoint.path, json.dumps(endpoint.data),
+                            content_type='application/json',
+                            **endpoint.headers)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def summary(self, latencies, queries):
+        latencies.sort()
+        return {
+            'requests_per_second': round(len(latencies) / sum(latencies), 1),
+            'latency_ms': {
+                'p50': round(statistics.median(latencies) * 1000, 2),
+                'p95': round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+            },
+            'queries': queries,
+        }
@@ -0,0 +1,122 @@
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from api.endpoints import issue_data
+from api.seeding import seed
+from api.serializers import LoginSerializer
+
+
+class Command(BaseCommand):
+    help = ('Create, update and delete batches of issues, comments and '
+            'contributors of growing sizes through the bulk endpoints of a '
+            'seeded test database, and report their items per second as '
+            'JSON, beside one item per request on the single endpoints.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,100,10000',
+                            help='Comma separated items of each batch.')
+        parser.add_argument('--single', type=int, default=100,
+                            help='Items sent one per request, for reference.')
+        parser.add_argument('--output', help='File receiving the report.')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                           serialize=False)
+        try:
+            _, projects = seed(users=10, projects=1, issues=1, comments=0)
+            self.project = projects[0]
+            token = LoginSerializer.get_token(
+                self.project.author_user_id
+            ).access_token
+            self.client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+            report = {'single': {}, 'bulk': {}}
+            # Without rate limits, which the batches would exceed.
+            with override_settings(SOFTDESK_THROTTLING={}):
+                report['single'] = self.run_single(options['single'])
+                for size in sizes:
+                    report['bulk'][size] = self.run_bulk(size)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def send(self, method, url, data):
+        start = time.perf_counter()
+        response = getattr(self.client, method)(
+            url, json.dumps(data), content_type='application/json'
+        )
+        duration = time.perf_counter() - start
+        assert response.status_code == 200, (url, response.status_code)
+        return response.json(), duration
+
+    def rate(self, items, duration):
+        return round(items / duration)
+
+    def run_single(self, count):
+        """Items per second of issues created one per request."""
+        url = f'/projects/{self.project.pk}/issues/'
+        total = 0
+        for _ in range(count):
+            total += self.send('post', url, issue_data())[1]
+        return {'issue create': self.rate(count, total)}
+
+    def run_bulk(self, size):
+        """Items per second of each bulk operation on a batch."""
+        p = f'/projects/{self.project.pk}/'
+        results = {}
+
+        created, duration = self.send('post', f'{p}issues/bulk/',
+                                      [issue_data() for _ in range(size)])
+        results['issue create'] = self.rate(size, duration)
+        _, duration = self.send('put', f'{p}issues/bulk/', [
+            {'id': issue['id'], 'title': 'Edited'} for issue in created
+        ])
+        results['issue update'] = self.rate(size, duration)
+
+        c = f"{p}issues/{created[0]['id']}/comments/bulk/"
+        comments, duration = self.send('post', c, [
+            {'description': 'Bulk'} for _ in range(size)
+        ])
+        results['comment create'] = self.rate(size, duration)
+        _, duration = self.send('put', c, [
+            {'comment_id': comment['comment_id'], 'description': 'Edited'}
+            for comment in comments
+        ])
+        results['comment update'] = self.rate(size, duration)
+        _, duration = self.send('delete', c, [comment['comment_id']
+                                              for comment in comments])
+        results['comment delete'] = self.rate(size, duration)
+
+        _, duration = self.send('delete', f'{p}issues/bulk/',
+                                [issue['id'] for issue in created])
+        results['issue delete'] = self.rate(size, duration)
+
+        users = User.objects.bulk_create([
+            User(username=f'bulk-{size}-{i}', password='!')
+            for i in range(size)
+        ])
+        _, duration = self.send('post', f'{p}users/bulk/', [
+            {'user_id': user.pk, 'role': 'contributor'} for user in users
+        ])
+        results['contributor create'] = self.rate(size, duration)
+        _, duration = self.send('delete', f'{p}users/bulk/',
+                                [user.pk for user in users])
+        results['contributor delete'] = self.rate(size, duration)
+        return results
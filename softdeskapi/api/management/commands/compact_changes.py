@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.changes import compact
+
+
+class Command(BaseCommand):
+    help = ('Remove the changes superseded by a later change of the same '
+            'object, then those older than the retention. Cursors older '
+            'than the removed changes answer 410 Gone.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=float,
+                            help='Age of the oldest changes kept, '
+                                 'RETENTION_DAYS by default.')
+
+    def handle(self, *args, **options):
+        superseded, expired = compact(options['retention_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{superseded} superseded and {expired} expired changes removed.'
+        ))
@@ -0,0 +1,120 @@
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from api.models import Issue
+from api.seeding import seed
+
+# Default SQLite connections, as before the tuned settings.
+DEFAULT_OPTIONS = {'init_command': 'PRAGMA journal_mode=DELETE',
+                   'timeout': 5}
+
+
+class Command(BaseCommand):
+    help = ('Run mixed read and write traffic from threads against a '
+            'seeded SQLite file, with default connections then with the '
+            'configured ones, and report throughput and lock errors as '
+            'JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--write-ratio', type=float, default=0.2,
+                            help='Share of the operations writing.')
+        parser.add_argument('--output', help='File receiving the report.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The benchmark compares SQLite settings.')
+        configured = connection.settings_dict['OPTIONS']
+        report = {'threads': options['threads'],
+                  'seconds': options['seconds'],
+                  'write_ratio': options['write_ratio'], 'runs': {}}
+        for name, db_options in (('before', DEFAULT_OPTIONS),
+                                 ('after', configured)):
+            report['runs'][name] = self.run(db_options, options)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def run(self, db_options, options):
+        """Measure a run on a new database file, with the given options."""
+        settings_dict = connection.settings_dict
+        old_name = settings_dict['NAME']
+        old_test, old_options = settings_dict['TEST'], settings_dict['OPTIONS']
+        with tempfile.TemporaryDirectory() as directory:
+            # Thread connections are built from this same settings dict.
+            settings_dict['TEST'] = {**old_test,
+                                     'NAME': str(Path(directory) / 'db')}
+            settings_dict['OPTIONS'] = db_options
+            connection.close()
+            setup_test_environment()
+            connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                               serialize=False)
+            try:
+                users, projects = seed(users=10, projects=5, issues=200,
+                                       comments=2)
+                return self.traffic(users, projects, options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+                settings_dict['OPTIONS'] = old_options
+                settings_dict['TEST'] = old_test
+
+    def traffic(self, users, projects, options):
+        counts = {'reads': 0, 'writes': 0, 'locked': 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['seconds']
+        every = max(round(1 / options['write_ratio']), 1) \
+            if options['write_ratio'] else 0
+
+        def worker(index):
+            project = projects[index % len(projects)]
+            user = users[index % len(users)]
+            done = 0
+            try:
+                while time.monotonic() < deadline:
+                    write = every and done % every == 0
+                    try:
+                        if write:
+                            Issue.objects.create(
+                                title='Load', desc='Load', tag=Issue.BUG,
+                                priority=Issue.LOW, status=Issue.TODO,
+                                project_id=project, author_user_id=user,
+                                assignee_user_id=user
+                            )
+                        else:
+                            list(Issue.objects.filter(project_id=project)
+                                 .order_by('created_time')[:100])
+                        kind = 'writes' if write else 'reads'
+                    except OperationalError:
+                        kind = 'locked'
+                    with lock:
+                        counts[kind] += 1
+                    done += 1
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(i,))
+                   for i in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        seconds = options['seconds']
+        return {'reads_per_second': round(counts['reads'] / seconds, 1),
+                'writes_per_second': round(counts['writes'] / seconds, 1),
+                'locked_errors': counts['locked']}
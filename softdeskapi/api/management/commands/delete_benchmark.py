@@ -0,0 +1,71 @@
+import json
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from api.deletion import delete_project
+from api.seeding import seed
+
+
+class Command(BaseCommand):
+    help = ('Delete a seeded project with the default cascade, then with '
+            'the batched set-based deletion, and report their duration, '
+            'queries and peak memory as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--issues', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=10,
+                            help='Comments of each issue.')
+        parser.add_argument('--output', help='File receiving the report.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                           serialize=False)
+        try:
+            # Two projects of the same size, one for each way to delete.
+            _, projects = seed(users=10, projects=2,
+                               issues=options['issues'],
+                               comments=options['comments'])
+            report = {'issues': options['issues'],
+                      'comments': options['issues'] * options['comments'],
+                      'runs': {}}
+            for name, delete, project in (
+                ('cascade', lambda project: project.delete(), projects[0]),
+                ('batched', delete_project, projects[1]),
+            ):
+                report['runs'][name] = self.run(delete, project)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def run(self, delete, project):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        tracemalloc.start()
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            delete(project)
+            elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {'seconds': round(elapsed, 3), 'queries': queries,
+                'peak_memory_mb': round(peak / 2 ** 20, 1)}
@@ -0,0 +1,117 @@
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from api.endpoints import endpoints
+from api.seeding import seed
+
+# Plan lines reading a whole table, for SQLite and PostgreSQL.
+FULL_SCANS = {
+    'sqlite': re.compile(r'^SCAN (?!CONSTANT)(\w+)$'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+
+
+class Command(BaseCommand):
+    help = ('Run EXPLAIN on every query issued by the api views against a '
+            'seeded test database and fail on full table scans.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--issues', type=int, default=200,
+                            help='Issues seeded per project.')
+        parser.add_argument('--comments', type=int, default=5,
+                            help='Comments seeded per issue.')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in FULL_SCANS:
+            raise CommandError(f'Unsupported database: {connection.vendor}.')
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                           serialize=False)
+        try:
+            _, projects = seed(users=5, projects=3,
+                               issues=options['issues'],
+                               comments=options['comments'])
+            queries = self.capture(projects[0])
+            scans = self.explain(queries)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for sql, table in scans:
+            self.stderr.write(f'Full scan of {table}: {sql}')
+        if scans:
+            raise CommandError(f'{len(scans)} queries scan a whole table.')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(queries)} queries checked, no full table scan.'
+        ))
+
+    def capture(self, project):
+        """
+        Send a request to each endpoint of api.endpoints and return the
+        distinct queries they issued.
+        """
+        queries = {}
+
+        def record(execute, sql, params, many, context):
+            # Bulk statements are explained with their first parameters.
+            params = list(params) if many else [params]
+            if params:
+                queries.setdefault(sql, params[0])
+            return execute(sql, params if many else params[0], many, context)
+
+        client = Client()
+        # Without rate limits, and with a token for the metrics.
+        with override_settings(
+            SOFTDESK_INSTRUMENTATION={'METRICS_TOKEN': 'explain'},
+            SOFTDESK_THROTTLING={}
+        ):
+            for endpoint in endpoints(project, project.author_user_id):
+                with connection.execute_wrapper(record):
+                    response = self.send(client, endpoint)
+                if response.status_code >= 400:
+                    raise CommandError(f'{endpoint.name} answered '
+                                       f'{response.status_code}.')
+        return queries
+
+    def send(self, client, endpoint):
+        send = getattr(client, endpoint.method)
+        if endpoint.method == 'get':
+            response = send(endpoint.path, endpoint.data, **endpoint.headers)
+        else:
+            response = send(endpoint.path, json.dumps(endpoint.data),
+                            content_type='application/json',
+                            **endpoint.headers)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def explain(self, queries):
+        """Return the (sql, table) pairs whose plan has a full scan."""
+        pattern = FULL_SCANS[connection.vendor]
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' \
+            else 'EXPLAIN '
+        scans = []
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Small seeded tables would be scanned whatever the indexes.
+                cursor.execute('SET enable_seqscan = off')
+            for sql, params in queries.items():
+                if not sql.lstrip().upper().startswith(
+                        ('SELECT', 'UPDATE', 'DELETE')):
+                    continue
+                cursor.execute(prefix + sql, params)
+                for row in cursor.fetchall():
+                    match = pattern.search(row[-1])
+                    if match:
+                        scans.append((sql, match.group(1)))
+        return scans
@@ -0,0 +1,84 @@
+import json
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from api.seeding import seed
+from api.serializers import LoginSerializer
+
+
+class Command(BaseCommand):
+    help = ('Stream the export of a seeded project, 1M comments by default, '
+            'and fail if the memory it allocates goes over a ceiling. '
+            'Report its size, duration and peak memory as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--issues', type=int, default=10000,
+                            help='Issues of the project.')
+        parser.add_argument('--comments', type=int, default=100,
+                            help='Comments of each issue.')
+        parser.add_argument('--format', default='ndjson',
+                            help='Output of the export, ndjson or csv.')
+        parser.add_argument('--max-memory', type=float, default=32,
+                            help='Ceiling of the peak memory, in MiB.')
+        parser.add_argument('--output', help='File receiving the report.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                           serialize=False)
+        try:
+            _, projects = seed(users=10, projects=1,
+                               issues=options['issues'],
+                               comments=options['comments'])
+            # Without rate limits, as the other benchmarks.
+            with override_settings(SOFTDESK_THROTTLING={}):
+                report = self.run(projects[0], options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        self.stdout.write(output)
+        if report['peak_mib'] > options['max_memory']:
+            raise CommandError(f"The export peaked at {report['peak_mib']} "
+                               f"MiB, over {options['max_memory']} MiB.")
+
+    def run(self, project, options):
+        token = LoginSerializer.get_token(project.author_user_id).access_token
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        url = f"/projects/{project.pk}/export/?output={options['format']}"
+
+        # Python allocations only, the database's own memory isn't traced.
+        tracemalloc.start()
+        start = time.perf_counter()
+        response = client.get(url)
+        size = lines = 0
+        for chunk in response.streaming_content:
+            size += len(chunk)
+            lines += chunk.count(b'\n')
+        response.close()
+        duration = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        return {
+            'issues': options['issues'],
+            'comments': options['issues'] * options['comments'],
+            'format': options['format'],
+            'lines': lines,
+            'mib': round(size / 2 ** 20, 1),
+            'seconds': round(duration, 1),
+            'peak_mib': round(peak / 2 ** 20, 1),
+        }
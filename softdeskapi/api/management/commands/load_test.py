@@ -0,0 +1,128 @@
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from api.seeding import seed
+from api.serializers import LoginSerializer
+
+# Sync views through WSGI threads, sync views through the ASGI handler and
+# its thread bridge, and async views through the ASGI handler.
+MODES = ('wsgi', 'asgi-sync', 'asgi')
+
+
+class Command(BaseCommand):
+    help = ('Load the read endpoints of a seeded test database in process, '
+            'with the WSGI and ASGI handlers, and report requests per '
+            'second, latencies and memory per connection as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Requests sent in each mode.')
+        parser.add_argument('--concurrency', type=int, default=100,
+                            help='Requests in flight at once.')
+        parser.add_argument('--modes', default=','.join(MODES),
+                            help='Comma separated modes to run.')
+        parser.add_argument('--output', help='File receiving the report.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                           serialize=False)
+        try:
+            users, projects = seed(users=10, projects=5, issues=200,
+                                   comments=5)
+            user = projects[0].author_user_id
+            token = LoginSerializer.get_token(user).access_token
+            headers = {'Authorization': f'Bearer {token}'}
+            paths = self.paths(projects[0])
+
+            report = {'requests': options['requests'],
+                      'concurrency': options['concurrency'], 'modes': {}}
+            for mode in options['modes'].split(','):
+                run = getattr(self, f"run_{mode.replace('-', '_')}")
+                report['modes'][mode] = self.measure(
+                    run, paths, headers, options['requests'],
+                    options['concurrency']
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def paths(self, project):
+        """Read endpoints polled in turn, relative to the api root."""
+        issue = project.issue_set.order_by('pk').first()
+        p_path = f'projects/{project.pk}/'
+        return ['projects/', p_path, f'{p_path}users/', f'{p_path}issues/',
+                f'{p_path}issues/{issue.pk}/comments/']
+
+    def measure(self, run, paths, headers, count, concurrency):
+        tracemalloc.start()
+        start = time.perf_counter()
+        latencies = run(paths, headers, count, concurrency)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            'requests_per_second': round(count / elapsed, 1),
+            'latency_ms': {
+                'p50': round(statistics.median(latencies) * 1000, 2),
+                'p95': round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+            },
+            'peak_memory_per_connection_kb': round(peak / concurrency / 1024,
+                                                   1),
+        }
+
+    def run_wsgi(self, paths, headers, count, concurrency):
+        def send(index):
+            start = time.perf_counter()
+            response = Client(headers=headers).get(
+                '/' + paths[index % len(paths)]
+            )
+            assert response.status_code == 200, response.status_code
+            return time.perf_counter() - start
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            return list(executor.map(send, range(count)))
+
+    def run_asgi_sync(self, paths, headers, count, concurrency):
+        return asyncio.run(self.send_async('/', paths, headers, count,
+                                           concurrency))
+
+    def run_asgi(self, paths, headers, count, concurrency):
+        return asyncio.run(self.send_async('/async/', paths, headers, count,
+                                           concurrency))
+
+    async def send_async(self, prefix, paths, headers, count, concurrency):
+        slots = asyncio.Semaphore(concurrency)
+
+        async def send(index):
+            async with slots:
+                start = time.perf_counter()
+                # Headers given to the AsyncClient itself get a double prefix.
+                response = await AsyncClient().get(
+                    prefix + paths[index % len(paths)], headers=headers
+                )
+                assert response.status_code == 200, response.status_code
+                return time.perf_counter() - start
+
+        return await asyncio.gather(*(send(i) for i in range(count)))
@@ -0,0 +1,100 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from api.models import Issue
+from api.response_cache import response_cache
+from api.seeding import seed
+from api.serializers import LoginSerializer
+
+
+class Command(BaseCommand):
+    help = ('Walk the issue list of a seeded project page by page, then '
+            'time its first page and a deep one, by keyset and by OFFSET, '
+            'and report their latencies as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=int, default=500,
+                            help='Deep page compared with the first one.')
+        parser.add_argument('--page-size', type=int, default=100,
+                            help='Issues of each page.')
+        parser.add_argument('--orderings', default='created_time,priority',
+                            help='Comma separated orderings to run.')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Requests to each page, the median counts.')
+        parser.add_argument('--output', help='File receiving the report.')
+
+    def handle(self, *args, **options):
+        issues = options['page'] * options['page_size']
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                           serialize=False)
+        try:
+            _, projects = seed(users=10, projects=1, issues=issues,
+                               comments=0)
+            report = {'issues': issues, 'page_size': options['page_size'],
+                      'page': options['page'], 'orderings': {}}
+            # Without rate limits, which the walk would exceed.
+            with override_settings(SOFTDESK_THROTTLING={}):
+                for ordering in options['orderings'].split(','):
+                    report['orderings'][ordering] = self.run(
+                        projects[0], ordering, options
+                    )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def run(self, project, ordering, options):
+        token = LoginSerializer.get_token(project.author_user_id).access_token
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        first = (f'/projects/{project.pk}/issues/?ordering={ordering}'
+                 f"&page_size={options['page_size']}")
+        deep = first
+        for _ in range(options['page'] - 1):
+            deep = client.get(deep).json()['next']
+
+        offset = (options['page'] - 1) * options['page_size']
+        issues = Issue.objects.filter(project_id=project).order_by(
+            ordering, 'created_time', 'id'
+        )
+        return {
+            'keyset_ms': {
+                'first': self.median(lambda: client.get(first), options),
+                'deep': self.median(lambda: client.get(deep), options),
+            },
+            # The same rows through OFFSET, without the api around them.
+            'offset_query_ms': {
+                'first': self.median(
+                    lambda: list(issues[:options['page_size']]), options
+                ),
+                'deep': self.median(
+                    lambda: list(issues[offset:offset
+                                        + options['page_size']]), options
+                ),
+            },
+        }
+
+    def median(self, fetch, options):
+        durations = []
+        for _ in range(options['repeat']):
+            # Every request builds its page, none is a cache hit.
+            response_cache.clear()
+            start = time.perf_counter()
+            fetch()
+            durations.append(time.perf_counter() - start)
+        return round(statistics.median(durations) * 1000, 2)
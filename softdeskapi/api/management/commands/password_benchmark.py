@@ -0,0 +1,92 @@
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from api.hashers import HASHERS, get_config, password_hashers
+
+PASSWORD = 'bench-pass-1'
+
+
+class Command(BaseCommand):
+    help = ('Log in through /login/ under each password hashing policy, '
+            'with the costs of the settings, and report the logins per '
+            'second of one core as JSON, next to token refreshes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20,
+                            help='Logins sent under each policy.')
+        parser.add_argument('--policies', default=','.join(HASHERS),
+                            help='Comma separated algorithms to run.')
+        parser.add_argument('--output', help='File receiving the report.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                           serialize=False)
+        try:
+            report = {'logins': options['logins'], 'policies': {}}
+            for algorithm in options['policies'].split(','):
+                report['policies'][algorithm] = self.run(algorithm,
+                                                         options['logins'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def run(self, algorithm, logins):
+        config = {**get_config(), 'ALGORITHM': algorithm}
+        # Without rate limits, which the logins would exceed.
+        with override_settings(SOFTDESK_PASSWORD_HASHING=config,
+                               PASSWORD_HASHERS=password_hashers(algorithm),
+                               SOFTDESK_THROTTLING={}):
+            try:
+                user = User.objects.create_user(f'bench-{algorithm}',
+                                                password=PASSWORD)
+            except ValueError as error:
+                # argon2-cffi isn't installed.
+                return {'error': str(error)}
+
+            client = Client()
+            data = {'username': user.username, 'password': PASSWORD}
+            cpu = self.cpu_time(
+                logins, lambda: client.post('/login/', data)
+            )
+            refresh = {'refresh': client.post('/login/', data).json()[
+                'refresh'
+            ]}
+            refresh_cpu = self.cpu_time(
+                logins, lambda: client.post('/login/refresh/', refresh)
+            )
+        return {
+            'costs': {name: value for name, value in config.items()
+                      if name.startswith(self.prefix(algorithm))},
+            'hash': user.password.split('$', 2)[:2],
+            'logins_per_second': round(logins / cpu, 1),
+            'ms_per_login': round(cpu / logins * 1000, 1),
+            'refreshes_per_second': round(logins / refresh_cpu, 1),
+        }
+
+    def prefix(self, algorithm):
+        return algorithm.split('_')[0].upper()
+
+    def cpu_time(self, count, send):
+        """CPU time of the process for count requests, one core's work."""
+        start = time.process_time()
+        for _ in range(count):
+            response = send()
+            assert response.status_code == 200, response.status_code
+        return time.process_time() - start
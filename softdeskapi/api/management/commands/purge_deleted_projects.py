@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.deletion import purge_project
+from api.models import Project
+
+
+class Command(BaseCommand):
+    help = ('Delete the rows of the projects deleted with SOFT_DELETE, with '
+            'batched set-based queries.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            help='Issues deleted by each transaction.')
+
+    def handle(self, *args, **options):
+        projects = Project.objects.exclude(deleted_time=None).order_by(
+            'deleted_time'
+        )
+        purged = 0
+        for project_id in list(projects.values_list('pk', flat=True)):
+            purge_project(project_id, options['batch_size'])
+            purged += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'{purged} deleted projects purged.'
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Index again every issue and comment in the search index.'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        if backend is None:
+            raise CommandError('Search is not available on this database.')
+        with transaction.atomic():
+            backend.rebuild()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
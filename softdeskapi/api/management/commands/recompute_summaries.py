@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.models import Project, ProjectSummary
+from api.summary import recompute, summary_counts
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the issue counters of the project summaries from the '
+            'issues, or only check them with --check.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('projects', nargs='*', type=int,
+                            help='Ids of the projects, all by default.')
+        parser.add_argument('--check', action='store_true',
+                            help='Report the wrong summaries without '
+                                 'rebuilding them, and fail if any.')
+
+    def handle(self, *args, **options):
+        projects = Project.objects.order_by('pk')
+        if options['projects']:
+            projects = projects.filter(pk__in=options['projects'])
+
+        wrong = 0
+        for project_id in list(projects.values_list('pk', flat=True)):
+            with transaction.atomic():
+                # Counter updates of the project wait until it is checked.
+                summary = ProjectSummary.objects.select_for_update().filter(
+                    project_id=project_id
+                ).first()
+                counts = summary_counts(project_id)
+                stored = {column: getattr(summary, column)
+                          for column in counts} if summary else None
+                if stored == counts:
+                    continue
+
+                wrong += 1
+                self.stderr.write(f'Project {project_id}: stored {stored}, '
+                                  f'counted {counts}.')
+                if not options['check']:
+                    recompute(project_id)
+
+        if wrong and options['check']:
+            raise CommandError(f'{wrong} wrong project summaries.')
+        self.stdout.write(self.style.SUCCESS(
+            f'{wrong} project summaries rebuilt.' if wrong
+            else 'All project summaries are right.'
+        ))
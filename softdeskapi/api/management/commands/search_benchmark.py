@@ -0,0 +1,111 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from api.models import Contributor
+from api.seeding import seed
+from api.serializers import LoginSerializer
+
+# From the most frequent word of the seeded texts down to a missing one.
+QUERIES = ['term1', 'term10', 'term100', 'term1000', 'term10000',
+           'term2 term30', 'missing']
+
+
+class Command(BaseCommand):
+    help = ('Search a seeded corpus, 1M comments by default, through '
+            '/search/ and report the latencies of each query as JSON. Fail '
+            'if their p50 or p95 misses its target.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=10,
+                            help='Projects seeded, the user is in half.')
+        parser.add_argument('--issues', type=int, default=1000,
+                            help='Issues of each project.')
+        parser.add_argument('--comments', type=int, default=100,
+                            help='Comments of each issue.')
+        parser.add_argument('--words', type=int, default=8,
+                            help='Words of each description and comment.')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Requests sent with each query.')
+        parser.add_argument('--target-p50', type=float, default=50,
+                            help='Target of the median latency, in ms.')
+        parser.add_argument('--target-p95', type=float, default=200,
+                            help='Target of the 95th percentile, in ms.')
+        parser.add_argument('--output', help='File receiving the report.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                           serialize=False)
+        try:
+            start = time.perf_counter()
+            users, projects = seed(users=10, projects=options['projects'],
+                                   issues=options['issues'],
+                                   comments=options['comments'],
+                                   words=options['words'])
+            seconds = time.perf_counter() - start
+            user = users[-1]
+            # Other projects' rows are matched, then left out by the join.
+            Contributor.objects.filter(
+                user_id=user, project_id__in=projects[::2]
+            ).delete()
+            # Without rate limits, as the other benchmarks.
+            with override_settings(SOFTDESK_THROTTLING={}):
+                report = self.run(user, options)
+            report['seed_seconds'] = round(seconds, 1)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        self.stdout.write(output)
+        missed = [name for name in ('p50', 'p95')
+                  if report['latency_ms'][name] > report['targets_ms'][name]]
+        if missed:
+            raise CommandError(f"Search missed its {', '.join(missed)} "
+                               f'target.')
+
+    def run(self, user, options):
+        token = LoginSerializer.get_token(user).access_token
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        queries, durations = {}, []
+        for query in QUERIES:
+            latencies = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                response = client.get('/search/', {'q': query})
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, (query,
+                                                     response.status_code)
+            queries[query] = {'results': len(response.json()),
+                              **self.percentiles(latencies)}
+            durations += latencies
+
+        comments = (options['projects'] * options['issues'] *
+                    options['comments'])
+        return {
+            'comments': comments,
+            'targets_ms': {'p50': options['target_p50'],
+                           'p95': options['target_p95']},
+            'latency_ms': self.percentiles(durations),
+            'queries': queries,
+        }
+
+    def percentiles(self, latencies):
+        latencies = sorted(latencies)
+        return {
+            'p50': round(statistics.median(latencies) * 1000, 2),
+            'p95': round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+        }
@@ -0,0 +1,105 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+from rest_framework import renderers
+
+from api.models import Issue, Comment
+from api.renderers import JSONRenderer
+from api.seeding import seed
+from api.serializers import IssueSerializer, CommentSerializer
+
+
+class Command(BaseCommand):
+    help = ('Serialize and render seeded issues and comments with the '
+            'model serializers and the stock renderer, then with the '
+            'values() plans and the orjson renderer, and report their rows '
+            'per second as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000,
+                            help='Issues seeded, with a comment each.')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Runs of each path, the best one counts.')
+        parser.add_argument('--output', help='File receiving the report.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                           serialize=False)
+        try:
+            seed(users=10, projects=1, issues=options['rows'], comments=1)
+            report = {'rows': options['rows'], 'lists': {}}
+            for name, serializer, queryset, expand in (
+                ('issues', IssueSerializer, Issue.objects.order_by('id'), ()),
+                ('issues expanded', IssueSerializer,
+                 Issue.objects.order_by('id'), ('author', 'assignee')),
+                ('comments', CommentSerializer,
+                 Comment.objects.order_by('comment_id'), ()),
+            ):
+                report['lists'][name] = self.run(serializer, queryset,
+                                                 expand, options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def run(self, serializer, queryset, expand, repeat):
+        kwargs = {'expand': expand} if expand else {}
+        related = [serializer.expandable_fields[name][0] for name in expand]
+        plan = serializer.values_plan(expand)
+        paths = {
+            'serializer': (
+                lambda: list(queryset.select_related(*related)),
+                lambda rows: serializer(rows, many=True, **kwargs).data,
+                renderers.JSONRenderer().render,
+            ),
+            'values': (
+                lambda: list(plan.values(queryset)),
+                plan.data,
+                JSONRenderer().render,
+            ),
+        }
+        results, outputs = {}, {}
+        for name, steps in paths.items():
+            results[name], outputs[name] = self.measure(steps, repeat)
+        assert outputs['serializer'] == outputs['values']
+        results['speedup'] = round(results['values']['rows_per_second']
+                                   / results['serializer']['rows_per_second'],
+                                   1)
+        return results
+
+    def measure(self, steps, repeat):
+        """Best run of the fetch, serialize and render steps of a path."""
+        fetch, serialize, render = steps
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = fetch()
+            fetched = time.perf_counter()
+            data = serialize(rows)
+            serialized = time.perf_counter()
+            output = render(data)
+            rendered = time.perf_counter()
+            times = (fetched - start, serialized - fetched,
+                     rendered - serialized)
+            if best is None or sum(times) < sum(best):
+                best = times
+        count = len(rows)
+        return {
+            'rows_per_second': round(count / sum(best)),
+            'serialize_rows_per_second': round(count / sum(best[1:])),
+            'ms': {step: round(duration * 1000, 1) for step, duration
+                   in zip(('fetch', 'serialize', 'render'), best)},
+        }, output
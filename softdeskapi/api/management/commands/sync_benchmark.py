@@ -0,0 +1,123 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from api.models import Issue
+from api.seeding import seed, seed_issues
+from api.serializers import LoginSerializer
+
+
+class Command(BaseCommand):
+    help = ('Edit seeded projects of growing sizes, then sync a client '
+            'with the change feed and with a full fetch of the issues and '
+            'their comments, and report the cost of both as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,5000',
+                            help='Comma separated issues of each project.')
+        parser.add_argument('--comments', type=int, default=5,
+                            help='Comments of each issue.')
+        parser.add_argument('--edits', type=int, default=10,
+                            help='Issues edited between two syncs.')
+        parser.add_argument('--output', help='File receiving the report.')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                           serialize=False)
+        try:
+            users, projects = seed(users=10, projects=len(sizes), issues=0)
+            report = {'comments': options['comments'],
+                      'edits': options['edits'], 'projects': []}
+            # Without rate limits, which full fetches would exceed.
+            with override_settings(SOFTDESK_THROTTLING={}):
+                for size, project in zip(sizes, projects):
+                    seed_issues([project], users, size, options['comments'])
+                    report['projects'].append({
+                        'issues': size, **self.run(project, options['edits'])
+                    })
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def run(self, project, edits):
+        token = LoginSerializer.get_token(project.author_user_id).access_token
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        p = f'/projects/{project.pk}/'
+        cursor = client.get(f'{p}changes/').json()['cursor']
+
+        # Only their author edits issues.
+        issues = Issue.objects.filter(
+            project_id=project, author_user_id=project.author_user_id
+        )[:edits]
+        for issue in issues:
+            client.patch(f'{p}issues/{issue.pk}/', {'status': Issue.FINISHED},
+                         content_type='application/json')
+            client.post(f'{p}issues/{issue.pk}/comments/',
+                        {'description': 'New'},
+                        content_type='application/json')
+
+        def delta():
+            nonlocal cursor
+            urls = [f'{p}changes/?since={cursor}']
+            for url in urls:
+                page = yield url
+                cursor = page['cursor']
+                if page['more']:
+                    urls.append(f'{p}changes/?since={cursor}')
+
+        def full():
+            urls = [f'{p}issues/?page_size=1000']
+            for url in urls:
+                page = yield url
+                # Comment lists aren't paginated.
+                if isinstance(page, list):
+                    continue
+                if page['next']:
+                    urls.append(page['next'])
+                urls += [f"{p}issues/{issue['id']}/comments/"
+                         for issue in page['results']]
+
+        return {'delta': self.sync(client, delta()),
+                'full': self.sync(client, full())}
+
+    def sync(self, client, urls):
+        """Send the requests of a sync, each url following a response."""
+        requests = queries = size = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(count):
+            url = next(urls)
+            while True:
+                response = client.get(url)
+                assert response.status_code == 200, (url,
+                                                     response.status_code)
+                requests += 1
+                size += len(response.content)
+                try:
+                    url = urls.send(response.json())
+                except StopIteration:
+                    break
+        elapsed = time.perf_counter() - start
+        return {'seconds': round(elapsed, 3), 'requests': requests,
+                'queries': queries, 'bytes': size}
@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+DEFAULT_CONFIG = {
+    'BACKEND': 'api.membership.LRUBackend',
+    'OPTIONS': {},
+}
+
+
+class LRUBackend:
+    """
+    In-process LRU cache whose entries expire after a time to live. Other
+    processes don't see its invalidations, so the ttl bounds how long they
+    keep a stale membership.
+    """
+    def __init__(self, max_size=10000, ttl=5):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id, project_id):
+        key = (user_id, project_id)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, user_id, project_id, value):
+        key = (user_id, project_id)
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, user_id, project_id):
+        with self.lock:
+            self.entries.pop((user_id, project_id), None)
+
+    def delete_project(self, project_id):
+        with self.lock:
+            for key in [k for k in self.entries if k[1] == project_id]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class DjangoCacheBackend:
+    """
+    Memberships stored through Django's cache framework. Keys can't be
+    listed, so each project has a generation in its keys: a new generation
+    drops all the pairs of the project at once. It costs a second cache
+    round trip on each read and write.
+    """
+    def __init__(self, alias='default', ttl=300, prefix='membership'):
+        self.cache = caches[alias]
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def generation_key(self, project_id):
+        return f'{self.prefix}:{project_id}'
+
+    def key(self, user_id, project_id):
+        # A generation evicted from the cache comes back as a new one, so
+        # it never revives the pairs of an older generation.
+        generation = self.cache.get_or_set(self.generation_key(project_id),
+                                           time.time_ns, None)
+        return f'{self.prefix}:{project_id}:{generation}:{user_id}'
+
+    def get(self, user_id, project_id):
+        return self.cache.get(self.key(user_id, project_id))
+
+    def set(self, user_id, project_id, value):
+        self.cache.set(self.key(user_id, project_id), value, self.ttl)
+
+    def delete(self, user_id, project_id):
+        self.cache.delete(self.key(user_id, project_id))
+
+    def delete_project(self, project_id):
+        self.cache.set(self.generation_key(project_id), time.time_ns(), None)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class MembershipCache:
+    """Cache of project memberships, counting its hits and misses."""
+    def __init__(self):
+        self._backend = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            config = getattr(settings, 'SOFTDESK_MEMBERSHIP_CACHE',
+                             DEFAULT_CONFIG)
+            backend = import_string(config['BACKEND'])
+            self._backend = backend(**config.get('OPTIONS', {}))
+        return self._backend
+
+    def get(self, user_id, project_id):
+        value = self.backend.get(user_id, project_id)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, user_id, project_id, value):
+        self.backend.set(user_id, project_id, value)
+
+    def invalidate(self, user_id, project_id):
+        # Invalidate again on commit, a reader may have cached the old value.
+        self.backend.delete(user_id, project_id)
+        transaction.on_commit(
+            lambda: self.backend.delete(user_id, project_id)
+        )
+
+    def invalidate_project(self, project_id):
+        self.backend.delete_project(project_id)
+        transaction.on_commit(
+            lambda: self.backend.delete_project(project_id)
+        )
+
+    def clear(self):
+        self.backend.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+membership_cache = MembershipCache()
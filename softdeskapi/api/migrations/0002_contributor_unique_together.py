@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:03
+
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='contributor',
+            unique_together={('user_id', 'project_id')},
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_contributor_unique_together'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project_id', 'created_time', 'id'], name='issue_project_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project_id', 'status', 'created_time'], name='issue_project_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project_id', 'priority', 'created_time'], name='issue_project_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project_id', 'tag', 'created_time'], name='issue_project_tag_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project_id', 'assignee_user_id', 'created_time'], name='issue_project_assignee_idx'),
+        ),
+    ]
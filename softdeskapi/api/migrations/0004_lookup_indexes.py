@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_issue_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['issue_id', 'created_time'], name='comment_issue_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contributor',
+            index=models.Index(fields=['project_id', 'user_id'], name='contributor_project_user_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+# Frozen copy of ProjectSummary.COUNTERS.
+COUNTERS = {
+    'status': {'À faire': 'status_todo', 'En cours': 'status_in_progress',
+               'Terminé': 'status_finished'},
+    'priority': {'FAIBLE': 'priority_low', 'MOYENNE': 'priority_medium',
+                 'ÉLEVÉE': 'priority_high'},
+    'tag': {'BUG': 'tag_bug', 'AMÉLIORATION': 'tag_improvement',
+            'TÂCHE': 'tag_task'},
+}
+
+
+def backfill(apps, schema_editor):
+    Project = apps.get_model('api', 'Project')
+    ProjectSummary = apps.get_model('api', 'ProjectSummary')
+    counters = {column: Count('issue', filter=Q(**{f'issue__{field}': value}))
+                for field, columns in COUNTERS.items()
+                for value, column in columns.items()}
+    rows = Project.objects.annotate(total=Count('issue'), **counters).values(
+        'pk', 'total', *counters
+    )
+    ProjectSummary.objects.bulk_create(
+        [ProjectSummary(project_id_id=row.pop('pk'), **row) for row in rows],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_modification_tracking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectSummary',
+            fields=[
+                ('project_id', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='api.project')),
+                ('total', models.IntegerField(default=0)),
+                ('status_todo', models.IntegerField(default=0)),
+                ('status_in_progress', models.IntegerField(default=0)),
+                ('status_finished', models.IntegerField(default=0)),
+                ('priority_low', models.IntegerField(default=0)),
+                ('priority_medium', models.IntegerField(default=0)),
+                ('priority_high', models.IntegerField(default=0)),
+                ('tag_bug', models.IntegerField(default=0)),
+                ('tag_improvement', models.IntegerField(default=0)),
+                ('tag_task', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
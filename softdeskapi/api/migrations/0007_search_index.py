@@ -0,0 +1,69 @@
+from django.db import migrations
+
+# Frozen copy of the schemas of api.search, by database vendor.
+# Issues are stored at rowid 2 * id and comments at 2 * comment_id + 1.
+SCHEMAS = {
+    'sqlite': {
+        'create': [
+            "CREATE VIRTUAL TABLE api_search USING fts5("
+            "title, body, kind UNINDEXED, object_id UNINDEXED, "
+            "project_id UNINDEXED, issue_id UNINDEXED)",
+        ],
+        'drop': ["DROP TABLE api_search"],
+    },
+    'postgresql': {
+        'create': [
+            "CREATE TABLE api_search ("
+            "rowid bigint PRIMARY KEY, title text NOT NULL, "
+            "body text NOT NULL, kind varchar(16) NOT NULL, "
+            "object_id integer NOT NULL, project_id integer NOT NULL, "
+            "issue_id integer NOT NULL, "
+            "document tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', title), 'A') || "
+            "setweight(to_tsvector('simple', body), 'B')) STORED)",
+            "CREATE INDEX api_search_document_idx ON api_search "
+            "USING gin (document)",
+            "CREATE INDEX api_search_project_idx ON api_search (project_id)",
+        ],
+        'drop': ["DROP TABLE api_search"],
+    },
+}
+
+BACKFILL = [
+    "INSERT INTO api_search "
+    "(rowid, title, body, kind, object_id, project_id, issue_id) "
+    "SELECT 2 * id, title, \"desc\", 'issue', id, project_id_id, id "
+    "FROM api_issue",
+    "INSERT INTO api_search "
+    "(rowid, title, body, kind, object_id, project_id, issue_id) "
+    "SELECT 2 * c.comment_id + 1, '', c.description, 'comment', "
+    "c.comment_id, i.project_id_id, i.id "
+    "FROM api_comment c JOIN api_issue i ON i.id = c.issue_id_id",
+]
+
+
+def create_index(apps, schema_editor):
+    schema = SCHEMAS.get(schema_editor.connection.vendor)
+    if schema is None:
+        return
+    for sql in schema['create'] + BACKFILL:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    schema = SCHEMAS.get(schema_editor.connection.vendor)
+    if schema is None:
+        return
+    for sql in schema['drop']:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_project_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_project_deleted_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='changes_horizon',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('project', 'project'), ('contributor', 'contributor'), ('issue', 'issue'), ('comment', 'comment')], max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('created', 'created'), ('updated', 'updated'), ('deleted', 'deleted')], max_length=16)),
+                ('created_time', models.DateTimeField(default=django.utils.timezone.now)),
+                ('project_id', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='api.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project_id', 'id'], name='change_project_idx'), models.Index(fields=['project_id', 'kind', 'object_id', 'id'], name='change_object_idx'), models.Index(fields=['created_time'], name='change_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def backfill(apps, schema_editor):
+    Issue = apps.get_model('api', 'Issue')
+    Comment = apps.get_model('api', 'Comment')
+    comments = Comment.objects.filter(issue_id=OuterRef('pk')).order_by()
+    latest = comments.order_by('-created_time', '-comment_id')
+    Issue.objects.update(
+        comment_count=Coalesce(Subquery(
+            comments.values('issue_id').annotate(count=Count('*'))
+            .values('count')
+        ), 0),
+        last_comment_time=Subquery(latest.values('created_time')[:1]),
+        last_comment_author=Subquery(latest.values('author_user_id')[:1]),
+    )
+    Issue.objects.update(last_activity_time=Greatest(
+        'updated_time', Coalesce('last_comment_time', F('updated_time'))
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_change_log'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='last_activity_time',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='last_comment_author',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='last_comment_time',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project_id', 'last_activity_time', 'created_time'], name='issue_project_activity_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
 
 
 class Project(models.Model):
@@ -20,6 +21,18 @@ class Project(models.Model):
     type = models.CharField(max_length=128, choices=TYPES_LIST)
     author_user_id = models.ForeignKey(to=settings.AUTH_USER_MODEL,
                                        on_delete=models.CASCADE)
+    # Bumped when the project, its contributors or its issues change.
+    version = models.PositiveIntegerField(default=0, editable=False)
+    updated_time = models.DateTimeField(auto_now=True, editable=False)
+    # Set when the project is deleted, until its rows are purged.
+    deleted_time = models.DateTimeField(null=True, editable=False)
+    # Last change removed from the log by retention: older cursors are gone.
+    changes_horizon = models.BigIntegerField(default=0, editable=False)
+
+    def save(self, *args, **kwargs):
+        # The change log is written by signal, in the same transaction.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
 
 
 class Contributor(models.Model):
@@ -31,6 +44,15 @@ class Contributor(models.Model):
 
     class Meta:
         unique_together = ('user_id', 'project_id')
+        indexes = [
+            models.Index(fields=['project_id', 'user_id'],
+                         name='contributor_project_user_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The change log is written by signal, in the same transaction.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
 
 
 class Issue(models.Model):
@@ -74,6 +96,60 @@ class Issue(models.Model):
                                          on_delete=models.CASCADE,
                                          related_name='assigned_to')
     created_time = models.DateTimeField(auto_now_add=True, editable=False)
+    updated_time = models.DateTimeField(auto_now=True, editable=False)
+    # Bumped when the comments of the issue change.
+    comments_version = models.PositiveIntegerField(default=0, editable=False)
+    comments_updated_time = models.DateTimeField(default=timezone.now,
+                                                 editable=False)
+    # Computed from the comments of the issue when its version is bumped.
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_comment_time = models.DateTimeField(null=True, editable=False)
+    last_comment_author = models.ForeignKey(to=settings.AUTH_USER_MODEL,
+                                            on_delete=models.SET_NULL,
+                                            null=True, editable=False,
+                                            related_name='+')
+    # Last change of the issue or of its comments.
+    last_activity_time = models.DateTimeField(auto_now=True)
+
+    # Fields counted in the project summary.
+    COUNTED_FIELDS = ('status', 'priority', 'tag')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project_id', 'created_time', 'id'],
+                         name='issue_project_created_idx'),
+            models.Index(fields=['project_id', 'status', 'created_time'],
+                         name='issue_project_status_idx'),
+            models.Index(fields=['project_id', 'priority', 'created_time'],
+                         name='issue_project_priority_idx'),
+            models.Index(fields=['project_id', 'tag', 'created_time'],
+                         name='issue_project_tag_idx'),
+            models.Index(fields=['project_id', 'assignee_user_id',
+                                 'created_time'],
+                         name='issue_project_assignee_idx'),
+            models.Index(fields=['project_id', 'last_activity_time',
+                                 'created_time'],
+                         name='issue_project_activity_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Values as stored, to move the summary counters on change.
+        instance._counted = instance.counted_values()
+        return instance
+
+    def counted_values(self):
+        """Return the counted fields' values, or None if one isn't loaded."""
+        if any(field not in self.__dict__ for field in self.COUNTED_FIELDS):
+            return None
+        return {field: self.__dict__[field] for field in self.COUNTED_FIELDS}
+
+    def save(self, *args, **kwargs):
+        # The summary counters and the search index are updated by signal,
+        # in the same transaction, the caller's one if any.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
 
 
 class Comment(models.Model):
@@ -83,3 +159,96 @@ class Comment(models.Model):
                                        on_delete=models.CASCADE)
     issue_id = models.ForeignKey(to=Issue, on_delete=models.CASCADE)
     created_time = models.DateTimeField(auto_now_add=True, editable=False)
+    updated_time = models.DateTimeField(auto_now=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['issue_id', 'created_time'],
+                         name='comment_issue_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The search index is updated by signal, in the same transaction,
+        # the caller's one if any.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class ProjectSummary(models.Model):
+    """Issue counters of a project, kept up to date on each issue change."""
+    # Counter column of each value of the issue's counted fields.
+    COUNTERS = {
+        'status': {
+            Issue.TODO: 'status_todo',
+            Issue.INPROGRESS: 'status_in_progress',
+            Issue.FINISHED: 'status_finished',
+        },
+        'priority': {
+            Issue.LOW: 'priority_low',
+            Issue.MEDIUM: 'priority_medium',
+            Issue.HIGH: 'priority_high',
+        },
+        'tag': {
+            Issue.BUG: 'tag_bug',
+            Issue.IMPROVEMENT: 'tag_improvement',
+            Issue.TASK: 'tag_task',
+        },
+    }
+
+    project_id = models.OneToOneField(to=Project, on_delete=models.CASCADE,
+                                      primary_key=True,
+                                      related_name='summary')
+    total = models.IntegerField(default=0)
+    status_todo = models.IntegerField(default=0)
+    status_in_progress = models.IntegerField(default=0)
+    status_finished = models.IntegerField(default=0)
+    priority_low = models.IntegerField(default=0)
+    priority_medium = models.IntegerField(default=0)
+    priority_high = models.IntegerField(default=0)
+    tag_bug = models.IntegerField(default=0)
+    tag_improvement = models.IntegerField(default=0)
+    tag_task = models.IntegerField(default=0)
+
+
+class Change(models.Model):
+    """
+    Append-only log of the changes of a project, its contributors, issues
+    and comments. The id is the cursor of the change feed.
+    """
+    PROJECT = 'project'
+    CONTRIBUTOR = 'contributor'
+    ISSUE = 'issue'
+    COMMENT = 'comment'
+    KINDS_LIST = [
+        (PROJECT, PROJECT),
+        (CONTRIBUTOR, CONTRIBUTOR),
+        (ISSUE, ISSUE),
+        (COMMENT, COMMENT)
+    ]
+
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ACTIONS_LIST = [
+        (CREATED, CREATED),
+        (UPDATED, UPDATED),
+        (DELETED, DELETED)
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    project_id = models.ForeignKey(to=Project, on_delete=models.CASCADE,
+                                   db_index=False)
+    kind = models.CharField(max_length=16, choices=KINDS_LIST)
+    # The user id for contributors, the primary key otherwise.
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=16, choices=ACTIONS_LIST)
+    created_time = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project_id', 'id'],
+                         name='change_project_idx'),
+            models.Index(fields=['project_id', 'kind', 'object_id', 'id'],
+                         name='change_object_idx'),
+            models.Index(fields=['created_time'], name='change_created_idx'),
+        ]
@@ -0,0 +1,157 @@
+import base64
+import json
+
+from django.db.models import F, Field, Func, Value
+from django.db.models.lookups import GreaterThan, LessThan
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def with_sort_key(queryset, ordering):
+    """
+    Queryset whose rows of values(), narrowed by a sparse fieldset, still
+    hold the sort key the cursor is made of.
+    """
+    if not queryset._fields:
+        return queryset
+    names = [name.lstrip('-') for name in ordering]
+    return queryset.values(*dict.fromkeys([*queryset._fields, *names]))
+
+
+class RowValue(Func):
+    """Row value of expressions, as (a, b, c), compared column by column."""
+    template = '(%(expressions)s)'
+    output_field = Field()
+
+
+class ProjectCursorPagination(CursorPagination):
+    """Cursor pagination with a stable ordering on the project id."""
+    ordering = 'project_id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return super().paginate_queryset(
+            with_sort_key(queryset, [self.ordering]), request, view
+        )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seek pagination: the cursor holds the sort key of the last row returned,
+    so a deep page is as cheap to fetch as the first one.
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    ordering_fields = ()
+    default_ordering = 'created_time'
+    tiebreakers = ('created_time', 'id')
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, request):
+        """Sort fields requested by the client, followed by the tiebreakers."""
+        ordering = request.query_params.get(self.ordering_query_param,
+                                            self.default_ordering)
+        if ordering.lstrip('-') not in self.ordering_fields:
+            raise ValidationError({'ordering': f'Unknown field {ordering}.'})
+
+        prefix = '-' if ordering.startswith('-') else ''
+        fields = [ordering]
+        for name in self.tiebreakers:
+            if name != ordering.lstrip('-'):
+                fields.append(prefix + name)
+        return fields
+
+    def encode_cursor(self, row):
+        if isinstance(row, dict):
+            # A row of values(), keyed by field name rather than attname.
+            row = self.model(**{self.get_field(name).attname:
+                                row[name.lstrip('-')]
+                                for name in self.ordering})
+        values = [self.get_field(name).value_to_string(row)
+                  for name in self.ordering]
+        data = json.dumps({'o': self.ordering, 'v': values})
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if (data['o'] != self.ordering
+                    or len(data['v']) != len(self.ordering)):
+                raise ValueError('Cursor of another ordering.')
+            return [self.get_field(name).to_python(value)
+                    for name, value in zip(self.ordering, data['v'])]
+        except Exception:
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+
+    def get_field(self, name):
+        return self.model._meta.get_field(name.lstrip('-'))
+
+    def seek(self, values):
+        """
+        Rows placed after the given sort key, in the current ordering. The
+        sort fields share a direction, so a row value comparison gives the
+        index a range starting at the key, however deep the page.
+        """
+        lookup = LessThan if self.ordering[0].startswith('-') else GreaterThan
+        return lookup(
+            RowValue(*[F(name.lstrip('-')) for name in self.ordering]),
+            RowValue(*[Value(value, output_field=self.get_field(name))
+                       for name, value in zip(self.ordering, values)])
+        )
+
+    def get_page_queryset(self, queryset, request):
+        """Rows of the requested page, plus one telling if another follows."""
+        self.request = request
+        self.model = queryset.model
+        self.ordering = self.get_ordering(request)
+        self.size = self.get_page_size(request)
+
+        queryset = with_sort_key(queryset.order_by(*self.ordering),
+                                 self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.seek(self.decode_cursor(cursor)))
+        return queryset[:self.size + 1]
+
+    def get_page(self, rows):
+        has_next = len(rows) > self.size
+        self.next_row = rows[self.size - 1] if has_next else None
+        return rows[:self.size]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.get_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        return self.get_page([row async for row in queryset])
+
+    def get_next_link(self):
+        if self.next_row is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param,
+                                   self.encode_cursor(self.next_row))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+
+class IssueKeysetPagination(KeysetPagination):
+    """Keyset pagination of a project's issues."""
+    ordering_fields = ('created_time', 'title', 'tag', 'priority', 'status',
+                       'assignee_user_id', 'last_activity_time')
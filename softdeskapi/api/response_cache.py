@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULT_CONFIG = {
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+    'LOCK_TIMEOUT': 10,
+    'WAIT': 2,
+}
+
+
+class ResponseCache:
+    """
+    Serialized response bodies, keyed by the entity tag of their resource.
+    Cached endpoints serve the same body to every contributor, so the key
+    needs no user. A cold key is rebuilt by a single worker while the others
+    wait for it.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+
+    @property
+    def config(self):
+        return {**DEFAULT_CONFIG,
+                **getattr(settings, 'SOFTDESK_RESPONSE_CACHE', {})}
+
+    @property
+    def cache(self):
+        return caches[self.config['ALIAS']]
+
+    def get_or_build(self, etag, build):
+        """Return the cached body of a resource version, or build it."""
+        config = self.config
+        key = 'response:' + etag.strip('"')
+        data = self.cache.get(key)
+        if data is not None:
+            self.hits += 1
+            return data
+
+        self.misses += 1
+        lock = f'{key}:lock'
+        if self.cache.add(lock, 1, config['LOCK_TIMEOUT']):
+            try:
+                data = build()
+                self.cache.set(key, data, config['TIMEOUT'])
+            finally:
+                self.cache.delete(lock)
+            return data
+
+        # Another worker is rebuilding this body, wait for it a moment.
+        self.waits += 1
+        deadline = time.monotonic() + config['WAIT']
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            data = self.cache.get(key)
+            if data is not None:
+                return data
+        return build()
+
+    async def aget_or_build(self, etag, build):
+        """get_or_build for the async views, build being a coroutine."""
+        config = self.config
+        key = 'response:' + etag.strip('"')
+        data = await self.cache.aget(key)
+        if data is not None:
+            self.hits += 1
+            return data
+
+        self.misses += 1
+        lock = f'{key}:lock'
+        if await self.cache.aadd(lock, 1, config['LOCK_TIMEOUT']):
+            try:
+                data = await build()
+                await self.cache.aset(key, data, config['TIMEOUT'])
+            finally:
+                await self.cache.adelete(lock)
+            return data
+
+        self.waits += 1
+        deadline = time.monotonic() + config['WAIT']
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            data = await self.cache.aget(key)
+            if data is not None:
+                return data
+        return await build()
+
+    def clear(self):
+        self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'waits': self.waits,
+                'hit_rate': self.hits / total if total else 0.0}
+
+
+response_cache = ResponseCache()
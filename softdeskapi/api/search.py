@@ -0,0 +1,204 @@
+import re
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.db import connections, router
+from django.utils.module_loading import import_string
+
+from .models import Issue
+
+# Issues and comments share the index, at even and odd rowids.
+ISSUE, COMMENT = 'issue', 'comment'
+INSERT_COLUMNS = 'rowid, title, body, kind, object_id, project_id, issue_id'
+
+
+def issue_rowid(pk):
+    return 2 * pk
+
+
+def comment_rowid(pk):
+    return 2 * pk + 1
+
+
+def search_terms(query):
+    """Split a query into words, dropping any search syntax."""
+    return re.findall(r'\w+', query)
+
+
+class SearchBackend(ABC):
+    """
+    Inverted index of the issues and comments in the api_search table.
+    Subclasses write the queries of a database vendor, and its search.
+    """
+    index_issue_sql = (
+        f'INSERT INTO api_search ({INSERT_COLUMNS}) '
+        f"VALUES (%s, %s, %s, '{ISSUE}', %s, %s, %s)"
+    )
+    # Comments are indexed in the project of their issue.
+    index_comment_sql = (
+        f'INSERT INTO api_search ({INSERT_COLUMNS}) '
+        f"SELECT %s, '', %s, '{COMMENT}', %s, project_id_id, id "
+        f'FROM api_issue WHERE id = %s'
+    )
+    remove_sql = 'DELETE FROM api_search WHERE rowid = %s'
+    # Rows of issues and of their comments, formatted with the placeholders
+    # of the issue ids.
+    remove_issues_sql = (
+        'DELETE FROM api_search WHERE rowid IN ('
+        'SELECT 2 * id FROM api_issue WHERE id IN ({ids}) UNION ALL '
+        'SELECT 2 * comment_id + 1 FROM api_comment '
+        'WHERE issue_id_id IN ({ids}))'
+    )
+    rebuild_sql = [
+        'DELETE FROM api_search',
+        f'INSERT INTO api_search ({INSERT_COLUMNS}) '
+        f"SELECT 2 * id, title, \"desc\", '{ISSUE}', id, project_id_id, id "
+        f'FROM api_issue',
+        f'INSERT INTO api_search ({INSERT_COLUMNS}) '
+        f"SELECT 2 * c.comment_id + 1, '', c.description, '{COMMENT}', "
+        f'c.comment_id, i.project_id_id, i.id '
+        f'FROM api_comment c JOIN api_issue i ON i.id = c.issue_id_id',
+    ]
+
+    def write_connection(self):
+        return connections[router.db_for_write(Issue)]
+
+    def read_connection(self):
+        return connections[router.db_for_read(Issue)]
+
+    def remove(self, rowids):
+        """Remove rows from the index."""
+        with self.write_connection().cursor() as cursor:
+            cursor.executemany(self.remove_sql, [(i,) for i in rowids])
+
+    def remove_issues(self, issue_ids):
+        """Remove the rows of issues and of their comments, in one query."""
+        ids = ', '.join(['%s'] * len(issue_ids))
+        with self.write_connection().cursor() as cursor:
+            cursor.execute(self.remove_issues_sql.format(ids=ids),
+                           [*issue_ids, *issue_ids])
+
+    def index_issues(self, issues):
+        """Add or replace the rows of the issues."""
+        self.remove([issue_rowid(issue.pk) for issue in issues])
+        with self.write_connection().cursor() as cursor:
+            cursor.executemany(self.index_issue_sql, [
+                (issue_rowid(issue.pk), issue.title, issue.desc, issue.pk,
+                 issue.project_id_id, issue.pk)
+                for issue in issues
+            ])
+
+    def index_comments(self, comments):
+        """Add or replace the rows of the comments."""
+        self.remove([comment_rowid(comment.pk) for comment in comments])
+        with self.write_connection().cursor() as cursor:
+            cursor.executemany(self.index_comment_sql, [
+                (comment_rowid(comment.pk), comment.description, comment.pk,
+                 comment.issue_id_id)
+                for comment in comments
+            ])
+
+    def rebuild(self):
+        """Index again every issue and comment, with set-based queries."""
+        with self.write_connection().cursor() as cursor:
+            for sql in self.rebuild_sql:
+                cursor.execute(sql)
+
+    @abstractmethod
+    def search(self, user_id, query, limit):
+        """
+        Return the best matches of the query in the projects of the user,
+        as dicts with kind, id, project_id, issue_id, snippet and rank.
+        """
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """Index in an FTS5 table, ranked by bm25 with titles weighted twice."""
+    search_sql = (
+        'SELECT kind, object_id, project_id, issue_id, '
+        "snippet(api_search, -1, '[', ']', '…', 16), "
+        'bm25(api_search, 2.0, 1.0) AS score '
+        'FROM api_search JOIN api_contributor '
+        'ON api_contributor.project_id_id = api_search.project_id '
+        'WHERE api_search MATCH %s AND api_contributor.user_id_id = %s '
+        'ORDER BY score LIMIT %s'
+    )
+
+    def search(self, user_id, query, limit):
+        match = ' '.join(f'"{term}"' for term in search_terms(query))
+        with self.read_connection().cursor() as cursor:
+            cursor.execute(self.search_sql, [match, user_id, limit])
+            # bm25 scores are better when lower.
+            return [dict(kind=kind, id=pk, project_id=project_id,
+                         issue_id=issue_id, snippet=snippet, rank=-score)
+                    for kind, pk, project_id, issue_id, snippet, score
+                    in cursor.fetchall()]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Index in a table with a GIN indexed tsvector, ranked by ts_rank."""
+    search_sql = (
+        'SELECT kind, object_id, project_id, issue_id, '
+        "ts_headline('simple', title || ' ' || body, query, "
+        "'StartSel=[, StopSel=], MaxWords=16, MinWords=4'), "
+        'ts_rank(document, query) AS score '
+        "FROM api_search, plainto_tsquery('simple', %s) query "
+        'WHERE document @@ query AND project_id IN ('
+        'SELECT project_id_id FROM api_contributor WHERE user_id_id = %s) '
+        'ORDER BY score DESC LIMIT %s'
+    )
+
+    def search(self, user_id, query, limit):
+        with self.read_connection().cursor() as cursor:
+            cursor.execute(self.search_sql,
+                           [' '.join(search_terms(query)), user_id, limit])
+            return [dict(kind=kind, id=pk, project_id=project_id,
+                         issue_id=issue_id, snippet=snippet, rank=score)
+                    for kind, pk, project_id, issue_id, snippet, score
+                    in cursor.fetchall()]
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend():
+    """
+    Return the backend of SOFTDESK_SEARCH_BACKEND, a dotted path, or the
+    one of the database vendor. None if the vendor has no index.
+    """
+    path = getattr(settings, 'SOFTDESK_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    backend = BACKENDS.get(connections[router.db_for_write(Issue)].vendor)
+    return backend() if backend else None
+
+
+def index_issues(issues):
+    """Add or replace the issues in the index, if the database has one."""
+    backend = get_backend()
+    if backend:
+        backend.index_issues(issues)
+
+
+def index_comments(comments):
+    """Add or replace the comments in the index, if the database has one."""
+    backend = get_backend()
+    if backend:
+        backend.index_comments(comments)
+
+
+def unindex(rowids):
+    """Remove rows from the index, if the database has one."""
+    backend = get_backend()
+    if backend:
+        backend.remove(rowids)
+
+
+def unindex_issues(issue_ids):
+    """Remove issues and their comments from the index, if there is one."""
+    backend = get_backend()
+    if backend:
+        backend.remove_issues(issue_ids)
@@ -0,0 +1,94 @@
+import itertools
+import random
+
+from django.contrib.auth.models import User
+
+from .models import Project, Contributor, Issue, Comment
+from .search import get_backend
+from .summary import recompute
+from .versioning import comment_stats
+
+# Words of the seeded texts, the first ones the most frequent, as Zipf's
+# law has it for natural language: a searched word matches from most of
+# the corpus down to a few rows.
+VOCABULARY = [f'term{rank}' for rank in range(1, 10001)]
+CUMULATIVE_WEIGHTS = list(itertools.accumulate(
+    1 / rank for rank in range(1, len(VOCABULARY) + 1)
+))
+
+
+def texts(words, seed=0):
+    """Endless texts of words drawn from the vocabulary, reproducibly."""
+    rng = random.Random(seed)
+    while True:
+        yield ' '.join(rng.choices(VOCABULARY, cum_weights=CUMULATIVE_WEIGHTS,
+                                   k=words))
+
+
+def seed(users=10, projects=5, issues=50, comments=5, batch_size=1000,
+         words=0):
+    """
+    Fill the database with bulk inserts.
+    Every user contributes to every project, issues are counted per project
+    and comments per issue. With words, issue descriptions and comments
+    are texts of that many words of VOCABULARY, for a search corpus.
+    Return the users and the projects created.
+    """
+    created_users = User.objects.bulk_create([
+        User(username=f'user{i}', password='!') for i in range(users)
+    ], batch_size=batch_size)
+
+    created_projects = Project.objects.bulk_create([
+        Project(title=f'Project {i}', description='Seeded project',
+                type=Project.BACKEND,
+                author_user_id=created_users[i % users])
+        for i in range(projects)
+    ], batch_size=batch_size)
+
+    Contributor.objects.bulk_create([
+        Contributor(user_id=user, project_id=project,
+                    role='author' if project.author_user_id == user
+                    else 'contributor')
+        for project in created_projects for user in created_users
+    ], batch_size=batch_size)
+
+    seed_issues(created_projects, created_users, issues, comments,
+                batch_size, words)
+    return created_users, created_projects
+
+
+def seed_issues(projects, users, issues=50, comments=5, batch_size=1000,
+                words=0):
+    """
+    Add issues to each project and comments to each issue, written by the
+    given users, with bulk inserts. With words, as seed.
+    """
+    text = texts(words) if words else None
+    created_issues = Issue.objects.bulk_create([
+        Issue(title=f'Issue {i}', desc=next(text) if text else 'Seeded issue',
+              tag=Issue.TAGS_LIST[i % 3][0],
+              priority=Issue.PRIORITIES_LIST[i % 3][0],
+              status=Issue.STATUS_LIST[i % 3][0],
+              project_id=project,
+              author_user_id=users[i % len(users)],
+              assignee_user_id=users[(i + 1) % len(users)])
+        for project in projects for i in range(issues)
+    ], batch_size=batch_size)
+
+    for start in range(0, len(created_issues), batch_size):
+        Comment.objects.bulk_create([
+            Comment(description=next(text) if text else f'Comment {i}',
+                    issue_id=issue,
+                    author_user_id=users[i % len(users)])
+            for issue in created_issues[start:start + batch_size]
+            for i in range(comments)
+        ], batch_size=batch_size)
+
+    # Bulk inserts send no signal, so the comment columns, the summaries
+    # and the search index are built here.
+    Issue.objects.filter(project_id__in=projects).update(**comment_stats())
+    for project in projects:
+        recompute(project.pk)
+    backend = get_backend()
+    if backend:
+        backend.rebuild()
@@ -1,11 +1,170 @@
+from functools import lru_cache
+
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from .models import Project, Contributor, Issue, Comment, ProjectSummary
+from .instrumentation import timed
+from .signals import bulk_saved
+
+
+class ValuesPlan:
+    """
+    Output of a read-only serializer compiled for the rows of values():
+    the columns to select, and the conversion of each one to its field.
+    The data is the one the serializer gives for the same objects.
+    """
+    # Fields representing the value of their column unchanged.
+    PLAIN_FIELDS = (serializers.CharField, serializers.IntegerField,
+                    serializers.ChoiceField,
+                    serializers.PrimaryKeyRelatedField)
+
+    def __init__(self, serializer, prefix=''):
+        self.columns = []
+        self.fields = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            column = prefix + field.source.replace('.', '__')
+            self.columns.append(column)
+            if isinstance(field, serializers.BaseSerializer):
+                # Embedded relation, null when its key is.
+                nested = ValuesPlan(field, prefix=f'{column}__')
+                self.columns += nested.columns
+                self.fields.append((name, column, None, nested))
+            elif isinstance(field, self.PLAIN_FIELDS):
+                self.fields.append((name, column, None, None))
+            else:
+                self.fields.append((name, column, field.to_representation,
+                                    None))
+
+    def values(self, queryset):
+        """Queryset of the rows the plan converts."""
+        return queryset.values(*self.columns)
+
+    def to_representation(self, row):
+        data = {}
+        for name, column, convert, nested in self.fields:
+            value = row[column]
+            if value is None:
+                data[name] = None
+            elif nested:
+                data[name] = nested.to_representation(row)
+            elif convert:
+                data[name] = convert(value)
+            else:
+                data[name] = value
+        return data
+
+    def data(self, rows):
+        with timed('ser'):
+            return [self.to_representation(row) for row in rows]
+
+
+class TimedModelSerializer(serializers.ModelSerializer):
+    """
+    Model serializer whose output counts as serialization time.
+    fields narrows the output to some of the Meta fields.
+    """
+    def __init__(self, *args, fields=(), **kwargs):
+        self.sparse_fields = fields
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.sparse_fields:
+            fields = {name: field for name, field in fields.items()
+                      if name in self.sparse_fields}
+        return fields
+
+    def to_representation(self, instance):
+        with timed('ser'):
+            return super().to_representation(instance)
+
+    @classmethod
+    def values_plan(cls, expand=(), fields=()):
+        """
+        Plan of the serializer's output for rows of values(), a fast path
+        for read-only lists. Only the columns of the output are selected.
+        """
+        return cls._values_plan(tuple(expand), tuple(fields))
 
-from .models import Project, Contributor, Issue, Comment
+    @classmethod
+    @lru_cache(maxsize=256)
+    def _values_plan(cls, expand, fields):
+        kwargs = {'expand': expand} if expand else {}
+        return ValuesPlan(cls(fields=fields, **kwargs))
 
 
-class UserSerializer(serializers.ModelSerializer):
+class ChangedFieldsSerializerMixin:
+    """Model serializer whose updates write only the changed columns."""
+    def update(self, instance, validated_data):
+        changed = [field for field, value in validated_data.items()
+                   if getattr(instance, field) != value]
+        if changed:
+            for field in changed:
+                setattr(instance, field, validated_data[field])
+            auto_now = [field.name for field in instance._meta.concrete_fields
+                        if getattr(field, 'auto_now', False)]
+            instance.save(update_fields=changed + auto_now)
+        return instance
+
+
+class ExpandableSerializerMixin:
+    """
+    Serializer whose related fields can be embedded in the output.
+    expandable_fields maps an expand name to a field and its serializer.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, expand=(), **kwargs):
+        self.expand = expand
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.expand:
+            field, serializer = self.expandable_fields[name]
+            # Left out by a sparse fieldset.
+            if field in fields:
+                fields[field] = serializer(read_only=True)
+        return fields
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """List serializer saving all its items with one bulk query."""
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        instances = model.objects.bulk_create(
+            [model(**attrs) for attrs in validated_data]
+        )
+        bulk_saved.send(sender=model, instances=instances, created=True)
+        return instances
+
+    def update(self, instances, validated_data):
+        model = self.child.Meta.model
+        fields = set()
+        for instance, attrs in zip(instances, validated_data):
+            for field, value in attrs.items():
+                setattr(instance, field, value)
+            fields.update(attrs)
+        if fields:
+            # Set here, as bulk_update doesn't run the fields' pre_save.
+            now = timezone.now()
+            for field in model._meta.concrete_fields:
+                if getattr(field, 'auto_now', False):
+                    fields.add(field.name)
+                    for instance in instances:
+                        setattr(instance, field.attname, now)
+            model.objects.bulk_update(instances, fields)
+            bulk_saved.send(sender=model, instances=instances, created=False)
+        return instances
+
+
+class UserSerializer(TimedModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'first_name', 'last_name', 'email',
@@ -24,29 +183,110 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class LoginSerializer(TokenObtainPairSerializer):
+    """
+    Token pair carrying the username and active flag, for stateless
+    authentication.
+    """
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['username'] = user.username
+        token['is_active'] = user.is_active
+        return token
+
+
+class ProjectSerializer(TimedModelSerializer):
     class Meta:
         model = Project
         fields = ['project_id', 'title', 'description', 'type',
                   'author_user_id']
 
 
-class ContributorSerializer(serializers.ModelSerializer):
+class ProjectSummarySerializer(TimedModelSerializer):
+    """Issue counters of a project, grouped by counted field and value."""
+    class Meta:
+        model = ProjectSummary
+        fields = ['project_id', 'total']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        for field, columns in ProjectSummary.COUNTERS.items():
+            data[field] = {value: getattr(instance, column)
+                           for value, column in columns.items()}
+        return data
+
+
+class ContributorSerializer(TimedModelSerializer):
     class Meta:
         model = Contributor
         fields = ['user_id', 'project_id', 'role']
 
 
-class IssueSerializer(serializers.ModelSerializer):
+class IssueSerializer(ExpandableSerializerMixin, ChangedFieldsSerializerMixin,
+                      TimedModelSerializer):
+    expandable_fields = {
+        'author': ('author_user_id', UserSerializer),
+        'assignee': ('assignee_user_id', UserSerializer),
+        'project': ('project_id', ProjectSerializer),
+        'last_comment_author': ('last_comment_author', UserSerializer),
+    }
+
+    class Meta:
+        model = Issue
+        fields = ['id', 'title', 'desc', 'tag', 'priority', 'project_id',
+                  'status', 'author_user_id', 'assignee_user_id',
+                  'created_time', 'comment_count', 'last_comment_time',
+                  'last_comment_author', 'last_activity_time']
+        # Given by the view, from the objects it already loaded.
+        read_only_fields = ['project_id', 'author_user_id',
+                            'assignee_user_id']
+
+
+class CommentSerializer(ExpandableSerializerMixin,
+                        ChangedFieldsSerializerMixin, TimedModelSerializer):
+    expandable_fields = {
+        'author': ('author_user_id', UserSerializer),
+        'issue': ('issue_id', IssueSerializer),
+    }
+
+    class Meta:
+        model = Comment
+        fields = ['comment_id', 'description', 'author_user_id', 'issue_id',
+                  'created_time']
+        # Given by the view, from the objects it already loaded.
+        read_only_fields = ['author_user_id', 'issue_id']
+
+
+class ContributorBulkSerializer(TimedModelSerializer):
+    """Contributor added in bulk, the user is checked by the view."""
+    user_id = serializers.IntegerField(source='user_id_id')
+
+    class Meta:
+        model = Contributor
+        fields = ['user_id', 'project_id', 'role']
+        read_only_fields = ['project_id']
+        list_serializer_class = BulkListSerializer
+
+
+class IssueBulkSerializer(TimedModelSerializer):
+    """Issue written in bulk, the assignee is checked by the view."""
+    assignee_user_id = serializers.IntegerField(source='assignee_user_id_id')
+
     class Meta:
         model = Issue
         fields = ['id', 'title', 'desc', 'tag', 'priority', 'project_id',
                   'status', 'author_user_id', 'assignee_user_id',
                   'created_time']
+        read_only_fields = ['project_id', 'author_user_id']
+        list_serializer_class = BulkListSerializer
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentBulkSerializer(TimedModelSerializer):
+    """Comment written in bulk."""
     class Meta:
         model = Comment
         fields = ['comment_id', 'description', 'author_user_id', 'issue_id',
                   'created_time']
+        read_only_fields = ['author_user_id', 'issue_id']
+        list_serializer_class = BulkListSerializer
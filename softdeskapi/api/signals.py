@@ -0,0 +1,167 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from .authentication import forget_user
+from .changes import log_changes
+from .instrumentation import record_query
+from .membership import membership_cache
+from .models import (
+    Project,
+    Contributor,
+    Issue,
+    Comment,
+    ProjectSummary,
+    Change,
+)
+from .search import (
+    index_issues,
+    index_comments,
+    unindex,
+    issue_rowid,
+    comment_rowid,
+)
+from .summary import count_issue, deferred_counts
+from .versioning import bump_project, bump_issue
+
+# Sent after a bulk query saved instances, which sends no post_save.
+bulk_saved = Signal()
+
+# Fields copied to the search index.
+INDEXED_FIELDS = {Issue: {'title', 'desc'}, Comment: {'description'}}
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """Count the queries of every connection, in any thread."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    """Forget the user cached by the authentication when it changes."""
+    forget_user(instance.pk)
+    transaction.on_commit(lambda: forget_user(instance.pk))
+
+
+@receiver(post_save, sender=Contributor)
+@receiver(post_delete, sender=Contributor)
+def invalidate_membership(sender, instance, **kwargs):
+    """Forget a cached membership when a contributor changes."""
+    membership_cache.invalidate(instance.user_id_id, instance.project_id_id)
+
+
+@receiver(post_delete, sender=Project)
+def invalidate_project_memberships(sender, instance, **kwargs):
+    """Forget every cached membership of a deleted project."""
+    membership_cache.invalidate_project(instance.pk)
+
+
+@receiver(post_save, sender=Project)
+def project_changed(sender, instance, created, **kwargs):
+    """Bump the version of an edited project, or add a new one's summary."""
+    if created:
+        ProjectSummary.objects.create(project_id=instance)
+    else:
+        bump_project(instance.pk)
+
+
+@receiver(post_save, sender=Contributor)
+@receiver(post_delete, sender=Contributor)
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+def project_content_changed(sender, instance, **kwargs):
+    """Bump the version of a project whose contributors or issues change."""
+    bump_project(instance.project_id_id)
+
+
+@receiver(post_save, sender=Issue)
+def issue_saved(sender, instance, created, **kwargs):
+    """Move the summary counters of a saved issue's project."""
+    count_issue(instance, created=created)
+
+
+@receiver(post_delete, sender=Issue)
+def issue_deleted(sender, instance, **kwargs):
+    """Remove a deleted issue from its project's summary counters."""
+    count_issue(instance, deleted=True)
+
+
+@receiver(bulk_saved, sender=Issue)
+def issues_bulk_saved(sender, instances, created, **kwargs):
+    """Move the summary counters of issues saved in bulk."""
+    with deferred_counts():
+        for instance in instances:
+            count_issue(instance, created=created)
+
+
+@receiver(post_save, sender=Issue)
+@receiver(post_save, sender=Comment)
+def index_saved(sender, instance, update_fields=None, **kwargs):
+    """Add or replace a saved issue or comment in the search index."""
+    if update_fields and not INDEXED_FIELDS[sender] & update_fields:
+        return
+    if sender is Issue:
+        index_issues([instance])
+    else:
+        index_comments([instance])
+
+
+@receiver(bulk_saved, sender=Issue)
+@receiver(bulk_saved, sender=Comment)
+def index_bulk_saved(sender, instances, **kwargs):
+    """Add or replace issues or comments saved in bulk in the search index."""
+    if sender is Issue:
+        index_issues(instances)
+    else:
+        index_comments(instances)
+
+
+@receiver(post_delete, sender=Issue)
+@receiver(post_delete, sender=Comment)
+def unindex_deleted(sender, instance, **kwargs):
+    """Remove a deleted issue or comment from the search index."""
+    rowid = issue_rowid if sender is Issue else comment_rowid
+    unindex([rowid(instance.pk)])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def issue_comments_changed(sender, instance, **kwargs):
+    """Bump the comments version of an issue."""
+    bump_issue(instance.issue_id_id)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Contributor)
+@receiver(post_save, sender=Issue)
+@receiver(post_save, sender=Comment)
+def log_saved(sender, instance, created, **kwargs):
+    """Log a created or updated object in the changes of its project."""
+    log_changes([instance], Change.CREATED if created else Change.UPDATED)
+
+
+@receiver(bulk_saved, sender=Contributor)
+@receiver(bulk_saved, sender=Issue)
+@receiver(bulk_saved, sender=Comment)
+def log_bulk_saved(sender, instances, created, **kwargs):
+    """Log objects saved in bulk in the changes of their project."""
+    log_changes(instances, Change.CREATED if created else Change.UPDATED)
+
+
+@receiver(post_delete, sender=Contributor)
+@receiver(post_delete, sender=Issue)
+@receiver(post_delete, sender=Comment)
+def log_deleted(sender, instance, **kwargs):
+    """Log a deleted object in the changes of its project."""
+    log_changes([instance], Change.DELETED)
+
+
+@receiver(post_delete, sender=Project)
+def drop_project_changes(sender, instance, **kwargs):
+    """Remove the changes logged by the cascade of a deleted project."""
+    Change.objects.filter(project_id=instance.pk).delete()
@@ -0,0 +1,97 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db.models import Count, F, Q
+
+from .models import Issue, ProjectSummary
+
+_deferred = threading.local()
+
+
+def issue_counts(values):
+    """Return the counters an issue with these values adds one to."""
+    if values is None:
+        return Counter()
+    counts = Counter(total=1)
+    for field, columns in ProjectSummary.COUNTERS.items():
+        column = columns.get(values[field])
+        if column:
+            counts[column] += 1
+    return counts
+
+
+def summary_counts(project_id):
+    """Count the issues of a project with one aggregate query."""
+    counters = {column: Count('pk', filter=Q(**{field: value}))
+                for field, columns in ProjectSummary.COUNTERS.items()
+                for value, column in columns.items()}
+    return Issue.objects.filter(project_id=project_id).aggregate(
+        total=Count('pk'), **counters
+    )
+
+
+def recompute(project_id):
+    """Rebuild the summary of a project from its issues."""
+    summary, _ = ProjectSummary.objects.update_or_create(
+        project_id_id=project_id, defaults=summary_counts(project_id)
+    )
+    return summary
+
+
+def get_summary(project):
+    """Return the summary of a project, built on the first read if missing."""
+    summary = ProjectSummary.objects.filter(project_id=project).first()
+    return summary or recompute(project.pk)
+
+
+def add_counts(project_id, deltas=None):
+    """Add the deltas to the counters of a project, or rebuild them if None."""
+    pending = getattr(_deferred, 'pending', None)
+    if pending is not None:
+        if deltas is None or pending.get(project_id, Counter()) is None:
+            pending[project_id] = None
+        else:
+            pending.setdefault(project_id, Counter()).update(deltas)
+        return
+
+    if deltas is None:
+        recompute(project_id)
+        return
+    updates = {column: F(column) + delta
+               for column, delta in deltas.items() if delta}
+    if updates:
+        # A missing summary is left missing: it is rebuilt when read.
+        ProjectSummary.objects.filter(project_id=project_id).update(**updates)
+
+
+def count_issue(issue, created=False, deleted=False):
+    """Move the counters of the issue's project from its stored values."""
+    old = None if created else getattr(issue, '_counted', None)
+    new = None if deleted else issue.counted_values()
+    if deleted and old is None:
+        old = issue.counted_values()
+    if not created and old is None or not deleted and new is None:
+        # Stored or new values unknown, count the whole project again.
+        add_counts(issue.project_id_id)
+    else:
+        deltas = issue_counts(new)
+        deltas.subtract(issue_counts(old))
+        add_counts(issue.project_id_id, deltas)
+    issue._counted = new
+
+
+@contextmanager
+def deferred_counts():
+    """Update the counters of each project touched in the block once."""
+    if getattr(_deferred, 'pending', None) is not None:
+        yield
+        return
+
+    _deferred.pending = {}
+    try:
+        yield
+    finally:
+        pending, _deferred.pending = _deferred.pending, None
+    for project_id, deltas in pending.items():
+        add_counts(project_id, deltas)
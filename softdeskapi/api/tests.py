@@ -1,3 +1,1583 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import math
+import time
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command, CommandError
+from django.http import HttpResponse
+from django.db import connection
+from django.test import AsyncClient, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from rest_framework import renderers
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import views
+from .authentication import user_cache_key
+from .db import ReplicaRouter, read_replica_middleware
+from .endpoints import endpoints, issue_data
+from .export import issues_with_comments
+from .hashers import password_hashers
+from .instrumentation import route_metrics
+from .membership import DjangoCacheBackend, LRUBackend, membership_cache
+from .response_cache import response_cache
+from .renderers import JSONRenderer
+from .models import (
+    Project,
+    Contributor,
+    Issue,
+    Comment,
+    ProjectSummary,
+    Change,
+)
+from .seeding import seed, seed_issues
+from .serializers import (
+    LoginSerializer,
+    ProjectSerializer,
+    IssueSerializer,
+    CommentSerializer,
+    UserSerializer,
+)
+from .summary import summary_counts
+from .throttling import take_token
+
+
+class ProjectListTests(APITestCase):
+    """Tests for the project list endpoint."""
+    def setUp(self):
+        membership_cache.clear()
+        caches['throttle'].clear()
+        response_cache.clear()
+        self.user = User.objects.create_user('yoan', password='test-test1')
+        self.other = User.objects.create_user('luc', password='test/test2')
+        self.client.force_authenticate(self.user)
+
+    def create_projects(self, count):
+        for i in range(count):
+            project = Project.objects.create(title='Project', description='',
+                                             type=Project.BACKEND,
+                                             author_user_id=self.other)
+            user = self.user if i % 2 else self.other
+            Contributor.objects.create(user_id=user, project_id=project,
+                                       role='contributor')
+
+    def test_list_only_returns_caller_projects(self):
+        self.create_projects(6)
+        response = self.client.get('/projects/')
+        ids = [p['project_id'] for p in response.data['results']]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(ids), 3)
+
+    def test_list_query_count_is_flat(self):
+        self.create_projects(10)
+        with self.assertNumQueries(1):
+            self.client.get('/projects/')
+        self.create_projects(200)
+        with self.assertNumQueries(1):
+            self.client.get('/projects/')
+
+    def test_list_is_paginated_by_cursor(self):
+        self.create_projects(10)
+        response = self.client.get('/projects/', {'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 2)
+
+
+class SoftDeskTestCase(APITestCase):
+    """Base test case with a project, an issue and a comment."""
+    def setUp(self):
+        membership_cache.clear()
+        caches['throttle'].clear()
+        response_cache.clear()
+        self.user = User.objects.create_user('yoan', password='test-test1')
+        self.other = User.objects.create_user('luc', password='test/test2')
+        self.project = Project.objects.create(title='Project',
+                                              description='',
+                                              type=Project.BACKEND,
+                                              author_user_id=self.user)
+        Contributor.objects.create(user_id=self.user, project_id=self.project,
+                                   role='author')
+        self.issue = Issue.objects.create(title='Issue', desc='',
+                                          tag=Issue.BUG, priority=Issue.LOW,
+                                          project_id=self.project,
+                                          status=Issue.TODO,
+                                          author_user_id=self.user,
+                                          assignee_user_id=self.user)
+        self.comment = Comment.objects.create(description='Comment',
+                                              author_user_id=self.user,
+                                              issue_id=self.issue)
+        self.url = (f'/projects/{self.project.pk}/issues/{self.issue.pk}'
+                    f'/comments/{self.comment.pk}/')
+
+
+class ProjectContextTests(SoftDeskTestCase):
+    """Tests for the objects resolved once per request."""
+    def test_comment_detail_resolves_in_one_query(self):
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['comment_id'], self.comment.pk)
+
+    def test_cached_membership_leaves_the_query(self):
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(self.url)
+        with CaptureQueriesContext(connection) as warm:
+            self.client.get(self.url)
+        self.assertEqual((len(cold), len(warm)), (1, 1))
+        self.assertIn('api_contributor', cold[0]['sql'])
+        self.assertNotIn('api_contributor', warm[0]['sql'])
+        self.assertEqual(membership_cache.stats(), {'hits': 1, 'misses': 1})
+
+    def test_non_contributor_is_forbidden(self):
+        self.client.force_authenticate(self.other)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_comment_of_another_issue_is_not_found(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(f'/projects/{self.project.pk}/issues/'
+                                   f'{self.issue.pk + 1}/comments/'
+                                   f'{self.comment.pk}/')
+        self.assertEqual(response.status_code, 404)
+
+
+class MembershipCacheTests(SoftDeskTestCase):
+    """Tests for the cached memberships."""
+    def test_membership_is_cached(self):
+        self.client.force_authenticate(self.user)
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.assertEqual(membership_cache.stats(), {'hits': 1, 'misses': 1})
+
+    def test_revoked_contributor_cannot_read(self):
+        Contributor.objects.create(user_id=self.other, project_id=self.project,
+                                   role='contributor')
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.client.force_authenticate(self.user)
+        response = self.client.delete(
+            f'/projects/{self.project.pk}/users/{self.other.pk}/'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_django_cache_backend_drops_a_project(self):
+        backend = DjangoCacheBackend()
+        backend.cache.clear()
+        backend.set(self.user.pk, 1, True)
+        backend.set(self.other.pk, 1, False)
+        backend.set(self.user.pk, 2, True)
+        backend.delete_project(1)
+        self.assertIsNone(backend.get(self.user.pk, 1))
+        self.assertIsNone(backend.get(self.other.pk, 1))
+        self.assertTrue(backend.get(self.user.pk, 2))
+
+        backend.set(self.user.pk, 1, True)
+        self.assertTrue(backend.get(self.user.pk, 1))
+
+    def test_other_workers_see_a_revocation_within_the_ttl(self):
+        # Another worker's LRU, which the revocation doesn't reach.
+        ttl = settings.SOFTDESK_MEMBERSHIP_CACHE['OPTIONS']['ttl']
+        backend = LRUBackend(ttl=ttl)
+        now = time.monotonic()
+        backend.set(self.other.pk, self.project.pk, True)
+        with mock.patch('time.monotonic', lambda: now + ttl + 1):
+            self.assertIsNone(backend.get(self.other.pk, self.project.pk))
+        self.assertLessEqual(ttl, 5)
+
+
+class ExpandTests(SoftDeskTestCase):
+    """Tests for the embedded relations of issues and comments."""
+    def test_issue_list_expansion_query_count(self):
+        Issue.objects.bulk_create([
+            Issue(title=f'Issue {i}', desc='', tag=Issue.TASK,
+                  priority=Issue.MEDIUM, project_id=self.project,
+                  status=Issue.INPROGRESS, author_user_id=self.user,
+                  assignee_user_id=self.other)
+            for i in range(499)
+        ])
+        self.client.force_authenticate(self.user)
+        # Project with the membership, and the joined issue list.
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                f'/projects/{self.project.pk}/issues/',
+                {'expand': 'author,assignee,project', 'page_size': 500}
+            )
+        self.assertEqual(len(response.data['results']), 500)
+        issue = response.data['results'][-1]
+        self.assertEqual(issue['author_user_id']['username'], 'yoan')
+        self.assertEqual(issue['assignee_user_id']['username'], 'luc')
+        self.assertEqual(issue['project_id']['title'], 'Project')
+        self.assertNotIn('password', issue['author_user_id'])
+
+    def test_comment_issue_expansion(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.url, {'expand': 'issue'})
+        self.assertEqual(response.data['issue_id']['title'], 'Issue')
+
+    def test_unknown_expansion_is_rejected(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.url, {'expand': 'project'})
+        self.assertEqual(response.status_code, 400)
+
+
+class IssueListTests(SoftDeskTestCase):
+    """Tests for filtering, sorting and paginating issues."""
+    def setUp(self):
+        super().setUp()
+        Issue.objects.bulk_create([
+            Issue(title=f'Issue {i}', desc='', tag=Issue.TASK,
+                  priority=Issue.HIGH if i % 3 else Issue.LOW,
+                  project_id=self.project, status=Issue.FINISHED,
+                  author_user_id=self.user, assignee_user_id=self.user)
+            for i in range(24)
+        ])
+        self.url = f'/projects/{self.project.pk}/issues/'
+        self.client.force_authenticate(self.user)
+
+    def walk(self, params):
+        ids = []
+        response = self.client.get(self.url, params)
+        while True:
+            ids += [issue['id'] for issue in response.data['results']]
+            if not response.data['next']:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_pages_cover_every_issue_once(self):
+        # Identical creation times must be ordered by id.
+        Issue.objects.update(created_time=timezone.now())
+        ids = self.walk({'page_size': 5})
+        self.assertEqual(ids, sorted(Issue.objects.values_list('id',
+                                                               flat=True)))
+
+    def test_descending_ordering(self):
+        ids = self.walk({'page_size': 7, 'ordering': '-created_time'})
+        self.assertEqual(ids, list(Issue.objects.order_by(
+            '-created_time', '-id').values_list('id', flat=True)))
+
+    def test_sorting_on_priority_with_filter(self):
+        ids = self.walk({'page_size': 4, 'ordering': 'priority',
+                         'status': Issue.FINISHED})
+        expected = Issue.objects.filter(status=Issue.FINISHED).order_by(
+            'priority', 'created_time', 'id')
+        self.assertEqual(ids, list(expected.values_list('id', flat=True)))
+
+    def test_filters(self):
+        response = self.client.get(self.url, {'priority': Issue.LOW,
+                                              'status': Issue.FINISHED})
+        self.assertEqual(len(response.data['results']), 8)
+        response = self.client.get(self.url, {
+            'created_after': self.issue.created_time.isoformat(),
+            'status': f'{Issue.TODO},{Issue.FINISHED}',
+        })
+        self.assertEqual(len(response.data['results']), 25)
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in ({'status': 'Unknown'}, {'ordering': 'desc'},
+                       {'cursor': 'garbage'}, {'created_after': 'today'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400)
+
+    def test_cursor_of_another_ordering_is_rejected(self):
+        response = self.client.get(self.url, {'page_size': 5,
+                                              'ordering': 'title'})
+        query = parse_qs(urlparse(response.data['next']).query)
+        cursor = query['cursor'][0]
+        self.assertEqual(self.client.get(self.url, {
+            'cursor': cursor, 'page_size': 5, 'ordering': 'title'
+        }).status_code, 200)
+        for params in ({'cursor': cursor},
+                       {'cursor': cursor, 'ordering': '-title'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400)
+
+
+class BulkTests(SoftDeskTestCase):
+    """Tests for the bulk endpoints."""
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.url = f'/projects/{self.project.pk}/issues/bulk/'
+
+    def issue_data(self, **kwargs):
+        return {'title': 'Imported', 'desc': 'Imported', 'tag': Issue.BUG,
+                'priority': Issue.LOW, 'status': Issue.TODO, **kwargs}
+
+    def test_create_issues_with_constant_queries(self):
+        # Project with the membership, assignees check, then a transaction
+        # with the inserts, the summary counters update, the search index
+        # update and the project version bump, then the change log insert.
+        # The inserts are batched by the parameters the database accepts.
+        fields = [field for field in Issue._meta.concrete_fields
+                  if not field.primary_key]
+        batch_size = connection.ops.bulk_batch_size(fields, [Issue()] * 100)
+        with self.assertNumQueries(9 + math.ceil(100 / batch_size)):
+            response = self.client.post(
+                self.url, [self.issue_data() for _ in range(100)],
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 100)
+        self.assertEqual(Issue.objects.count(), 101)
+
+    def test_invalid_items_save_nothing(self):
+        items = [self.issue_data(),
+                 self.issue_data(assignee_user_id=self.other.pk),
+                 self.issue_data(tag='Unknown')]
+        response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data), [2])
+        self.assertIn('tag', response.data[2])
+        response = self.client.post(self.url, items[:2], format='json')
+        self.assertIn('assignee_user_id', response.data[1])
+        self.assertEqual(Issue.objects.count(), 1)
+
+    def test_update_and_delete_issues(self):
+        response = self.client.put(
+            self.url, [{'id': self.issue.pk, 'status': Issue.FINISHED}],
+            format='json'
+        )
+        self.assertEqual(response.data[0]['status'], Issue.FINISHED)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.status, Issue.FINISHED)
+
+        response = self.client.delete(self.url, [self.issue.pk, 0],
+                                      format='json')
+        self.assertEqual(response.data, [{'id': self.issue.pk,
+                                          'deleted': True},
+                                         {'id': 0, 'deleted': False}])
+        self.assertFalse(Issue.objects.exists())
+
+    def test_add_contributors(self):
+        url = f'/projects/{self.project.pk}/users/bulk/'
+        response = self.client.post(url, [{'user_id': self.user.pk,
+                                           'role': 'author'}], format='json')
+        self.assertEqual(response.status_code, 400)
+
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(self.url[:-5]).status_code, 403)
+        self.client.force_authenticate(self.user)
+        response = self.client.post(url, [{'user_id': self.other.pk,
+                                           'role': 'contributor'}],
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(self.url[:-5]).status_code, 200)
+
+    def test_create_comments(self):
+        url = (f'/projects/{self.project.pk}/issues/{self.issue.pk}'
+               f'/comments/bulk/')
+        response = self.client.post(url, [{'description': 'One'},
+                                          {'description': 'Two'}],
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.issue.comment_set.count(), 3)
+
+
+class ExportTests(SoftDeskTestCase):
+    """Tests for the streamed export of a project."""
+    def setUp(self):
+        super().setUp()
+        self.empty = Issue.objects.create(title='Empty', desc='',
+                                          tag=Issue.TASK, priority=Issue.LOW,
+                                          project_id=self.project,
+                                          status=Issue.TODO,
+                                          author_user_id=self.user,
+                                          assignee_user_id=self.user)
+        Comment.objects.bulk_create([
+            Comment(description=f'Comment {i}', author_user_id=self.user,
+                    issue_id=self.issue)
+            for i in range(9)
+        ])
+        self.url = f'/projects/{self.project.pk}/export/'
+        self.client.force_authenticate(self.user)
+
+    def export(self, output):
+        response = self.client.get(self.url, {'output': output})
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_groups_comments_under_issues(self):
+        # Project with the membership, then one cursor for issues and one
+        # for comments, however many issues there are, in a savepoint.
+        with self.assertNumQueries(5):
+            lines = self.export('ndjson').splitlines()
+        issues = [json.loads(line) for line in lines]
+        self.assertEqual([i['id'] for i in issues],
+                         [self.issue.pk, self.empty.pk])
+        self.assertEqual(len(issues[0]['comments']), 10)
+        self.assertEqual(issues[1]['comments'], [])
+
+    def test_comments_of_a_missing_issue_are_skipped(self):
+        Comment.objects.create(description='Late', author_user_id=self.user,
+                               issue_id=self.empty)
+        # The first issue is gone from the issue cursor, not its comments.
+        issues = Issue.objects.all()
+        with mock.patch.object(Issue.objects, 'filter', lambda **kwargs:
+                               issues.filter(**kwargs)
+                               .exclude(pk=self.issue.pk)):
+            pairs = list(issues_with_comments(self.project))
+        self.assertEqual([(issue.pk, [c.description for c in comments])
+                          for issue, comments in pairs],
+                         [(self.empty.pk, ['Late'])])
+
+    def test_csv_has_a_row_per_comment(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('csv'))))
+        self.assertEqual(len(rows), 11)
+        self.assertEqual(rows[-1]['issue_title'], 'Empty')
+        self.assertEqual(rows[-1]['comment_id'], '')
+
+    def test_unknown_output_is_rejected(self):
+        response = self.client.get(self.url, {'output': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ConditionalRequestTests(SoftDeskTestCase):
+    """Tests for ETag and Last-Modified validators."""
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.issues_url = f'/projects/{self.project.pk}/issues/'
+        self.comments_url = self.url.rsplit('/', 2)[0] + '/'
+
+    def test_unchanged_issue_list_is_not_modified(self):
+        etag = self.client.get(self.issues_url)['ETag']
+        # The project only: membership is cached and no issue is loaded.
+        with self.assertNumQueries(1):
+            response = self.client.get(self.issues_url,
+                                       HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_issue_changes_modify_the_list(self):
+        etag = self.client.get(self.issues_url)['ETag']
+        self.issue.status = Issue.FINISHED
+        self.issue.save()
+        response = self.client.get(self.issues_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        self.issue.delete()
+        response = self.client.get(self.issues_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_query_string_changes_the_etag(self):
+        etag = self.client.get(self.issues_url)['ETag']
+        response = self.client.get(self.issues_url, {'status': Issue.TODO},
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_comment_changes_modify_the_comment_list(self):
+        etag = self.client.get(self.comments_url)['ETag']
+        response = self.client.get(self.comments_url,
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        bulk_url = self.comments_url + 'bulk/'
+        self.client.post(bulk_url, [{'description': 'New'}], format='json')
+        response = self.client.get(self.comments_url,
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_project_retrieve_uses_last_modified(self):
+        url = f'/projects/{self.project.pk}/'
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+
+class ResponseCacheTests(SoftDeskTestCase):
+    """Tests for the cached list responses."""
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.issues_url = f'/projects/{self.project.pk}/issues/'
+
+    def test_second_read_is_a_hit(self):
+        first = self.client.get(self.issues_url).data
+        # The project only: membership and the body are cached.
+        with self.assertNumQueries(1):
+            second = self.client.get(self.issues_url).data
+        self.assertEqual(first, second)
+        self.assertEqual(response_cache.stats()['hits'], 1)
+
+    def test_writes_are_never_served_stale(self):
+        self.client.get(self.issues_url)
+        self.client.put(f'{self.issues_url}{self.issue.pk}/',
+                        {'title': 'Renamed', 'desc': 'Issue',
+                         'tag': Issue.BUG, 'priority': Issue.LOW,
+                         'status': Issue.FINISHED}, format='json')
+        response = self.client.get(self.issues_url)
+        self.assertEqual(response.data['results'][0]['title'], 'Renamed')
+
+    @override_settings(ALLOWED_HOSTS=['one.test', 'two.test'])
+    def test_links_follow_the_host_of_each_request(self):
+        seed_issues([self.project], [self.user], issues=1, comments=0)
+        url = f'{self.issues_url}?page_size=1'
+        one = self.client.get(url, HTTP_HOST='one.test')
+        two = self.client.get(url, HTTP_HOST='two.test')
+        self.assertNotEqual(one['ETag'], two['ETag'])
+        self.assertEqual(urlparse(one.data['next']).netloc, 'one.test')
+        self.assertEqual(urlparse(two.data['next']).netloc, 'two.test')
+
+    @override_settings(SOFTDESK_RESPONSE_CACHE={'ALIAS': 'responses',
+                                                'WAIT': 0.1})
+    def test_cold_key_is_built_once(self):
+        builds = []
+        response_cache.cache.add('response:stampede:lock', 1)
+        response_cache.cache.set('response:stampede', ['built'])
+        data = response_cache.get_or_build('"stampede"', builds.append)
+        self.assertEqual(data, ['built'])
+        self.assertEqual(builds, [])
+
+        response_cache.cache.delete('response:stampede')
+        data = response_cache.get_or_build('"stampede"', lambda: ['rebuilt'])
+        # Still locked by another worker: waits, then builds anyway.
+        self.assertEqual(data, ['rebuilt'])
+        self.assertEqual(response_cache.stats()['waits'], 1)
+
+
+class AuthenticationTests(SoftDeskTestCase):
+    """Tests for the cached and stateless JWT authentication."""
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        token = LoginSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.projects_url = '/projects/'
+
+    def test_user_lookup_is_cached(self):
+        with self.assertNumQueries(2):
+            self.client.get(self.projects_url)
+        with self.assertNumQueries(1):
+            self.client.get(self.projects_url)
+
+    def test_cached_user_has_no_password(self):
+        self.client.get(self.projects_url)
+        fields = cache.get(user_cache_key(self.user.pk))
+        self.assertEqual(fields, {'id': self.user.pk, 'username': 'yoan',
+                                  'is_active': True})
+        response = self.client.post(f'/projects/{self.project.pk}/issues/',
+                                    issue_data(), format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['author_user_id'], self.user.pk)
+
+    def test_user_changes_invalidate_the_cache(self):
+        self.client.get(self.projects_url)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.projects_url)
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(SOFTDESK_AUTH={'STATELESS_READS': True})
+    def test_stateless_reads_skip_the_user_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.projects_url)
+        self.assertEqual(len(response.data['results']), 1)
+
+    @override_settings(SOFTDESK_AUTH={'STATELESS_READS': True})
+    def test_stateless_user_is_active_from_its_claim(self):
+        token = LoginSerializer.get_token(self.user).access_token
+        self.assertIs(token['is_active'], True)
+        token['is_active'] = False
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.get(self.projects_url)
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(SOFTDESK_AUTH={'STATELESS_READS': True})
+    def test_stateless_token_needs_a_user_id(self):
+        token = RefreshToken().access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.get(self.projects_url)
+        self.assertEqual(response.status_code, 401)
+
+
+def hashing(algorithm, **costs):
+    """Settings of a password hashing policy, with cheap default costs."""
+    return override_settings(
+        SOFTDESK_PASSWORD_HASHING={'ALGORITHM': algorithm,
+                                   'PBKDF2_ITERATIONS': 1000,
+                                   'SCRYPT_WORK_FACTOR': 2 ** 10, **costs},
+        PASSWORD_HASHERS=password_hashers(algorithm),
+    )
+
+
+class TokenTests(APITestCase):
+    """Tests for the login, token renewal and password hashing policy."""
+    def setUp(self):
+        caches['throttle'].clear()
+        with hashing('pbkdf2_sha256'):
+            self.user = User.objects.create_user('yoan',
+                                                 password='test-test1')
+
+    def login(self):
+        response = self.client.post('/login/', {'username': 'yoan',
+                                                'password': 'test-test1'})
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        return response.data
+
+    def test_refresh_and_verify_skip_the_password(self):
+        with hashing('pbkdf2_sha256'):
+            tokens = self.login()
+        with mock.patch(
+            'django.contrib.auth.base_user.check_password'
+        ) as check:
+            response = self.client.post('/login/refresh/',
+                                        {'refresh': tokens['refresh']})
+            self.assertEqual(response.status_code, 200)
+            access = response.data['access']
+            response = self.client.post('/login/verify/', {'token': access})
+            self.assertEqual(response.status_code, 200)
+        check.assert_not_called()
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(self.client.get('/projects/').status_code, 200)
+        response = self.client.post('/login/verify/', {'token': 'invalid'})
+        self.assertEqual(response.status_code, 401)
+
+    def test_login_rehashes_with_the_policy_algorithm(self):
+        with hashing('scrypt'):
+            self.login()
+            self.assertTrue(self.user.password.startswith('scrypt$1024$'))
+            password = self.user.password
+            self.login()
+            self.assertEqual(self.user.password, password)
+
+            response = self.client.post('/signup/', {
+                'username': 'luc', 'first_name': 'Luc', 'last_name': 'L',
+                'email': 'luc@example.com', 'password': 'test/test2',
+            })
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(User.objects.get(username='luc').password
+                            .startswith('scrypt$'))
+
+    def test_settings_list_the_policy_hasher_first(self):
+        algorithm = settings.SOFTDESK_PASSWORD_HASHING['ALGORITHM']
+        self.assertEqual(settings.PASSWORD_HASHERS,
+                         password_hashers(algorithm))
+
+    def test_login_rehashes_with_the_policy_cost(self):
+        with hashing('pbkdf2_sha256', PBKDF2_ITERATIONS=2000):
+            self.login()
+        self.assertTrue(
+            self.user.password.startswith('pbkdf2_sha256$2000$')
+        )
+
+
+@override_settings(SOFTDESK_THROTTLING={
+    'CACHE_ALIAS': 'throttle',
+    'SCOPES': {'reads': {'BURST': 3, 'RATE': 0.001},
+               'auth': {'BURST': 1, 'RATE': 0.001}},
+    'MAX_IN_FLIGHT': 1,
+})
+class ThrottlingTests(SoftDeskTestCase):
+    """Tests for the token buckets and the in-flight limit."""
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.project_url = f'/projects/{self.project.pk}/'
+
+    def test_bucket_limits_each_user_and_scope(self):
+        for remaining in [2, 1, 0]:
+            response = self.client.get(self.project_url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['RateLimit-Limit'], '3')
+            self.assertEqual(response['RateLimit-Remaining'], str(remaining))
+            self.assertEqual(response['RateLimit-Policy'], '3;w=3000')
+        response = self.client.get(self.project_url)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+        # Writes aren't limited, nor are other users' reads.
+        response = self.client.patch(f'{self.project_url}issues/'
+                                     f'{self.issue.pk}/', {'priority':
+                                                           Issue.HIGH})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('RateLimit-Limit', response)
+        Contributor.objects.create(user_id=self.other,
+                                   project_id=self.project,
+                                   role='contributor')
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(self.project_url).status_code, 200)
+
+    def test_check_costs_one_cache_round_trip(self):
+        request = RequestFactory().get(self.project_url)
+        request.user = self.user
+        throttle_cache = caches['throttle']
+        # The start of a window of the reads bucket below.
+        now = 30.0 * 60000000
+        with override_settings(SOFTDESK_THROTTLING={
+                    'CACHE_ALIAS': 'throttle',
+                    'SCOPES': {'reads': {'BURST': 600, 'RATE': 20}},
+                }), mock.patch('time.time', lambda: now), \
+                mock.patch.object(throttle_cache, 'incr',
+                                  wraps=throttle_cache.incr) as incr, \
+                mock.patch.object(throttle_cache, 'add',
+                                  wraps=throttle_cache.add) as add, \
+                mock.patch.object(throttle_cache, 'set') as set_, \
+                mock.patch.object(throttle_cache, 'get') as get, \
+                mock.patch.object(throttle_cache, 'decr') as decr:
+            # A request a second, well within the rate.
+            for _ in range(10):
+                now += 1
+                self.assertIsNone(take_token(request, None)[1])
+        self.assertEqual(incr.call_count, 10)
+        # Only the first request of the window creates its counter.
+        self.assertEqual(add.call_count, 1)
+        set_.assert_not_called()
+        get.assert_not_called()
+        decr.assert_not_called()
+
+    def test_bucket_sustains_its_rate(self):
+        request = RequestFactory().get(self.project_url)
+        request.user = self.user
+        scopes = {'reads': {'BURST': 3, 'RATE': 1}}
+        # The start of a window of 3 s.
+        now = 3.0 * 600000000
+        passed = 0
+        with override_settings(SOFTDESK_THROTTLING={
+                    'CACHE_ALIAS': 'throttle', 'SCOPES': scopes
+                }), mock.patch('time.time', lambda: now):
+            # A request every 50 ms for 100 s: 3 in each of 34 windows.
+            for _ in range(2000):
+                now += 0.05
+                passed += take_token(request, None)[1] is None
+            self.assertEqual(passed, 3 * 34)
+            # An idle bucket is full again.
+            now += 10
+            for remaining in [2, 1, 0]:
+                rate_limit, retry_after = take_token(request, None)
+                self.assertIsNone(retry_after)
+                self.assertEqual(rate_limit.remaining, remaining)
+            rate_limit, retry_after = take_token(request, None)
+            self.assertEqual(rate_limit.remaining, 0)
+            self.assertEqual(retry_after, rate_limit.reset)
+
+    def test_throttles_run_before_permissions(self):
+        for _ in range(3):
+            self.client.get(self.project_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(f'{self.project_url}issues/')
+        self.assertEqual(response.status_code, 429)
+
+        # A client without permission spends its bucket too.
+        self.client.force_authenticate(self.other)
+        for _ in range(3):
+            response = self.client.get(f'{self.project_url}issues/')
+            self.assertEqual(response.status_code, 403)
+        response = self.client.get(f'{self.project_url}issues/')
+        self.assertEqual(response.status_code, 429)
+
+    def test_anonymous_requests_spend_the_auth_bucket(self):
+        self.client.force_authenticate(None)
+        data = {'username': 'yoan', 'password': 'wrong'}
+        self.assertEqual(self.client.post('/login/', data).status_code, 401)
+        response = self.client.post('/login/', data)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_in_flight_exports_are_capped(self):
+        url = f'{self.project_url}export/'
+        with override_settings(SOFTDESK_THROTTLING={'MAX_IN_FLIGHT': 1}):
+            streaming = self.client.get(url)
+            self.assertEqual(self.client.get(url).status_code, 429)
+            # Released once the first body is sent.
+            b''.join(streaming.streaming_content)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            b''.join(response.streaming_content)
+
+    def test_async_views_are_throttled(self):
+        token = LoginSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        for _ in range(3):
+            response = self.client.get(f'/async{self.project_url}')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['RateLimit-Remaining'], '0')
+        response = self.client.get(f'/async{self.project_url}')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+
+class SummaryTests(SoftDeskTestCase):
+    """Tests for the project summary counters."""
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.summary_url = f'/projects/{self.project.pk}/summary/'
+        self.bulk_url = f'/projects/{self.project.pk}/issues/bulk/'
+
+    def summary(self):
+        return self.client.get(self.summary_url).data
+
+    def test_summary_is_a_single_row_read(self):
+        self.client.get(self.summary_url)
+        with self.assertNumQueries(2):
+            data = self.summary()
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['status'][Issue.TODO], 1)
+        self.assertEqual(data['tag'], {Issue.BUG: 1, Issue.IMPROVEMENT: 0,
+                                       Issue.TASK: 0})
+
+    def test_counters_follow_issue_changes(self):
+        self.issue.status = Issue.FINISHED
+        self.issue.save()
+        Issue.objects.get(pk=self.issue.pk).delete()
+        Issue.objects.create(title='Issue', desc='Desc', tag=Issue.TASK,
+                             priority=Issue.HIGH, project_id=self.project,
+                             status=Issue.INPROGRESS, author_user_id=self.user,
+                             assignee_user_id=self.user)
+        data = self.summary()
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['status'], {Issue.TODO: 0, Issue.INPROGRESS: 1,
+                                          Issue.FINISHED: 0})
+        self.assertEqual(data['priority'][Issue.HIGH], 1)
+
+    def test_counters_follow_bulk_changes(self):
+        items = [{'title': 'Bulk', 'desc': 'Bulk', 'tag': Issue.TASK,
+                  'priority': Issue.MEDIUM, 'status': Issue.TODO}] * 3
+        created = self.client.post(self.bulk_url, items, format='json').data
+        self.client.put(self.bulk_url, [{'id': created[0]['id'],
+                                         'status': Issue.FINISHED}],
+                        format='json')
+        self.client.delete(self.bulk_url, [self.issue.pk, created[1]['id']],
+                           format='json')
+        data = self.summary()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(data['status'], {Issue.TODO: 1, Issue.INPROGRESS: 0,
+                                          Issue.FINISHED: 1})
+        self.assertEqual(data['tag'][Issue.BUG], 0)
+
+    def test_recompute_command_repairs_drifted_counters(self):
+        ProjectSummary.objects.filter(project_id=self.project).update(total=5)
+        with self.assertRaises(CommandError):
+            call_command('recompute_summaries', '--check',
+                         stdout=io.StringIO(), stderr=io.StringIO())
+        call_command('recompute_summaries', stdout=io.StringIO(),
+                     stderr=io.StringIO())
+        self.assertEqual(self.summary()['total'], 1)
+        call_command('recompute_summaries', '--check', stdout=io.StringIO())
+
+    def test_missing_summary_is_built_on_read(self):
+        ProjectSummary.objects.all().delete()
+        self.assertEqual(self.summary()['status'][Issue.TODO], 1)
+
+
+class CommentColumnTests(SoftDeskTestCase):
+    """Tests for the comment columns of the issues."""
+    def setUp(self):
+        super().setUp()
+        Contributor.objects.create(user_id=self.other,
+                                   project_id=self.project,
+                                   role='contributor')
+        self.list_url = f'/projects/{self.project.pk}/issues/'
+        self.comments_url = (f'/projects/{self.project.pk}/issues/'
+                             f'{self.issue.pk}/comments/')
+
+    def listed_issue(self, **params):
+        return self.client.get(self.list_url, params).data['results'][0]
+
+    def test_columns_follow_comment_writes(self):
+        self.client.force_authenticate(self.user)
+        # Cached by the response cache, which the comments must refresh.
+        self.assertEqual(self.listed_issue()['comment_count'], 1)
+
+        self.client.force_authenticate(self.other)
+        created = self.client.post(self.comments_url, {'description': 'New'},
+                                   format='json').data
+        issue = self.listed_issue()
+        self.assertEqual(issue['comment_count'], 2)
+        self.assertEqual(issue['last_comment_author'], self.other.pk)
+        self.assertEqual(issue['last_comment_time'], created['created_time'])
+
+        self.client.delete(f"{self.comments_url}{created['comment_id']}/")
+        issue = self.listed_issue(expand='last_comment_author')
+        self.assertEqual(issue['comment_count'], 1)
+        self.assertEqual(issue['last_comment_author']['username'], 'yoan')
+
+    def test_columns_follow_bulk_writes(self):
+        self.client.force_authenticate(self.other)
+        bulk_url = f'{self.comments_url}bulk/'
+        created = self.client.post(bulk_url, [{'description': 'One'},
+                                              {'description': 'Two'}],
+                                   format='json').data
+        self.assertEqual(self.listed_issue()['comment_count'], 3)
+        self.client.delete(bulk_url, [comment['comment_id']
+                                      for comment in created], format='json')
+        issue = Issue.objects.get(pk=self.issue.pk)
+        self.assertEqual(issue.comment_count, 1)
+        self.assertEqual(issue.last_comment_author_id, self.user.pk)
+
+    def test_issue_list_sorts_by_last_activity(self):
+        later = Issue.objects.create(title='Later', desc='', tag=Issue.BUG,
+                                     priority=Issue.LOW,
+                                     project_id=self.project,
+                                     status=Issue.TODO,
+                                     author_user_id=self.user,
+                                     assignee_user_id=self.user)
+        self.client.force_authenticate(self.user)
+        ordering = {'ordering': '-last_activity_time'}
+        self.assertEqual(self.listed_issue(**ordering)['id'], later.pk)
+        self.client.post(self.comments_url, {'description': 'New'},
+                         format='json')
+        self.assertEqual(self.listed_issue(**ordering)['id'], self.issue.pk)
+
+    def test_bulk_issue_edits_move_the_last_activity(self):
+        self.client.force_authenticate(self.user)
+        before = Issue.objects.get(pk=self.issue.pk).last_activity_time
+        response = self.client.put(
+            f'/projects/{self.project.pk}/issues/bulk/',
+            [{'id': self.issue.pk, 'title': 'Renamed'}], format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        issue = Issue.objects.get(pk=self.issue.pk)
+        self.assertEqual(issue.title, 'Renamed')
+        self.assertGreater(issue.last_activity_time, before)
+        self.assertGreater(issue.updated_time, before)
+
+    def test_seeded_issues_count_their_comments(self):
+        _, projects = seed(users=2, projects=1, issues=3, comments=4)
+        issues = Issue.objects.filter(project_id=projects[0])
+        self.assertEqual(set(issues.values_list('comment_count', flat=True)),
+                         {4})
+
+
+class WriteTests(SoftDeskTestCase):
+    """Tests for the single issue and comment writes."""
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.issue_url = (f'/projects/{self.project.pk}/issues/'
+                          f'{self.issue.pk}/')
+
+    def test_patch_writes_only_the_changed_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.issue_url,
+                                         {'priority': Issue.HIGH},
+                                         format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'Issue')
+        update = next(query['sql'] for query in queries
+                      if query['sql'].startswith('UPDATE "api_issue"'))
+        self.assertIn('"priority"', update)
+        self.assertNotIn('"title"', update)
+        # The search index only holds the title and the description.
+        self.assertFalse(any('api_search' in query['sql']
+                             for query in queries))
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.priority, Issue.HIGH)
+
+    def test_patch_validates_the_given_fields(self):
+        response = self.client.patch(self.url, {'description': ''},
+                                     format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(self.url, {'description': 'Edited'},
+                                     format='json')
+        self.assertEqual(response.data['description'], 'Edited')
+
+    def test_patch_is_reserved_to_the_author(self):
+        Contributor.objects.create(user_id=self.other, project_id=self.project,
+                                   role='contributor')
+        self.client.force_authenticate(self.other)
+        response = self.client.patch(self.issue_url, {'status': Issue.TODO},
+                                     format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_assignee_must_be_a_contributor(self):
+        url = f'/projects/{self.project.pk}/issues/'
+        data = {'title': 'Issue', 'desc': 'Desc', 'tag': Issue.BUG,
+                'priority': Issue.LOW, 'status': Issue.TODO,
+                'assignee_user_id': self.other.pk}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, 400)
+        Contributor.objects.create(user_id=self.other, project_id=self.project,
+                                   role='contributor')
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.data['assignee_user_id'], self.other.pk)
+        self.assertEqual(response.data['author_user_id'], self.user.pk)
+
+
+class ConcurrentWriteTests(SoftDeskTestCase):
+    """Tests for an edit racing another writer of the same issue."""
+    def test_edit_applies_over_a_concurrent_write(self):
+        url = f'/projects/{self.project.pk}/issues/{self.issue.pk}/'
+        load = views.get_project_context
+
+        def load_then_race(request, view):
+            # The request read the issue, then another writer commits.
+            context = load(request, view)
+            issue = Issue.objects.get(pk=self.issue.pk)
+            issue.title = 'Raced'
+            issue.status = Issue.FINISHED
+            issue.save()
+            return context
+
+        self.client.force_authenticate(self.user)
+        with mock.patch.object(views, 'get_project_context', load_then_race):
+            response = self.client.patch(url, {'status': Issue.INPROGRESS},
+                                         format='json')
+        self.assertEqual(response.status_code, 200)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.title, 'Raced')
+        self.assertEqual(self.issue.status, Issue.INPROGRESS)
+        summary = ProjectSummary.objects.values().get(project_id=self.project)
+        del summary['project_id_id']
+        self.assertEqual(summary, summary_counts(self.project.pk))
+
+
+class DeletionTests(SoftDeskTestCase):
+    """Tests for the set-based deletion of projects and issues."""
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.project_url = f'/projects/{self.project.pk}/'
+        for _ in range(4):
+            issue = Issue.objects.create(title='Issue', desc='',
+                                         tag=Issue.TASK, priority=Issue.LOW,
+                                         project_id=self.project,
+                                         status=Issue.TODO,
+                                         author_user_id=self.user,
+                                         assignee_user_id=self.user)
+            Comment.objects.create(description='Comment',
+                                   author_user_id=self.user, issue_id=issue)
+
+    def index_rows(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM api_search '
+                           'WHERE project_id = %s', [self.project.pk])
+            return cursor.fetchone()[0]
+
+    @override_settings(SOFTDESK_DELETION={'BATCH_SIZE': 2})
+    def test_project_delete_removes_every_row_by_batches(self):
+        self.client.get(self.project_url)
+        response = self.client.delete(self.project_url)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+        for model in (Contributor, Issue, ProjectSummary):
+            self.assertFalse(model.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(self.index_rows(), 0)
+        self.assertEqual(self.client.get(self.project_url).status_code, 404)
+
+    @override_settings(SOFTDESK_DELETION={'SOFT_DELETE': True})
+    def test_soft_deleted_project_is_hidden_until_purged(self):
+        response = self.client.delete(self.project_url)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get(self.project_url).status_code, 404)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.get('/projects/').data['results'], [])
+        self.assertEqual(Issue.objects.count(), 5)
+
+        call_command('purge_deleted_projects', stdout=io.StringIO())
+        self.assertFalse(Project.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(self.index_rows(), 0)
+
+    def test_issue_delete_updates_counters_and_index(self):
+        comment = Comment.objects.create(description='Other',
+                                         author_user_id=self.user,
+                                         issue_id=self.issue)
+        version = Project.objects.get(pk=self.project.pk).version
+        with self.assertNumQueries(8):
+            response = self.client.delete(
+                f'{self.project_url}issues/{self.issue.pk}/'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Comment.objects.filter(pk=comment.pk).exists())
+        summary = ProjectSummary.objects.get(project_id=self.project)
+        self.assertEqual((summary.total, summary.tag_bug), (4, 0))
+        self.assertEqual(self.index_rows(), 8)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.version, version + 1)
+
+
+class SearchTests(SoftDeskTestCase):
+    """Tests for the full-text search."""
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.other_project = Project.objects.create(
+            title='Other', description='', type=Project.BACKEND,
+            author_user_id=self.other
+        )
+        Issue.objects.create(title='Crash hidden', desc='Secret crash',
+                             tag=Issue.BUG, priority=Issue.LOW,
+                             project_id=self.other_project, status=Issue.TODO,
+                             author_user_id=self.other,
+                             assignee_user_id=self.other)
+
+    def search(self, query):
+        return self.client.get('/search/', {'q': query}).data
+
+    def test_results_are_ranked_and_limited_to_memberships(self):
+        self.issue.title = 'Crash at startup'
+        self.issue.save()
+        Comment.objects.create(description='Still a crash, sometimes',
+                               author_user_id=self.user, issue_id=self.issue)
+        results = self.search('crash')
+        self.assertEqual([(r['kind'], r['project_id']) for r in results],
+                         [('issue', self.project.pk),
+                          ('comment', self.project.pk)])
+        self.assertIn('[Crash]', results[0]['snippet'])
+
+    def test_index_follows_changes(self):
+        self.assertEqual(len(self.search('comment')), 1)
+        self.comment.description = 'Reworded'
+        self.comment.save()
+        self.assertEqual(self.search('comment'), [])
+        self.assertEqual(self.search('reworded')[0]['id'], self.comment.pk)
+        self.issue.delete()
+        self.assertEqual(self.search('reworded'), [])
+
+    def test_bulk_comments_are_indexed(self):
+        url = (f'/projects/{self.project.pk}/issues/{self.issue.pk}'
+               f'/comments/bulk/')
+        self.client.post(url, [{'description': 'Imported note'}],
+                         format='json')
+        self.assertEqual(self.search('imported')[0]['issue_id'],
+                         self.issue.pk)
+
+    def test_search_syntax_is_ignored(self):
+        self.assertEqual(len(self.search('comment*) -')), 1)
+        response = self.client.get('/search/', {'q': '"*'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AsyncViewTests(SoftDeskTestCase):
+    """Tests for the async read endpoints."""
+    def setUp(self):
+        super().setUp()
+        token = LoginSerializer.get_token(self.user).access_token
+        self.token = f'Bearer {token}'
+        self.client.force_authenticate(self.user)
+
+    async def aget(self, url, **headers):
+        return await AsyncClient().get(
+            url, headers={'Authorization': self.token, **headers}
+        )
+
+    async def test_responses_match_the_sync_views(self):
+        p_url = f'/projects/{self.project.pk}/'
+        for url in ['projects/', f'{p_url[1:]}issues/?expand=author',
+                    f'{p_url[1:]}issues/?fields=title,status',
+                    f'{p_url[1:]}users/?fields=username', self.url[1:],
+                    self.url[1:].rsplit('/', 2)[0] + '/']:
+            response = await self.aget(f'/async/{url}')
+            expected = await sync_to_async(self.client.get)(f'/{url}')
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(response.json(), expected.json(), url)
+
+    async def test_project_detail_and_conditional_get(self):
+        url = f'/async/projects/{self.project.pk}/'
+        response = await self.aget(url)
+        self.assertEqual(response.json()['title'], 'Project')
+        etag = response['ETag']
+        response = await self.aget(url, **{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_errors(self):
+        response = await AsyncClient().get('/async/projects/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response)
+
+        response = await self.aget(
+            f'/async/projects/{self.project.pk}/issues/0/comments/'
+        )
+        self.assertEqual(response.status_code, 404)
+
+        project = await Project.objects.acreate(
+            title='Other', description='', type=Project.BACKEND,
+            author_user_id=self.other
+        )
+        response = await self.aget(
+            f'/async/projects/{project.pk}/issues/'
+        )
+        self.assertEqual(response.status_code, 403)
+
+        response = await self.aget(
+            f'/async/projects/{self.project.pk}/issues/?ordering=desc'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class FastRenderingTests(SoftDeskTestCase):
+    """Tests for the values() plans and the orjson renderer."""
+    def assertSameBytes(self, serializer, queryset, expand=()):
+        kwargs = {'expand': expand} if expand else {}
+        expected = renderers.JSONRenderer().render(
+            serializer(queryset, many=True, **kwargs).data
+        )
+        plan = serializer.values_plan(expand)
+        rendered = JSONRenderer().render(plan.data(plan.values(queryset)))
+        self.assertEqual(rendered, expected)
+
+    def test_plans_give_the_serializers_bytes(self):
+        Comment.objects.create(description='Ligne\u2028été "cité"',
+                               author_user_id=self.other,
+                               issue_id=self.issue)
+        issues = Issue.objects.order_by('id')
+        for expand in [(), ('author',), ('author', 'assignee', 'project')]:
+            self.assertSameBytes(IssueSerializer, issues, expand)
+        comments = Comment.objects.order_by('comment_id')
+        for expand in [(), ('author', 'issue')]:
+            self.assertSameBytes(CommentSerializer, comments, expand)
+        self.assertSameBytes(ProjectSerializer, Project.objects.all())
+        self.assertSameBytes(UserSerializer, User.objects.order_by('id'))
+
+    def test_renderer_gives_drf_bytes(self):
+        data = {
+            'text': 'é\u2028\u2029', 'time': timezone.now(),
+            'date': timezone.now().date(), 'lazy': gettext_lazy('Issue'),
+            'big': 2 ** 70, 'keys': {1: 'int'}, 'list': [None, True, 1],
+        }
+        for key, value in data.items():
+            self.assertEqual(JSONRenderer().render({key: value}),
+                             renderers.JSONRenderer().render({key: value}),
+                             key)
+        self.assertEqual(JSONRenderer().render(None), b'')
+
+    def test_plans_are_cached_once_per_expansion(self):
+        self.client.force_authenticate(self.user)
+        url = f'/projects/{self.project.pk}/issues/'
+        self.client.get(url, {'expand': 'author,assignee'})
+        size = IssueSerializer._values_plan.cache_info().currsize
+        for expand in ('assignee,author', 'author,assignee,author,,'):
+            response = self.client.get(url, {'expand': expand})
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(IssueSerializer._values_plan.cache_info().currsize,
+                         size)
+
+
+class SparseFieldsetTests(SoftDeskTestCase):
+    """Tests for the fields query parameter."""
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.issues_url = f'/projects/{self.project.pk}/issues/'
+        for i in range(3):
+            Issue.objects.create(title=f'Issue {i}', desc='x' * 1000,
+                                 tag=Issue.BUG, priority=Issue.LOW,
+                                 project_id=self.project, status=Issue.TODO,
+                                 author_user_id=self.user,
+                                 assignee_user_id=self.user)
+
+    def test_list_selects_and_returns_only_the_fields(self):
+        full = self.client.get(self.issues_url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.issues_url, {
+                'fields': 'id,title,status,priority',
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [list(issue) for issue in response.data['results']],
+            [['id', 'title', 'priority', 'status']] * 4
+        )
+        self.assertLess(len(response.content), len(full.content) / 4)
+
+        select = [q['sql'] for q in queries.captured_queries
+                  if 'FROM "api_issue"' in q['sql']][-1]
+        columns = select.split(' FROM ')[0]
+        self.assertIn('"api_issue"."title"', columns)
+        self.assertNotIn('"api_issue"."desc"', columns)
+        self.assertNotIn('"api_issue"."tag"', columns)
+
+    def test_pages_follow_without_the_sort_key_field(self):
+        response = self.client.get(self.issues_url, {'fields': 'title',
+                                                     'page_size': 2})
+        self.assertEqual(response.data['results'][0], {'title': 'Issue'})
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'],
+                         [{'title': 'Issue 1'}, {'title': 'Issue 2'}])
+
+        response = self.client.get('/projects/', {'fields': 'title'})
+        self.assertEqual(response.data['results'], [{'title': 'Project'}])
+
+    def test_detail_and_expanded_fields(self):
+        response = self.client.get(self.url, {'fields': 'description'})
+        self.assertEqual(response.data, {'description': 'Comment'})
+        response = self.client.get(f'{self.url[:-1].rsplit("/", 1)[0]}/', {
+            'fields': 'comment_id,author_user_id', 'expand': 'author',
+        })
+        self.assertEqual(response.data, [{
+            'comment_id': self.comment.pk,
+            'author_user_id': {'id': self.user.pk, 'username': 'yoan',
+                               'first_name': '', 'last_name': '',
+                               'email': ''},
+        }])
+        response = self.client.get(f'/projects/{self.project.pk}/',
+                                   {'fields': 'type'})
+        self.assertEqual(response.data, {'type': Project.BACKEND})
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(self.issues_url,
+                                   {'fields': 'title,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['fields'], 'Unknown fields: secret.')
+
+    def test_repeated_fields_share_a_cached_plan(self):
+        self.client.get(self.issues_url, {'fields': 'id,title'})
+        size = IssueSerializer._values_plan.cache_info().currsize
+        for count in range(2, 50):
+            fields = ','.join(['title'] * count + ['id'])
+            response = self.client.get(self.issues_url, {'fields': fields})
+            self.assertEqual(list(response.data['results'][0]),
+                             ['id', 'title'])
+        self.assertEqual(IssueSerializer._values_plan.cache_info().currsize,
+                         size)
+
+
+class ChangeFeedTests(SoftDeskTestCase):
+    """Tests for the change log and its feed."""
+    def setUp(self):
+        super().setUp()
+        token = LoginSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.feed_url = f'/projects/{self.project.pk}/changes/'
+        self.issue_url = f'/projects/{self.project.pk}/issues/'
+
+    def changes(self, since, **params):
+        response = self.client.get(self.feed_url, {'since': since, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_comment_changes_update_their_issue(self):
+        cursor = self.client.get(self.feed_url).json()['cursor']
+        self.client.post(f'{self.issue_url}{self.issue.pk}/comments/',
+                         {'description': 'New'}, format='json')
+        changes = self.changes(cursor)['changes']
+        issue = next(change for change in changes
+                     if change['kind'] == Change.ISSUE)
+        self.assertEqual(issue['action'], Change.UPDATED)
+        self.assertEqual(issue['data']['comment_count'], 2)
+
+    def test_feed_returns_the_last_change_of_each_object(self):
+        cursor = self.client.get(self.feed_url).json()['cursor']
+        self.assertEqual(cursor, Change.objects.latest('id').id)
+
+        response = self.client.post(self.issue_url, {
+            'title': 'New', 'desc': 'New', 'tag': Issue.BUG,
+            'priority': Issue.LOW, 'status': Issue.TODO,
+        }, format='json')
+        issue_id = response.data['id']
+        self.client.patch(f'{self.issue_url}{issue_id}/',
+                          {'priority': Issue.HIGH}, format='json')
+        self.client.delete(f'{self.issue_url}{self.issue.pk}/')
+
+        page = self.changes(cursor)
+        entries = {(c['kind'], c['id']): c for c in page['changes']}
+        self.assertEqual(len(entries), len(page['changes']))
+        self.assertEqual(entries[(Change.ISSUE, issue_id)]['action'],
+                         Change.UPDATED)
+        self.assertEqual(entries[(Change.ISSUE, issue_id)]['data']['priority'],
+                         Issue.HIGH)
+        deleted = entries[(Change.ISSUE, self.issue.pk)]
+        self.assertEqual((deleted['action'], deleted['data']),
+                         (Change.DELETED, None))
+        self.assertEqual(
+            entries[(Change.COMMENT, self.comment.pk)]['action'],
+            Change.DELETED
+        )
+        self.assertFalse(page['more'])
+
+        # Caught up: nothing more, and the same cursor back.
+        self.assertEqual(self.changes(page['cursor'], wait=0.1),
+                         {'changes': [], 'more': False,
+                          'cursor': page['cursor']})
+
+    def test_feed_pages_follow_the_cursor(self):
+        cursor = self.client.get(self.feed_url).json()['cursor']
+        self.client.post(f'{self.issue_url}bulk/', [{
+            'title': 'Bulk', 'desc': 'Bulk', 'tag': Issue.BUG,
+            'priority': Issue.LOW, 'status': Issue.TODO,
+        } for _ in range(5)], format='json')
+        seen = []
+        with override_settings(SOFTDESK_CHANGES={'PAGE_SIZE': 2}):
+            while True:
+                page = self.changes(cursor)
+                seen += [change['id'] for change in page['changes']]
+                cursor = page['cursor']
+                if not page['more']:
+                    break
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_compaction_keeps_the_latest_changes(self):
+        cursor = self.client.get(self.feed_url).json()['cursor']
+        for priority in [Issue.MEDIUM, Issue.HIGH]:
+            self.client.patch(f'{self.issue_url}{self.issue.pk}/',
+                              {'priority': priority}, format='json')
+        call_command('compact_changes', stdout=io.StringIO())
+        self.assertEqual(Change.objects.filter(
+            kind=Change.ISSUE, object_id=self.issue.pk
+        ).count(), 1)
+        self.assertEqual(len(self.changes(cursor)['changes']), 1)
+
+        call_command('compact_changes', '--retention-days', '0',
+                     stdout=io.StringIO())
+        self.assertFalse(Change.objects.exists())
+        response = self.client.get(self.feed_url, {'since': cursor})
+        self.assertEqual(response.status_code, 410)
+        horizon = self.client.get(self.feed_url).json()['cursor']
+        self.assertEqual(self.changes(horizon)['changes'], [])
+
+    def test_errors(self):
+        response = self.client.get(self.feed_url, {'since': 'x'})
+        self.assertEqual(response.status_code, 400)
+        for wait in ('nan', 'inf', '-inf'):
+            response = self.client.get(self.feed_url,
+                                       {'since': 0, 'wait': wait})
+            self.assertEqual(response.status_code, 400)
+        # A negative wait doesn't wait.
+        start = time.monotonic()
+        response = self.client.get(self.feed_url, {'since': 10 ** 9,
+                                                   'wait': -5})
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(time.monotonic() - start, 1)
+
+        project = Project.objects.create(title='Other', description='',
+                                         type=Project.BACKEND,
+                                         author_user_id=self.other)
+        response = self.client.get(f'/projects/{project.pk}/changes/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_project_delete_removes_its_changes(self):
+        self.client.force_authenticate(self.user)
+        self.client.delete(f'/projects/{self.project.pk}/')
+        self.assertFalse(Change.objects.exists())
+
+
+class ReplicaRouterTests(APITestCase):
+    """Tests for the routing of safe requests' reads to the replica."""
+    def route(self, method):
+        def view(request):
+            return HttpResponse(ReplicaRouter().db_for_read(Issue) or '')
+
+        request = getattr(RequestFactory(), method)('/')
+        return read_replica_middleware(view)(request).content.decode()
+
+    def test_safe_requests_read_from_the_replica(self):
+        with mock.patch.dict(settings.DATABASES, {'replica': {}}):
+            self.assertEqual(self.route('get'), 'replica')
+            self.assertEqual(self.route('post'), '')
+        self.assertEqual(self.route('get'), '')
+        self.assertIsNone(ReplicaRouter().db_for_read(Issue))
+
+
+class InstrumentationTests(SoftDeskTestCase):
+    """Tests for the request instrumentation."""
+    def setUp(self):
+        super().setUp()
+        route_metrics.clear()
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_counts_queries(self):
+        response = self.client.get(self.url)
+        timing = response['Server-Timing']
+        for phase in ('db;dur=', 'perm;dur=', 'ser;dur=', 'total;dur='):
+            self.assertIn(phase, timing)
+        self.assertIn('desc="1 queries"', timing)
+
+    @override_settings(SOFTDESK_INSTRUMENTATION={'METRICS_TOKEN': 'secret'})
+    def test_metrics_are_protected_and_per_route(self):
+        self.client.get(self.url)
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+
+        response = self.client.get('/metrics/',
+                                   HTTP_AUTHORIZATION='Bearer secret')
+        text = response.content.decode()
+        route = ('method="GET",route="projects/<int:p_id>/issues/<int:i_id>'
+                 '/comments/<int:pk>/"')
+        self.assertIn(f'softdesk_request_queries{{{route},quantile="0.99"}} '
+                      f'1', text)
+        self.assertIn(f'softdesk_request_duration_seconds_count{{{route}}} 1',
+                      text)
+        self.assertIn('softdesk_membership_cache_misses_total 1', text)
+
+    @override_settings(SOFTDESK_INSTRUMENTATION={'SLOW_QUERY_MS': 0})
+    def test_slow_queries_name_their_issuer(self):
+        with self.assertLogs('api.slow_queries') as logs:
+            self.client.get(self.url)
+        self.assertTrue(all('CanReadOrEditComment' in line
+                            for line in logs.output))
+
+
+@override_settings(SOFTDESK_INSTRUMENTATION={'METRICS_TOKEN': 'secret'})
+class QueryCountTests(APITestCase):
+    """Query counts of every endpoint, which must not grow with the data."""
+    # Upper bounds, with cold caches. Bulk requests send three items.
+    MAX_QUERIES = {
+        'api root': 1, 'login': 1, 'token refresh': 1, 'token verify': 0,
+        'signup': 3, 'search': 2, 'metrics': 0,
+        'project list': 2, 'project create': 5, 'project retrieve': 3,
+        'project update': 7, 'project delete': 15, 'project export': 6,
+        'project summary': 4, 'project changes': 7,
+        'user list': 4, 'user add': 8, 'user remove': 6, 'user bulk add': 9,
+        'user bulk remove': 9,
+        'issue list': 4, 'issue list by activity': 4, 'issue create': 9,
+        'issue update': 7, 'issue patch': 7, 'issue bulk create': 12,
+        'issue bulk update': 12, 'issue bulk delete': 21, 'issue delete': 10,
+        'comment list': 4, 'comment create': 9, 'comment retrieve': 3,
+        'comment update': 9, 'comment patch': 9, 'comment bulk create': 11,
+        'comment bulk update': 12, 'comment bulk delete': 14,
+        'comment delete': 7,
+        'async project list': 2, 'async project retrieve': 3,
+        'async user list': 4, 'async issue list': 4, 'async comment list': 4,
+        'async comment retrieve': 3,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users, projects = seed(users=10, projects=2, issues=20,
+                                   comments=2)
+        cls.project = projects[0]
+        cls.author = cls.project.author_user_id
+
+    def count_queries(self):
+        counts = {}
+        for endpoint in endpoints(self.project, self.author):
+            membership_cache.clear()
+            caches['throttle'].clear()
+            response_cache.clear()
+            cache.clear()
+            send = getattr(self.client, endpoint.method)
+            json_body = {} if endpoint.method == 'get' else {'format': 'json'}
+            with CaptureQueriesContext(connection) as queries:
+                response = send(endpoint.path, endpoint.data, **json_body,
+                                **endpoint.headers)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            self.assertLess(response.status_code, 400, endpoint.name)
+            counts[endpoint.name] = len(queries)
+        return counts
+
+    def test_query_counts_are_bounded_and_flat(self):
+        small = self.count_queries()
+        seed_issues([self.project], self.users, issues=300, comments=5)
+        Contributor.objects.bulk_create(
+            Contributor(user_id=user, project_id=self.project,
+                        role='contributor')
+            for user in User.objects.bulk_create(
+                User(username=f'member{i}') for i in range(50)
+            )
+        )
+        large = self.count_queries()
+        self.assertEqual(large, small)
+        for name, count in small.items():
+            with self.subTest(name):
+                self.assertLessEqual(count, self.MAX_QUERIES[name])
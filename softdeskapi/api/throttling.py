@@ -0,0 +1,199 @@
+import math
+import time
+from collections import namedtuple
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_CONFIG = {
+    # Cache holding the counters, whose incr must be atomic: local memory,
+    # Redis or Memcached, not the database cache.
+    'CACHE_ALIAS': 'default',
+    # Budget of each scope: BURST requests in each window of BURST / RATE
+    # seconds, which sustains RATE requests per second. A scope left out
+    # isn't limited.
+    'SCOPES': {},
+    # In-flight requests of a client to the expensive views, None for no
+    # limit. A count left by a killed worker expires after TIMEOUT.
+    'MAX_IN_FLIGHT': None,
+    'IN_FLIGHT_TIMEOUT': 300,
+}
+
+# State of the bucket of a request, for the RateLimit headers.
+RateLimit = namedtuple('RateLimit', 'scope limit remaining reset period')
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, 'SOFTDESK_THROTTLING', {})}
+
+
+def client_ident(request):
+    """Authenticated user, or address of an anonymous client."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'addr:{BaseThrottle().get_ident(request)}'
+
+
+def request_scope(request, view):
+    """Scope of a request: its view's throttle_scope, or one by method."""
+    scope = getattr(view, 'throttle_scope', None)
+    if scope:
+        return scope
+    if not client_ident(request).startswith('user:'):
+        # Only the login, signup and token views let anonymous users in.
+        return 'auth'
+    return 'reads' if request.method in SAFE_METHODS else 'writes'
+
+
+def incr(cache, key, timeout, initial=1, delta=1):
+    """Atomic increment creating the key, one round trip once it exists."""
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        if cache.add(key, initial, timeout):
+            return initial
+        return cache.incr(key, delta)
+
+
+def take_token(request, view):
+    """
+    Spend a token of the request's bucket. Return its RateLimit, None if
+    the scope isn't limited, and the seconds to wait for a token, None if
+    one was left.
+    The bucket is refilled at once at the start of each window of BURST /
+    RATE seconds, so a client sustains RATE, but may spend two BURSTs
+    across the end of a window. Each window has a counter of its own, so
+    a check is one atomic incr, plus an add for the first request of a
+    window, and nothing is written back: refused requests only count in
+    the window they're refused in.
+    """
+    config = get_config()
+    scope = request_scope(request, view)
+    bucket = config['SCOPES'].get(scope)
+    if not bucket:
+        return None, None
+
+    burst, rate = bucket['BURST'], bucket['RATE']
+    period = burst / rate
+    now = time.time()
+    window = int(now // period)
+    key = f'throttle:{scope}:{client_ident(request)}:{window}'
+    count = incr(caches[config['CACHE_ALIAS']], key, math.ceil(period))
+
+    reset = max(1, math.ceil((window + 1) * period - now))
+    retry_after = reset if count > burst else None
+    rate_limit = RateLimit(scope, burst, max(0, burst - count), reset,
+                           math.ceil(period))
+    return rate_limit, retry_after
+
+
+def enter(request):
+    """
+    Count an in-flight expensive request of the client. Return the release
+    function to call once it's served, or None if too many are in flight.
+    """
+    config = get_config()
+    if config['MAX_IN_FLIGHT'] is None:
+        return lambda: None
+
+    cache = caches[config['CACHE_ALIAS']]
+    key = f'in-flight:{client_ident(request)}'
+
+    def release():
+        try:
+            cache.decr(key)
+        except ValueError:
+            # Expired meanwhile.
+            pass
+
+    count = incr(cache, key, config['IN_FLIGHT_TIMEOUT'])
+    if count > config['MAX_IN_FLIGHT']:
+        release()
+        return None
+    return release
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle of the scopes' token buckets, per client, with one cache
+    round trip but for the first request of a window. The state of the
+    bucket goes to the RateLimit headers.
+    """
+    def allow_request(self, request, view):
+        rate_limit, self.retry_after = take_token(request, view)
+        request._request.rate_limit = rate_limit
+        return self.retry_after is None
+
+    def wait(self):
+        return self.retry_after
+
+
+class InFlightThrottle(BaseThrottle):
+    """
+    Throttle of the requests a client runs at once on views marked
+    expensive, released when their response is closed. Its counter is a
+    key of its own: an incr, and a decr on release, on top of the bucket.
+    """
+    def allow_request(self, request, view):
+        if not getattr(view, 'expensive', False):
+            return True
+        release = enter(request)
+        if release is None:
+            return False
+        request._request.in_flight_release = release
+        return True
+
+    def wait(self):
+        return 1
+
+
+class ThrottleFirstMixin:
+    """
+    APIView checking its throttles before its permissions: a refused
+    request runs no permission query, and a client without permission is
+    throttled as well. Otherwise APIView.initial.
+    """
+    def initial(self, request, *args, **kwargs):
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+        self.perform_authentication(request)
+        self.check_throttles(request)
+        self.check_permissions(request)
+
+
+def add_headers(request, response):
+    """
+    RateLimit headers of the IETF draft, and the in-flight release when the
+    response is closed, after a streamed body is sent.
+    """
+    rate_limit = getattr(request, 'rate_limit', None)
+    if rate_limit:
+        response['RateLimit-Policy'] = (f'{rate_limit.limit};'
+                                        f'w={rate_limit.period}')
+        response['RateLimit-Limit'] = str(rate_limit.limit)
+        response['RateLimit-Remaining'] = str(rate_limit.remaining)
+        response['RateLimit-Reset'] = str(rate_limit.reset)
+    release = getattr(request, 'in_flight_release', None)
+    if release:
+        response._resource_closers.append(release)
+    return response
+
+
+@sync_and_async_middleware
+def rate_limit_middleware(get_response):
+    """Add the RateLimit headers of the throttles to responses."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            return add_headers(request, await get_response(request))
+    else:
+        def middleware(request):
+            return add_headers(request, get_response(request))
+    return middleware
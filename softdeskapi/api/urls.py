@@ -1,13 +1,21 @@
 from django.urls import path
 
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import (
+    TokenObtainPairView,
+    TokenRefreshView,
+    TokenVerifyView,
+)
 
-from . import views
+from . import async_views, views
+from .instrumentation import metrics_view
 
 app_name = 'api'
 
 api_root = views.ApiRootView.as_view()
 login = TokenObtainPairView.as_view()
+# Renew and check tokens without a password check.
+token_refresh = TokenRefreshView.as_view()
+token_verify = TokenVerifyView.as_view()
 registration = views.RegistrationView.as_view()
 project_list = views.ProjectViewSet.as_view({
     'get': 'list',
@@ -18,24 +26,57 @@ project_detail = views.ProjectViewSet.as_view({
     'put': 'update',
     'delete': 'destroy'
 })
+project_export = views.ProjectExportView.as_view()
+project_summary = views.ProjectSummaryView.as_view()
+search = views.SearchView.as_view()
 user_list = views.UserView.as_view()
 user_detail = views.UserDetailView.as_view()
+user_bulk = views.UserBulkView.as_view()
 issue_list = views.IssueView.as_view()
 issue_detail = views.IssueDetailView.as_view()
+issue_bulk = views.IssueBulkView.as_view()
 comment_list = views.CommentView.as_view()
 comment_detail = views.CommentDetailView.as_view()
+comment_bulk = views.CommentBulkView.as_view()
+async_project_list = async_views.AsyncProjectListView.as_view()
+async_project_detail = async_views.AsyncProjectDetailView.as_view()
+async_user_list = async_views.AsyncUserView.as_view()
+async_issue_list = async_views.AsyncIssueView.as_view()
+async_comment_list = async_views.AsyncCommentView.as_view()
+async_comment_detail = async_views.AsyncCommentDetailView.as_view()
+project_changes = async_views.AsyncChangeView.as_view()
 
 urlpatterns = [
     path('', api_root),
     path('login/', login),
+    path('login/refresh/', token_refresh),
+    path('login/verify/', token_verify),
     path('signup/', registration),
     path('projects/', project_list, name='projects'),
+    path('search/', search, name='search'),
+    path('metrics/', metrics_view),
     path('projects/<int:pk>/', project_detail),
+    path('projects/<int:p_id>/export/', project_export),
+    path('projects/<int:p_id>/summary/', project_summary),
+    path('projects/<int:p_id>/changes/', project_changes),
     path('projects/<int:p_id>/users/', user_list),
     path('projects/<int:p_id>/users/<int:pk>/', user_detail),
+    path('projects/<int:p_id>/users/bulk/', user_bulk),
     path('projects/<int:p_id>/issues/', issue_list),
     path('projects/<int:p_id>/issues/<int:pk>/', issue_detail),
+    path('projects/<int:p_id>/issues/bulk/', issue_bulk),
     path('projects/<int:p_id>/issues/<int:i_id>/comments/', comment_list),
     path('projects/<int:p_id>/issues/<int:i_id>/comments/<int:pk>/',
          comment_detail),
+    path('projects/<int:p_id>/issues/<int:i_id>/comments/bulk/',
+         comment_bulk),
+    # Read endpoints served by async views, for ASGI deployments.
+    path('async/projects/', async_project_list),
+    path('async/projects/<int:p_id>/', async_project_detail),
+    path('async/projects/<int:p_id>/users/', async_user_list),
+    path('async/projects/<int:p_id>/issues/', async_issue_list),
+    path('async/projects/<int:p_id>/issues/<int:i_id>/comments/',
+         async_comment_list),
+    path('async/projects/<int:p_id>/issues/<int:i_id>/comments/<int:pk>/',
+         async_comment_detail),
 ]
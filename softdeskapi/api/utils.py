@@ -1,31 +1,159 @@
+from django.db import transaction
+
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
 
+from .changes import deferred_changes
+from .membership import membership_cache
+from .summary import deferred_counts
 from .models import Contributor
-
-
-def extract_ids(path):
-    """Extract ids from an url."""
-    ids = []
-    for word in path.split('/'):
-        if word.isdigit():
-            ids.append(int(word))
-    return ids
+from .versioning import deferred_bumps, touch
 
 
 def is_contributor(user, project):
     """Verify if an user is a project's contributor."""
-    try:
-        Contributor.objects.get(user_id=user, project_id=project)
-    except Contributor.DoesNotExist:
+    if user.pk is None:
         return False
-    return True
+
+    project_id = getattr(project, 'pk', project)
+    member = membership_cache.get(user.pk, project_id)
+    if member is None:
+        member = Contributor.objects.filter(user_id=user.pk,
+                                            project_id=project_id).exists()
+        membership_cache.set(user.pk, project_id, member)
+    return member
+
+
+async def ais_contributor(user, project):
+    """Verify if an user is a project's contributor, with the async ORM."""
+    if user.pk is None:
+        return False
+
+    project_id = getattr(project, 'pk', project)
+    member = membership_cache.get(user.pk, project_id)
+    if member is None:
+        member = await Contributor.objects.filter(
+            user_id=user.pk, project_id=project_id
+        ).aexists()
+        membership_cache.set(user.pk, project_id, member)
+    return member
+
+
+def parse_expand(request, serializer):
+    """
+    Read the relations to embed from the expand query parameter, once each
+    and in the serializer's order, as they key the cached plans.
+    """
+    param = request.query_params.get('expand', '')
+    expand = {name for name in param.split(',') if name}
+    unknown = expand - set(serializer.expandable_fields)
+    if unknown:
+        raise ValidationError(
+            {'expand': f"Unknown relations: {', '.join(sorted(unknown))}."}
+        )
+    return [name for name in serializer.expandable_fields if name in expand]
+
+
+def parse_fields(request, serializer):
+    """
+    Read the fields to return from the fields query parameter, once each
+    and in the serializer's order, as they key the cached plans.
+    """
+    param = request.query_params.get('fields', '')
+    fields = {name for name in param.split(',') if name}
+    unknown = fields - set(serializer.Meta.fields)
+    if unknown:
+        raise ValidationError(
+            {'fields': f"Unknown fields: {', '.join(sorted(unknown))}."}
+        )
+    return [name for name in serializer.Meta.fields if name in fields]
+
+
+def serialize(serializer, data, obj=None, partial=False, **kwargs):
+    """
+    Serialize in the database, in one transaction, giving kwargs to save.
+    An edited object is locked and read again first, so concurrent edits
+    apply one after the other.
+    """
+    with transaction.atomic(savepoint=False):
+        if obj:
+            obj = get_object_or_404(type(obj).objects.select_for_update(),
+                                    pk=obj.pk)
+            serializer = serializer(obj, data=data, partial=partial)
+        else:
+            serializer = serializer(data=data)
+        if not serializer.is_valid():
+            return Response(serializer.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+        serializer.save(**kwargs)
+    return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+def bulk_items(request, max_items=10000):
+    """Read the list of items sent to a bulk endpoint."""
+    items = request.data
+    if not isinstance(items, list) or len(items) > max_items:
+        raise ValidationError(
+            {'items': f'Expected a list of at most {max_items} items.'}
+        )
+    return items
+
+
+def match_instances(queryset, items, key='id'):
+    """
+    Load in one query the objects named by the items' key.
+    Return them in the items order, with the errors of missing ones indexed
+    by position.
+    """
+    ids = [item.get(key) if isinstance(item, dict) else None
+           for item in items]
+    found = queryset.in_bulk([i for i in ids if isinstance(i, int)])
+    errors = {index: {key: ['Not found.']}
+              for index, i in enumerate(ids) if i not in found}
+    return [found.get(i) for i in ids], errors
+
+
+def check_contributors(project, items, field):
+    """Verify in one query that the items' users are project's contributors."""
+    users = {item[field] for item in items if field in item}
+    members = set(Contributor.objects.filter(
+        project_id=project, user_id__in=users
+    ).values_list('user_id', flat=True))
+    # Errors are reported under the input name, not the attribute one.
+    return {index: {field.removesuffix('_id'): ['Not a project contributor.']}
+            for index, item in enumerate(items)
+            if field in item and item[field] not in members}
+
+
+def bulk_serialize(serializer, errors=None, parent=None, **kwargs):
+    """
+    Save all the items of a validated bulk serializer in one transaction.
+    Bulk queries send no signal, so the parent's version is bumped here.
+    """
+    if errors:
+        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+    with transaction.atomic():
+        serializer.save(**kwargs)
+        touch(parent)
+    return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-def serialize(serializer, data, obj=None):
-    """Serialize in the database."""
-    serializer = serializer(obj, data=data) if obj else serializer(data=data)
-    if serializer.is_valid():
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_200_OK)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+def bulk_delete(queryset, ids, key='pk', delete=None):
+    """
+    Delete the objects whose key is listed, in one transaction, with the
+    delete function of their model if given.
+    """
+    if not isinstance(ids, list):
+        raise ValidationError({'items': 'Expected a list of ids.'})
+    with transaction.atomic(), deferred_bumps(), deferred_counts(), \
+            deferred_changes():
+        queryset = queryset.filter(**{f'{key}__in': ids})
+        found = set(queryset.values_list(key, flat=True))
+        if delete:
+            delete(queryset)
+        else:
+            queryset.delete()
+    return Response([{'id': i, 'deleted': i in found} for i in ids],
+                    status=status.HTTP_200_OK)
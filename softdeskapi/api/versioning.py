@@ -0,0 +1,138 @@
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Project, Issue, Comment
+
+_deferred = threading.local()
+
+
+def bump_project(pk):
+    """Mark the project, its contributors or its issues as changed."""
+    pending = getattr(_deferred, 'pending', None)
+    if pending is not None:
+        pending[Project].add(pk)
+        return
+    Project.objects.filter(pk=pk).update(version=F('version') + 1,
+                                         updated_time=timezone.now())
+
+
+def comment_stats():
+    """
+    Comment columns of issues, for an update of their rows: subqueries on
+    the comment index, correct whatever wrote the comments, bulk queries
+    included.
+    """
+    comments = Comment.objects.filter(issue_id=OuterRef('pk')).order_by()
+    latest = comments.order_by('-created_time', '-comment_id')
+    return {
+        'comment_count': Coalesce(Subquery(
+            comments.values('issue_id').annotate(count=Count('*'))
+            .values('count')
+        ), 0),
+        'last_comment_time': Subquery(latest.values('created_time')[:1]),
+        'last_comment_author': Subquery(
+            latest.values('author_user_id')[:1]
+        ),
+    }
+
+
+def update_issues(pks):
+    """
+    Bump the comments version of the issues and compute their comment
+    columns, then bump their projects, whose issue lists show them.
+    """
+    now = timezone.now()
+    issues = Issue.objects.filter(pk__in=pks)
+    issues.update(comments_version=F('comments_version') + 1,
+                  comments_updated_time=now, last_activity_time=now,
+                  **comment_stats())
+    Project.objects.filter(pk__in=issues.values('project_id')).update(
+        version=F('version') + 1, updated_time=now
+    )
+
+
+def bump_issue(pk):
+    """Mark the comments of the issue as changed."""
+    pending = getattr(_deferred, 'pending', None)
+    if pending is not None:
+        pending[Issue].add(pk)
+        return
+    update_issues([pk])
+
+
+def touch(parent):
+    """Bump the version of a project, or of the comments of an issue."""
+    if isinstance(parent, Project):
+        bump_project(parent.pk)
+    elif isinstance(parent, Issue):
+        bump_issue(parent.pk)
+
+
+@contextmanager
+def deferred_bumps():
+    """Bump each version touched in the block once, when it ends."""
+    if getattr(_deferred, 'pending', None) is not None:
+        yield
+        return
+
+    _deferred.pending = {Project: set(), Issue: set()}
+    try:
+        yield
+    finally:
+        pending, _deferred.pending = _deferred.pending, None
+    for pk in pending[Project]:
+        bump_project(pk)
+    if pending[Issue]:
+        update_issues(pending[Issue])
+
+
+def make_etag(request, name, pk, version):
+    """
+    Entity tag of a resource version, distinct for each url. The scheme
+    and host count, as bodies carry absolute links to the next pages.
+    """
+    url = request.build_absolute_uri()
+    query = hashlib.md5(url.encode()).hexdigest()[:8]
+    return f'"{name}{pk}-{version}-{query}"'
+
+
+def project_validators(request, project):
+    """Validators of a project, its contributors and its issues."""
+    return (make_etag(request, 'project', project.pk, project.version),
+            project.updated_time)
+
+
+def comments_validators(request, issue):
+    """Validators of the comments of an issue."""
+    return (make_etag(request, 'issue', issue.pk, issue.comments_version),
+            issue.comments_updated_time)
+
+
+def comment_validators(request, comment):
+    """Validators of a single comment."""
+    version = int(comment.updated_time.timestamp() * 1000000)
+    return (make_etag(request, 'comment', comment.pk, version),
+            comment.updated_time)
+
+
+def not_modified(request, validators):
+    """Return a 304 response if the client's copy is current, else None."""
+    etag, last_modified = validators
+    return get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp())
+    )
+
+
+def add_validators(response, validators):
+    """Set the ETag and Last-Modified headers of a response."""
+    etag, last_modified = validators
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
@@ -1,4 +1,10 @@
+from django.contrib.auth.models import User
+
+from django.db import transaction
+from django.http import StreamingHttpResponse
+
 from rest_framework import viewsets, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -12,6 +18,10 @@ from .serializers import (
     IssueSerializer,
     CommentSerializer,
     UserSerializer,
+    ContributorBulkSerializer,
+    IssueBulkSerializer,
+    CommentBulkSerializer,
+    ProjectSummarySerializer,
 )
 from .permissions import (
     CanReadOrEditProject,
@@ -19,41 +29,81 @@ from .permissions import (
     CanReadOrEditIssue,
     CanReadOrEditComment
 )
-from .utils import serialize
+from .context import get_project_context
+from .deletion import delete_issue_batch, delete_issues, delete_project
+from .export import FORMATS, issues_with_comments
+from .membership import membership_cache
+from .response_cache import response_cache
+from .search import get_backend, search_terms
+from .summary import get_summary
+from .throttling import ThrottleFirstMixin
+from .filters import filter_issues
+from .pagination import ProjectCursorPagination, IssueKeysetPagination
+from .versioning import (
+    not_modified,
+    add_validators,
+    project_validators,
+    comments_validators,
+    comment_validators,
+)
+from .utils import (
+    parse_expand,
+    parse_fields,
+    serialize,
+    bulk_items,
+    match_instances,
+    check_contributors,
+    bulk_serialize,
+    bulk_delete,
+)
 
 
-class ApiRootView(APIView):
+class ApiRootView(ThrottleFirstMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, format=None):
         return Response({
-            'projects': reverse('api:projects', request=request, format=format)
+            'projects': reverse('api:projects', request=request,
+                                format=format),
+            'search': reverse('api:search', request=request, format=format),
         })
 
 
-class RegistrationView(APIView):
+class RegistrationView(ThrottleFirstMixin, APIView):
     """View for user registration."""
     def post(self, request, format=None):
         return serialize(UserSerializer, request.data)
 
 
-class UserView(APIView):
+class UserView(ThrottleFirstMixin, APIView):
     """View for get project's contributors or add a contributor."""
     permission_classes = [IsAuthenticated and CanReadOrEditUser]
 
     def get(self, request, p_id, format=None):
-        project = get_object_or_404(Project, pk=p_id)
-        contributors = Contributor.objects.filter(project_id=project)
-        p_users = [c.user_id for c in contributors]
-        serializer = UserSerializer(p_users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        project = get_project_context(request, self).project
+        validators = project_validators(request, project)
+        response = not_modified(request, validators)
+        if response:
+            return response
+
+        def build():
+            plan = UserSerializer.values_plan(
+                fields=parse_fields(request, UserSerializer)
+            )
+            return plan.data(plan.values(
+                User.objects.filter(contributor__project_id=project)
+            ))
+
+        data = response_cache.get_or_build(validators[0], build)
+        response = Response(data, status=status.HTTP_200_OK)
+        return add_validators(response, validators)
 
     def post(self, request, p_id, format=None):
         request.data['project_id'] = p_id
         return serialize(ContributorSerializer, request.data)
 
 
-class UserDetailView(APIView):
+class UserDetailView(ThrottleFirstMixin, APIView):
     """View for remove a project's contributor."""
     permission_classes = [IsAuthenticated and CanReadOrEditUser]
 
@@ -64,109 +114,368 @@ class UserDetailView(APIView):
         return Response(status=status.HTTP_200_OK)
 
 
-class IssueView(APIView):
+class UserBulkView(ThrottleFirstMixin, APIView):
+    """View for add or remove contributors in bulk."""
+    permission_classes = [IsAuthenticated and CanReadOrEditUser]
+
+    def post(self, request, p_id, format=None):
+        project = get_project_context(request, self).project
+        serializer = ContributorBulkSerializer(data=bulk_items(request),
+                                               many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Verify in two queries that users exist and aren't contributors.
+        ids = [item['user_id_id'] for item in serializer.validated_data]
+        users = set(User.objects.filter(pk__in=ids).values_list('pk',
+                                                                flat=True))
+        members = set(Contributor.objects.filter(
+            project_id=project, user_id__in=ids
+        ).values_list('user_id', flat=True))
+        errors = {}
+        for index, user in enumerate(ids):
+            if user not in users:
+                errors[index] = {'user_id': ['Unknown user.']}
+            elif user in members:
+                errors[index] = {'user_id': ['Already a contributor.']}
+            members.add(user)
+
+        response = bulk_serialize(serializer, errors, parent=project,
+                                  project_id=project)
+        if response.status_code == status.HTTP_200_OK:
+            # bulk_create sends no post_save signal.
+            for user in ids:
+                membership_cache.invalidate(user, project.pk)
+        return response
+
+    def delete(self, request, p_id, format=None):
+        project = get_project_context(request, self).project
+        return bulk_delete(Contributor.objects.filter(project_id=project),
+                           request.data, key='user_id')
+
+
+class IssueView(ThrottleFirstMixin, APIView):
     """View for get project's issues or add a issue."""
     permission_classes = [IsAuthenticated and CanReadOrEditIssue]
 
     def get(self, request, p_id, format=None):
-        project = get_object_or_404(Project, pk=p_id)
-        issues = Issue.objects.filter(project_id=project)
-        serializer = IssueSerializer(issues, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        project = get_project_context(request, self).project
+        validators = project_validators(request, project)
+        response = not_modified(request, validators)
+        if response:
+            return response
+
+        def build():
+            plan = IssueSerializer.values_plan(
+                parse_expand(request, IssueSerializer),
+                parse_fields(request, IssueSerializer)
+            )
+            issues = filter_issues(Issue.objects.filter(project_id=project),
+                                   request.query_params)
+
+            paginator = IssueKeysetPagination()
+            page = paginator.paginate_queryset(plan.values(issues), request,
+                                               self)
+            return paginator.get_paginated_response(plan.data(page)).data
+
+        data = response_cache.get_or_build(validators[0], build)
+        response = Response(data, status=status.HTTP_200_OK)
+        return add_validators(response, validators)
 
     def post(self, request, p_id, format=None):
-        request.data['project_id'] = p_id
-        request.data['author_user_id'] = request.user.id
-        request.data['assignee_user_id'] = request.data.get(
-            'assignee_user_id', request.user.id)
-
-        # Verify that assignee_user_id is a project contributor.
-        try:
-            Contributor.objects.get(user_id=request.data['assignee_user_id'],
-                                    project_id=p_id)
-        except Contributor.DoesNotExist:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
-
-        return serialize(IssueSerializer, request.data)
-
-
-class IssueDetailView(APIView):
+        project = get_project_context(request, self).project
+        assignee_id = request.data.get('assignee_user_id', request.user.id)
+
+        with transaction.atomic(savepoint=False):
+            # The permission already checked that the user contributes.
+            assignee = request.user
+            if str(assignee_id) != str(request.user.id):
+                # Verify that assignee_user_id is a project contributor.
+                contributor = Contributor.objects.select_related(
+                    'user_id'
+                ).filter(user_id=assignee_id, project_id=project).first()
+                if contributor is None:
+                    return Response(status=status.HTTP_400_BAD_REQUEST)
+                assignee = contributor.user_id
+
+            return serialize(IssueSerializer, request.data,
+                             project_id=project, author_user_id=request.user,
+                             assignee_user_id=assignee)
+
+
+class IssueDetailView(ThrottleFirstMixin, APIView):
     """View for edit or delete an issue."""
     permission_classes = [IsAuthenticated and CanReadOrEditIssue]
+    issue_url_kwarg = 'pk'
 
     def put(self, request, p_id, pk, format=None):
-        issue = get_object_or_404(Issue, pk=pk, project_id=p_id)
-        request.data['project_id'] = issue.project_id.project_id
-        request.data['author_user_id'] = issue.author_user_id.id
-        request.data['assignee_user_id'] = issue.assignee_user_id.id
-
+        issue = get_project_context(request, self).issue
         return serialize(IssueSerializer, request.data, issue)
 
+    def patch(self, request, p_id, pk, format=None):
+        issue = get_project_context(request, self).issue
+        return serialize(IssueSerializer, request.data, issue, partial=True)
+
     def delete(self, request, p_id, pk, format=None):
-        issue = get_object_or_404(Issue, pk=pk, project_id=p_id)
-        issue.delete()
+        issue = get_project_context(request, self).issue
+        with transaction.atomic(savepoint=False):
+            delete_issue_batch([issue.pk])
         return Response(status=status.HTTP_200_OK)
 
 
-class CommentView(APIView):
+class IssueBulkView(ThrottleFirstMixin, APIView):
+    """View for create, edit or delete issues in bulk."""
+    permission_classes = [IsAuthenticated and CanReadOrEditIssue]
+
+    def post(self, request, p_id, format=None):
+        project = get_project_context(request, self).project
+        items = bulk_items(request)
+        for item in items:
+            if isinstance(item, dict):
+                item.setdefault('assignee_user_id', request.user.id)
+
+        serializer = IssueBulkSerializer(data=items, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        errors = check_contributors(project, serializer.validated_data,
+                                    'assignee_user_id_id')
+        return bulk_serialize(serializer, errors, parent=project,
+                              project_id=project,
+                              author_user_id=request.user)
+
+    def put(self, request, p_id, format=None):
+        project = get_project_context(request, self).project
+        items = bulk_items(request)
+        issues, errors = match_instances(
+            Issue.objects.filter(project_id=project,
+                                 author_user_id=request.user.pk),
+            items
+        )
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = IssueBulkSerializer(issues, data=items, many=True,
+                                         partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        errors = check_contributors(project, serializer.validated_data,
+                                    'assignee_user_id_id')
+        return bulk_serialize(serializer, errors, parent=project)
+
+    def delete(self, request, p_id, format=None):
+        project = get_project_context(request, self).project
+        issues = Issue.objects.filter(project_id=project,
+                                      author_user_id=request.user.pk)
+        return bulk_delete(issues, request.data, delete=delete_issues)
+
+
+class CommentView(ThrottleFirstMixin, APIView):
     """View for get issue's comments or add a comment."""
     permission_classes = [IsAuthenticated and CanReadOrEditComment]
+    issue_url_kwarg = 'i_id'
 
     def get(self, request, p_id, i_id, format=None):
-        issue = get_object_or_404(Issue, pk=i_id, project_id=p_id)
-        comments = Comment.objects.filter(issue_id=issue)
-        serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        issue = get_project_context(request, self).issue
+        validators = comments_validators(request, issue)
+        response = not_modified(request, validators)
+        if response:
+            return response
+
+        def build():
+            plan = CommentSerializer.values_plan(
+                parse_expand(request, CommentSerializer),
+                parse_fields(request, CommentSerializer)
+            )
+            return plan.data(plan.values(
+                Comment.objects.filter(issue_id=issue).order_by('created_time')
+            ))
+
+        data = response_cache.get_or_build(validators[0], build)
+        response = Response(data, status=status.HTTP_200_OK)
+        return add_validators(response, validators)
 
     def post(self, request, p_id, i_id, format=None):
-        issue = get_object_or_404(Issue, pk=i_id, project_id=p_id)
-        request.data['issue_id'] = issue.id
-        request.data['author_user_id'] = request.user.id
-
-        return serialize(CommentSerializer, request.data)
+        issue = get_project_context(request, self).issue
+        return serialize(CommentSerializer, request.data, issue_id=issue,
+                         author_user_id=request.user)
 
 
-class CommentDetailView(APIView):
+class CommentDetailView(ThrottleFirstMixin, APIView):
     """View for get, edit or delete a comment."""
     permission_classes = [IsAuthenticated and CanReadOrEditComment]
-
-    def get_comment(self, p_id, i_id, pk):
-        issue = get_object_or_404(Issue, pk=i_id, project_id=p_id)
-        return get_object_or_404(Comment, pk=pk, issue_id=issue)
+    issue_url_kwarg = 'i_id'
+    comment_url_kwarg = 'pk'
 
     def get(self, request, p_id, i_id, pk, format=None):
-        comment = self.get_comment(p_id, i_id, pk)
-        serializer = CommentSerializer(comment)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        comment = get_project_context(request, self).comment
+        validators = comment_validators(request, comment)
+        response = not_modified(request, validators)
+        if response:
+            return response
+
+        serializer = CommentSerializer(
+            comment, expand=parse_expand(request, CommentSerializer),
+            fields=parse_fields(request, CommentSerializer)
+        )
+        response = Response(serializer.data, status=status.HTTP_200_OK)
+        return add_validators(response, validators)
 
     def put(self, request, p_id, i_id, pk, format=None):
-        comment = self.get_comment(p_id, i_id, pk)
-        request.data['issue_id'] = comment.issue_id.id
-        request.data['author_user_id'] = comment.author_user_id.id
-
+        comment = get_project_context(request, self).comment
         return serialize(CommentSerializer, request.data, comment)
 
+    def patch(self, request, p_id, i_id, pk, format=None):
+        comment = get_project_context(request, self).comment
+        return serialize(CommentSerializer, request.data, comment,
+                         partial=True)
+
     def delete(self, request, p_id, i_id, pk, format=None):
-        comment = self.get_comment(p_id, i_id, pk)
+        comment = get_project_context(request, self).comment
         comment.delete()
         return Response(status=status.HTTP_200_OK)
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class CommentBulkView(ThrottleFirstMixin, APIView):
+    """View for create, edit or delete comments in bulk."""
+    permission_classes = [IsAuthenticated and CanReadOrEditComment]
+    issue_url_kwarg = 'i_id'
+
+    def post(self, request, p_id, i_id, format=None):
+        issue = get_project_context(request, self).issue
+        serializer = CommentBulkSerializer(data=bulk_items(request),
+                                           many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        return bulk_serialize(serializer, parent=issue, issue_id=issue,
+                              author_user_id=request.user)
+
+    def put(self, request, p_id, i_id, format=None):
+        issue = get_project_context(request, self).issue
+        items = bulk_items(request)
+        comments, errors = match_instances(
+            Comment.objects.filter(issue_id=issue,
+                                   author_user_id=request.user.pk),
+            items, key='comment_id'
+        )
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = CommentBulkSerializer(comments, data=items, many=True,
+                                           partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        return bulk_serialize(serializer, parent=issue)
+
+    def delete(self, request, p_id, i_id, format=None):
+        issue = get_project_context(request, self).issue
+        comments = Comment.objects.filter(issue_id=issue,
+                                          author_user_id=request.user.pk)
+        return bulk_delete(comments, request.data)
+
+
+class ProjectExportView(ThrottleFirstMixin, APIView):
+    """View for export a project's issues with their comments."""
+    permission_classes = [IsAuthenticated and CanReadOrEditIssue]
+    throttle_scope = 'exports'
+    # Counted in the client's in-flight requests while streaming.
+    expensive = True
+
+    def get(self, request, p_id, format=None):
+        project = get_project_context(request, self).project
+        output = request.query_params.get('output', 'ndjson')
+        if output not in FORMATS:
+            raise ValidationError({'output': f'Expected one of '
+                                             f"{', '.join(FORMATS)}."})
+
+        render, content_type = FORMATS[output]
+        response = StreamingHttpResponse(
+            render(issues_with_comments(project)), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="project-{project.pk}.{output}"'
+        )
+        return response
+
+
+class ProjectSummaryView(ThrottleFirstMixin, APIView):
+    """View for get a project's issue counters."""
+    permission_classes = [IsAuthenticated and CanReadOrEditIssue]
+
+    def get(self, request, p_id, format=None):
+        project = get_project_context(request, self).project
+        validators = project_validators(request, project)
+        response = not_modified(request, validators)
+        if response:
+            return response
+
+        serializer = ProjectSummarySerializer(get_summary(project))
+        return add_validators(Response(serializer.data), validators)
+
+
+class SearchView(ThrottleFirstMixin, APIView):
+    """View for search issues and comments in the user's projects."""
+    permission_classes = [IsAuthenticated]
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request, format=None):
+        query = request.query_params.get('q', '')
+        if not search_terms(query):
+            raise ValidationError({'q': 'Expected words to search.'})
+        try:
+            limit = min(int(request.query_params.get('limit',
+                                                     self.default_limit)),
+                        self.max_limit)
+        except ValueError:
+            raise ValidationError({'limit': 'Expected an integer.'})
+
+        backend = get_backend()
+        if backend is None:
+            return Response({'detail': 'Search is not available on this '
+                                       'database.'},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+        return Response(backend.search(request.user.pk, query, max(limit, 1)))
+
+
+class ProjectViewSet(ThrottleFirstMixin, viewsets.ModelViewSet):
     """View for list, create, get, edit or delete project."""
-    queryset = Project.objects.all()
+    queryset = Project.objects.filter(deleted_time=None)
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated and CanReadOrEditProject]
+    pagination_class = ProjectCursorPagination
 
     def list(self, request):
-        projects_list = []
-
-        for p in self.queryset:
-            if Contributor.objects.filter(user_id=request.user, project_id=p):
-                projects_list.append(p)
-
-        serializer = ProjectSerializer(projects_list, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Only the caller's projects, in one query joined through Contributor.
+        projects = self.queryset.filter(contributor__user_id=request.user.pk)
+        plan = ProjectSerializer.values_plan(
+            fields=parse_fields(request, ProjectSerializer)
+        )
+        page = self.paginate_queryset(plan.values(projects))
+        return self.get_paginated_response(plan.data(page))
+
+    def retrieve(self, request, *args, **kwargs):
+        project = self.get_object()
+        validators = project_validators(request, project)
+        response = not_modified(request, validators)
+        if response:
+            return response
+
+        data = response_cache.get_or_build(
+            validators[0], lambda: self.get_serializer(
+                project, fields=parse_fields(request, ProjectSerializer)
+            ).data
+        )
+        response = Response(data, status=status.HTTP_200_OK)
+        return add_validators(response, validators)
 
     def create(self, request, *args, **kwargs):
         request.data['author_user_id'] = request.user.id
@@ -175,3 +484,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def update(self, request, *args, **kwargs):
         request.data['author_user_id'] = request.user.id
         return super().update(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        delete_project(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
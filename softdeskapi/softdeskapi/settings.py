@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.instrumentation.instrumentation_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,6 +52,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.db.read_replica_middleware',
+    'api.throttling.rate_limit_middleware',
 ]
 
 ROOT_URLCONF = 'softdeskapi.urls'
@@ -75,12 +79,101 @@ WSGI_APPLICATION = 'softdeskapi.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
+# Read from SOFTDESK_DB_* environment variables, SQLite by default.
+# Connections persist CONN_MAX_AGE seconds, or come from a pool on
+# PostgreSQL when SOFTDESK_DB_POOL_MAX_SIZE is set. SOFTDESK_DB_REPLICA_HOST
+# adds a replica receiving the reads of safe requests.
+
+DB_ENGINE = os.environ.get('SOFTDESK_DB_ENGINE',
+                           'django.db.backends.sqlite3')
+DB_POOL_MAX_SIZE = int(os.environ.get('SOFTDESK_DB_POOL_MAX_SIZE', 0))
+
+if DB_ENGINE.endswith('sqlite3'):
+    # WAL lets readers run beside the writer, and IMMEDIATE transactions
+    # wait for the write lock up to the timeout instead of failing. WAL is
+    # the default of a database named by SOFTDESK_DB_NAME only: the journal
+    # mode is written in the file, which the repository's one keeps as is.
+    SQLITE_JOURNAL_MODE = os.environ.get(
+        'SOFTDESK_SQLITE_JOURNAL_MODE',
+        'WAL' if os.environ.get('SOFTDESK_DB_NAME') else ''
+    )
+    SQLITE_PRAGMAS = {
+        'mmap_size': int(os.environ.get('SOFTDESK_SQLITE_MMAP_SIZE', 2 ** 28)),
+    }
+    if SQLITE_JOURNAL_MODE:
+        SQLITE_PRAGMAS['journal_mode'] = SQLITE_JOURNAL_MODE
+    if SQLITE_JOURNAL_MODE.upper() == 'WAL':
+        # Durable up to the last checkpoint in WAL mode.
+        SQLITE_PRAGMAS['synchronous'] = 'NORMAL'
+    DB_OPTIONS = {
+        'init_command': ''.join(f'PRAGMA {name}={value};'
+                                for name, value in SQLITE_PRAGMAS.items()),
+        'timeout': int(os.environ.get('SOFTDESK_SQLITE_BUSY_TIMEOUT', 20)),
+        'transaction_mode': 'IMMEDIATE',
+    }
+elif DB_POOL_MAX_SIZE:
+    DB_OPTIONS = {
+        'pool': {
+            'min_size': int(os.environ.get('SOFTDESK_DB_POOL_MIN_SIZE', 2)),
+            'max_size': DB_POOL_MAX_SIZE,
+        },
+    }
+else:
+    DB_OPTIONS = {}
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': DB_ENGINE,
+        'NAME': os.environ.get('SOFTDESK_DB_NAME', BASE_DIR / 'db.sqlite3'),
+        'USER': os.environ.get('SOFTDESK_DB_USER', ''),
+        'PASSWORD': os.environ.get('SOFTDESK_DB_PASSWORD', ''),
+        'HOST': os.environ.get('SOFTDESK_DB_HOST', ''),
+        'PORT': os.environ.get('SOFTDESK_DB_PORT', ''),
+        # Pooled connections can't be persistent ones too.
+        'CONN_MAX_AGE': 0 if DB_POOL_MAX_SIZE else int(
+            os.environ.get('SOFTDESK_DB_CONN_MAX_AGE', 60)
+        ),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': DB_OPTIONS,
+    }
+}
+
+if os.environ.get('SOFTDESK_DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['SOFTDESK_DB_REPLICA_HOST'],
+        'PORT': os.environ.get('SOFTDESK_DB_REPLICA_PORT',
+                               DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_ROUTERS = ['api.db.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Serialized responses go to a size-bounded cache of their own.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+            'CULL_FREQUENCY': 4,
+        },
+    },
 }
 
 
@@ -102,6 +195,31 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# ALGORITHM hashes new passwords: 'pbkdf2_sha256', 'scrypt' or 'argon2'
+# (needs argon2-cffi). A password hashed with another algorithm or cost is
+# rehashed at its next login. Run password_benchmark to size the costs.
+
+SOFTDESK_PASSWORD_HASHING = {
+    'ALGORITHM': os.environ.get('SOFTDESK_PASSWORD_HASHER', 'pbkdf2_sha256'),
+    'PBKDF2_ITERATIONS': 1000000,
+    'SCRYPT_WORK_FACTOR': 2 ** 14,
+}
+
+# The hasher of ALGORITHM first, then the others, so that passwords hashed
+# by a former policy are still checked and rehashed at their next login.
+_hashers = {
+    'pbkdf2_sha256': 'api.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'api.hashers.ScryptPasswordHasher',
+    'argon2': 'api.hashers.Argon2PasswordHasher',
+}
+_preferred = _hashers[SOFTDESK_PASSWORD_HASHING['ALGORITHM']]
+PASSWORD_HASHERS = [
+    _preferred,
+    *(path for path in _hashers.values() if path != _preferred),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
@@ -131,10 +249,95 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.TokenBucketThrottle',
+        'api.throttling.InFlightThrottle',
     ],
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
+    'TOKEN_OBTAIN_SERIALIZER': 'api.serializers.LoginSerializer',
+}
+
+# Authentication
+# STATELESS_READS trusts the token claims on safe requests: a deactivated
+# user keeps read access until the access token expires.
+
+SOFTDESK_AUTH = {
+    'USER_CACHE_TTL': 60,
+    'STATELESS_READS': False,
+}
+
+# Project memberships cache
+# The LRU is per process: a change only invalidates it in the worker that
+# made it, and other workers keep a revoked membership for up to 'ttl'
+# seconds. Use 'api.membership.DjangoCacheBackend' on a shared cache
+# (Redis, Memcached) to invalidate everywhere, with a longer ttl.
+
+SOFTDESK_MEMBERSHIP_CACHE = {
+    'BACKEND': 'api.membership.LRUBackend',
+    'OPTIONS': {
+        'max_size': 10000,
+        'ttl': 5,
+    },
+}
+
+# Request instrumentation
+# Server-Timing headers, and route quantiles at /metrics for scrapers sending
+# the token. SLOW_QUERY_MS logs slower queries to 'api.slow_queries'.
+
+SOFTDESK_INSTRUMENTATION = {
+    'SERVER_TIMING': True,
+    'METRICS_TOKEN': os.environ.get('SOFTDESK_METRICS_TOKEN', ''),
+    'SLOW_QUERY_MS': None,
+}
+
+# Project deletion
+# Projects are hidden at once and their rows deleted by batches of issues.
+# With SOFT_DELETE, the rows are left to the purge_deleted_projects command.
+
+SOFTDESK_DELETION = {
+    'SOFT_DELETE': False,
+    'BATCH_SIZE': 1000,
+}
+
+# Rate limiting
+# Token buckets per client and scope: BURST requests, refilled at once every
+# BURST / RATE seconds. Anonymous requests are in 'auth', exports in 'exports'.
+# MAX_IN_FLIGHT caps the exports and change feed waits a user runs at once.
+# Share the cache between workers (Redis, Memcached) to share the budgets.
+
+SOFTDESK_THROTTLING = {
+    'CACHE_ALIAS': 'throttle',
+    'SCOPES': {
+        'reads': {'BURST': 600, 'RATE': 20},
+        'writes': {'BURST': 120, 'RATE': 5},
+        'auth': {'BURST': 30, 'RATE': 1},
+        'exports': {'BURST': 10, 'RATE': 0.2},
+    },
+    'MAX_IN_FLIGHT': 4,
+}
+
+# Change feed of projects
+# /projects/<id>/changes/ waits up to MAX_WAIT seconds for a change. The
+# compact_changes command drops changes older than RETENTION_DAYS.
+
+SOFTDESK_CHANGES = {
+    'PAGE_SIZE': 100,
+    'MAX_WAIT': 30,
+    'RETENTION_DAYS': 30,
+}
+
+# Cached responses of list endpoints
+
+SOFTDESK_RESPONSE_CACHE = {
+    'ALIAS': 'responses',
+    'TIMEOUT': 300,
 }